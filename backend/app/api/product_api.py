@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, Query
 from typing import List, Optional
 
-from app.services.product_service import ProductService
+from app.services.product_service import AsyncProductService
 from app.schemas.product_schema import ProductBase, ProductDetail
-from app.dependencies import get_product_service
+from app.dependencies import get_async_product_service
 
 
 
@@ -12,24 +12,24 @@ router = APIRouter(prefix="/products", tags=["products"])
 
 
 @router.get("", response_model=List[ProductBase])
-def list_products(
+async def list_products(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
-    service: ProductService = Depends(get_product_service)
+    service: AsyncProductService = Depends(get_async_product_service)
 ):
-    return service.list_products(skip=(page-1)*limit, limit=limit)
+    return await service.list_products(skip=(page-1)*limit, limit=limit)
 
 @router.get("/search", response_model=List[ProductBase])
-def search_products(
+async def search_products(
     q: str = Query(..., min_length=1),
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
-    service: ProductService = Depends(get_product_service)
+    service: AsyncProductService = Depends(get_async_product_service)
 ):
-    return service.search_products(query=q, skip=(page-1)*limit, limit=limit)
+    return await service.search_products(query=q, skip=(page-1)*limit, limit=limit)
 
 @router.get("/filter", response_model=List[ProductBase])
-def filter_products(
+async def filter_products(
     gender: Optional[str] = None,
     master_category: Optional[str] = None,
     sub_category: Optional[str] = None,
@@ -41,7 +41,7 @@ def filter_products(
     max_price: Optional[float] = None,
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
-    service: ProductService = Depends(get_product_service)
+    service: AsyncProductService = Depends(get_async_product_service)
 ):
     filters = {
         "gender": gender,
@@ -55,11 +55,11 @@ def filter_products(
         "max_price": max_price,
     }
     filters = {k: v for k, v in filters.items() if v is not None}
-    return service.filter_products(filters=filters, skip=(page-1)*limit, limit=limit)
+    return await service.filter_products(filters=filters, skip=(page-1)*limit, limit=limit)
 
 @router.get("/{product_id}", response_model=ProductDetail)
-def get_product_detail(
+async def get_product_detail(
     product_id: int,
-    service: ProductService = Depends(get_product_service)
+    service: AsyncProductService = Depends(get_async_product_service)
 ):
-    return service.get_product_detail(product_id)
+    return await service.get_product_detail(product_id)
@@ -1,7 +1,12 @@
+import json
+import threading
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List
-from app.services.recommendation_service import RecommendationService
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    from app.services.recommendation_service import RecommendationService
 
 class RecommendationRequest(BaseModel):
     query: str
@@ -14,10 +19,49 @@ class ProductRecommendation(BaseModel):
 
 router = APIRouter(prefix="/recommend", tags=["recommend"])
 
-# Dependency
-recommendation_service = RecommendationService()
+# 推薦服務 (含 numpy / torch 等重量級相依) 在第一次使用或背景 warm-up 時才建立，
+# 避免 import 這個 router 就拖慢 API 啟動
+_recommendation_service: Optional["RecommendationService"] = None
+_service_lock = threading.Lock()
+
+
+def get_recommendation_service() -> "RecommendationService":
+    """Dependency (同步函式，FastAPI 會在 thread pool 執行，建立時不阻塞 event loop)"""
+    global _recommendation_service
+    if _recommendation_service is None:
+        with _service_lock:
+            if _recommendation_service is None:
+                from app.services.recommendation_service import RecommendationService
+                _recommendation_service = RecommendationService()
+    return _recommendation_service
+
+
+def peek_recommendation_service() -> Optional["RecommendationService"]:
+    """已建立時回傳服務實例，不觸發建立 (shutdown 用)"""
+    return _recommendation_service
+
 
 @router.post("", response_model=List[ProductRecommendation])
-async def recommend_api(request: RecommendationRequest):
+async def recommend_api(
+    request: RecommendationRequest,
+    recommendation_service=Depends(get_recommendation_service),
+):
     results = await recommendation_service.recommend(request.query, request.limit)
     return results
+
+
+@router.post("/stream")
+async def recommend_stream_api(
+    request: RecommendationRequest,
+    recommendation_service=Depends(get_recommendation_service),
+):
+    """以 Server-Sent Events 回傳：先送出商品清單，再逐 token 送出推薦理由"""
+    async def event_stream():
+        async for event, data in recommendation_service.recommend_stream(request.query, request.limit):
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
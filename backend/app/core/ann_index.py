@@ -0,0 +1,277 @@
+"""
+Approximate nearest-neighbour backends
+VectorIndex 可插拔的近似最近鄰索引：
+
+- ivf:  純 NumPy 的 IVF-flat (spherical k-means 粗量化 + nprobe 個 list 內精確計分)
+- hnsw: 選用 hnswlib (未安裝時無法使用)
+- pq / sq8: 壓縮向量 (見 quantization.py)，ADC 計分後以快照的 float32 向量精確重排
+
+索引檔案由 scripts/build_ann_index.py 離線建立，與 embedding 快照同版本存放，
+row 位置對應快照矩陣的列。所有向量皆假設已正規化 (內積 = 餘弦相似度)。
+"""
+
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.quantization import QUANTIZERS, ProductQuantizer
+
+
+def top_k_rows(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """回傳分數最高的 top_k 個位置 (由高至低)"""
+    k = min(top_k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def spherical_kmeans(
+    data: np.ndarray, n_clusters: int, iterations: int = 20, seed: int = 0, batch_size: int = 8192
+) -> np.ndarray:
+    """以內積做分配的 k-means，回傳正規化後的中心點 (n_clusters, dim)"""
+    rng = np.random.default_rng(seed)
+    data = np.asarray(data, dtype=np.float32)
+    centroids = data[rng.choice(len(data), n_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        assign = assign_clusters(data, centroids, batch_size)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        counts = np.bincount(assign, minlength=n_clusters)
+
+        # 空的 cluster 重新抽樣一個點
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = data[rng.choice(len(data), len(empty), replace=False)]
+        centroids = sums / (np.linalg.norm(sums, axis=1, keepdims=True) + 1e-8)
+
+    return centroids.astype(np.float32)
+
+
+def assign_clusters(data: np.ndarray, centroids: np.ndarray, batch_size: int = 8192) -> np.ndarray:
+    """分批計算每個向量最近的中心點"""
+    assign = np.empty(len(data), dtype=np.int64)
+    for start in range(0, len(data), batch_size):
+        block = np.asarray(data[start:start + batch_size], dtype=np.float32)
+        assign[start:start + batch_size] = np.argmax(block @ centroids.T, axis=1)
+    return assign
+
+
+class IVFFlatIndex:
+    """
+    IVF-flat：每個向量歸屬一個粗量化中心點 (inverted list)。
+    查詢時只對最接近的 nprobe 個 list 內的向量做精確內積。
+    """
+
+    backend = "ivf"
+
+    def __init__(self, centroids: np.ndarray, order: np.ndarray, offsets: np.ndarray, nprobe: int = settings.IVF_NPROBE):
+        self.centroids = centroids
+        self.order = order          # 依 list 排序後的 row 位置
+        self.offsets = offsets      # 第 i 個 list 為 order[offsets[i]:offsets[i + 1]]
+        self.nprobe = nprobe
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(
+        cls,
+        matrix: np.ndarray,
+        nlist: Optional[int] = None,
+        iterations: int = 20,
+        train_size: int = 100_000,
+        seed: int = 0,
+    ) -> "IVFFlatIndex":
+        n = len(matrix)
+        nlist = min(nlist or max(1, int(4 * np.sqrt(n))), n)
+        rng = np.random.default_rng(seed)
+        sample_rows = rng.choice(n, min(n, max(train_size, nlist)), replace=False)
+        centroids = spherical_kmeans(matrix[np.sort(sample_rows)], nlist, iterations, seed)
+
+        assign = assign_clusters(matrix, centroids)
+        order = np.argsort(assign, kind="stable").astype(np.int64)
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=nlist), out=offsets[1:])
+        return cls(centroids, order, offsets)
+
+    def search(self, matrix: np.ndarray, query: np.ndarray, top_k: int, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        lists = top_k_rows(self.centroids @ query, nprobe)
+        candidates = np.concatenate([self.order[self.offsets[l]:self.offsets[l + 1]] for l in lists])
+        if len(candidates) == 0:
+            return candidates, np.empty(0, dtype=np.float32)
+        scores = matrix[candidates] @ query
+        top = top_k_rows(scores, top_k)
+        return candidates[top], scores[top]
+
+    def save(self, path: str) -> None:
+        tmp_path = Path(str(path) + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, centroids=self.centroids, order=self.order, offsets=self.offsets)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFFlatIndex":
+        with np.load(path) as data:
+            return cls(data["centroids"], data["order"], data["offsets"])
+
+
+class HNSWIndex:
+    """hnswlib 包裝 (選用相依套件)"""
+
+    backend = "hnsw"
+
+    def __init__(self, index, ef_search: int = settings.HNSW_EF_SEARCH):
+        self.index = index
+        self.ef_search = ef_search
+
+    @staticmethod
+    def _hnswlib():
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise RuntimeError("hnsw backend requires the optional 'hnswlib' package") from e
+        return hnswlib
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, m: int = 16, ef_construction: int = 200) -> "HNSWIndex":
+        hnswlib = cls._hnswlib()
+        index = hnswlib.Index(space="ip", dim=matrix.shape[1])
+        index.init_index(max_elements=len(matrix), M=m, ef_construction=ef_construction)
+        index.add_items(np.asarray(matrix, dtype=np.float32), np.arange(len(matrix)))
+        return cls(index)
+
+    def search(self, matrix: np.ndarray, query: np.ndarray, top_k: int, ef_search: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(top_k, self.index.get_current_count())
+        self.index.set_ef(max(ef_search or self.ef_search, k))
+        labels, distances = self.index.knn_query(query, k=k)
+        # space="ip" 的距離為 1 - 內積
+        return labels[0].astype(np.int64), (1.0 - distances[0]).astype(np.float32)
+
+    def save(self, path: str) -> None:
+        tmp_path = str(path) + ".tmp"
+        self.index.save_index(tmp_path)
+        Path(tmp_path).replace(path)
+
+    @classmethod
+    def load(cls, path: str, dim: int) -> "HNSWIndex":
+        hnswlib = cls._hnswlib()
+        index = hnswlib.Index(space="ip", dim=dim)
+        index.load_index(str(path))
+        return cls(index)
+
+
+class QuantizedIndex:
+    """
+    壓縮向量索引：記憶體中只保留 codes，先以 ADC 對全部向量近似計分，
+    再從 float 向量 (mmap 快照，只會載入被存取的頁面) 取前 rerank 個候選精確重排。
+    """
+
+    def __init__(self, quantizer, codes: np.ndarray, rerank: int = settings.VECTOR_RERANK_CANDIDATES):
+        self.quantizer = quantizer
+        self.codes = codes
+        self.rerank = rerank
+
+    @property
+    def backend(self) -> str:
+        return self.quantizer.name
+
+    @property
+    def bytes_per_vector(self) -> int:
+        return self.quantizer.code_size
+
+    @classmethod
+    def build(
+        cls,
+        matrix: np.ndarray,
+        kind: str = ProductQuantizer.name,
+        subspaces: int = settings.PQ_SUBSPACES,
+        train_size: int = 50_000,
+        seed: int = 0,
+    ) -> "QuantizedIndex":
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(matrix[np.sort(rng.choice(len(matrix), min(len(matrix), train_size), replace=False))])
+        if kind == ProductQuantizer.name:
+            quantizer = ProductQuantizer.train(sample, m=subspaces, seed=seed)
+        else:
+            quantizer = QUANTIZERS[kind].train(sample)
+        return cls(quantizer, quantizer.encode(matrix))
+
+    def search(self, matrix: np.ndarray, query: np.ndarray, top_k: int, rerank: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        rerank = self.rerank if rerank is None else rerank
+        approx = self.quantizer.adc_scores(self.codes, query)
+        if rerank <= 0:
+            rows = top_k_rows(approx, top_k)
+            return rows, approx[rows]
+        candidates = np.sort(top_k_rows(approx, max(rerank, top_k)))
+        scores = np.asarray(matrix[candidates]) @ query
+        top = top_k_rows(scores, top_k)
+        return candidates[top], scores[top]
+
+    def save(self, path: str) -> None:
+        tmp_path = Path(str(path) + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, kind=np.array(self.backend), codes=self.codes, **self.quantizer.state())
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: str) -> "QuantizedIndex":
+        with np.load(path) as data:
+            quantizer = QUANTIZERS[str(data["kind"])].from_state(data)
+            return cls(quantizer, data["codes"])
+
+
+ANN_BACKENDS = {
+    "ivf": IVFFlatIndex,
+    "hnsw": HNSWIndex,
+    "pq": QuantizedIndex,
+    "sq8": QuantizedIndex,
+}
+
+ANN_SUFFIXES = {
+    "ivf": ".ivf.npz",
+    "hnsw": ".hnsw.bin",
+    "pq": ".pq.npz",
+    "sq8": ".sq8.npz",
+}
+
+
+def ann_index_path(snapshot_dir: str, version: str, backend: str) -> Path:
+    return Path(snapshot_dir) / f"{version}{ANN_SUFFIXES[backend]}"
+
+
+def load_ann_index(snapshot_dir: str, manifest: dict, backend: str):
+    """載入與快照同版本的 ANN 索引，檔案不存在時回傳 None"""
+    path = ann_index_path(snapshot_dir, manifest["version"], backend)
+    if not path.exists():
+        return None
+    if backend == "hnsw":
+        return HNSWIndex.load(str(path), manifest["dim"])
+    return ANN_BACKENDS[backend].load(str(path))
+
+
+def evaluate_search(
+    search_fn: Callable[[np.ndarray, int], np.ndarray],
+    ground_truth: List[np.ndarray],
+    queries: np.ndarray,
+    top_k: int,
+) -> Dict[str, float]:
+    """以精確搜尋結果為基準，計算 recall@k 與平均 / p95 延遲 (毫秒)"""
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, ground_truth):
+        start = time.perf_counter()
+        rows = search_fn(query, top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(np.intersect1d(rows, expected[:top_k]))
+    return {
+        "recall": hits / (len(queries) * top_k),
+        "mean_ms": float(np.mean(latencies)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
@@ -0,0 +1,139 @@
+"""
+Attribute postings for filtered vector search
+每個屬性值 -> 向量索引 row 位置 (已排序) 的倒排表，
+讓 hybrid search 只對符合條件的商品計分，而不是先搜尋再事後過濾。
+"""
+
+import logging
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+# products 欄位 -> 查找表
+FILTERABLE_COLUMNS = {
+    "gender_id": "genders",
+    "base_colour_id": "colours",
+    "usage_id": "usages",
+    "season_id": "seasons",
+    "article_type_id": "article_types",
+}
+
+# NLU 常見的鍵名 -> products 欄位
+FILTER_ALIASES = {
+    "gender": "gender_id",
+    "colour": "base_colour_id",
+    "color": "base_colour_id",
+    "base_colour": "base_colour_id",
+    "baseColour": "base_colour_id",
+    "usage": "usage_id",
+    "occasion": "usage_id",
+    "season": "season_id",
+    "article_type": "article_type_id",
+    "articleType": "article_type_id",
+}
+
+
+class AttributePostings:
+    """
+    postings[column][value_id] = 該值的 row 位置 (np.int64, 已排序)
+    lookup[column][name.lower()] = value_id (同時收錄 name 與 display_name)
+    """
+
+    def __init__(self, postings: Dict[str, Dict[int, np.ndarray]], lookup: Dict[str, Dict[str, int]]):
+        self.postings = postings
+        self.lookup = lookup
+
+    @classmethod
+    def empty(cls) -> "AttributePostings":
+        return cls({}, {})
+
+    @property
+    def available(self) -> bool:
+        return bool(self.postings)
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection, ids: np.ndarray) -> "AttributePostings":
+        """從 products 與查找表建立倒排表；ids 為向量索引的商品 id (row 順序)"""
+        columns = list(FILTERABLE_COLUMNS)
+        try:
+            rows = conn.execute(f"SELECT id, {', '.join(columns)} FROM products").fetchall()
+            lookup = {}
+            for column, table in FILTERABLE_COLUMNS.items():
+                names = {}
+                for value_id, name, display_name in conn.execute(f"SELECT id, name, display_name FROM {table}"):
+                    for label in (name, display_name):
+                        if label:
+                            names.setdefault(str(label).strip().lower(), value_id)
+                lookup[column] = names
+        except sqlite3.OperationalError as e:
+            logging.warning(f"Attribute filters unavailable: {e}")
+            return cls.empty()
+
+        if not rows or len(ids) == 0:
+            return cls({column: {} for column in columns}, lookup)
+
+        # 商品 id -> 索引 row 位置 (沒有向量的商品略過)
+        data = np.array([[-1 if v is None else v for v in row] for row in rows], dtype=np.int64)
+        order = np.argsort(ids)
+        sorted_ids = ids[order]
+        found = np.searchsorted(sorted_ids, data[:, 0])
+        found = np.minimum(found, len(sorted_ids) - 1)
+        matched = sorted_ids[found] == data[:, 0]
+        positions = order[found[matched]]
+        data = data[matched]
+
+        postings = {}
+        for i, column in enumerate(columns, start=1):
+            values = data[:, i]
+            by_value = np.argsort(values, kind="stable")
+            unique, starts = np.unique(values[by_value], return_index=True)
+            groups = np.split(positions[by_value], starts[1:])
+            postings[column] = {
+                int(value): np.sort(group) for value, group in zip(unique, groups) if value >= 0
+            }
+        return cls(postings, lookup)
+
+    def resolve(self, filters: Dict[str, Any]) -> Dict[str, List[int]]:
+        """
+        將 {"gender": "Men", "usage_id": 3, "colour": ["Black", "黑色"]} 之類的條件
+        轉為 {products 欄位: [value_id, ...]}；無法辨識的鍵或值會被忽略。
+        """
+        resolved: Dict[str, List[int]] = {}
+        for key, value in (filters or {}).items():
+            column = key if key in FILTERABLE_COLUMNS else FILTER_ALIASES.get(key)
+            if column is None or value is None:
+                continue
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            value_ids = []
+            for item in values:
+                if isinstance(item, (int, np.integer)) and not isinstance(item, bool):
+                    value_ids.append(int(item))
+                elif isinstance(item, str) and item.strip().lower() in self.lookup.get(column, {}):
+                    value_ids.append(self.lookup[column][item.strip().lower()])
+            if value_ids:
+                resolved.setdefault(column, []).extend(value_ids)
+        return resolved
+
+    def candidates(self, resolved: Dict[str, Iterable[int]]) -> Optional[np.ndarray]:
+        """
+        同一欄位的多個值取聯集、不同欄位取交集，回傳符合條件的 row 位置。
+        沒有任何條件時回傳 None (代表不需過濾)。
+        """
+        if not resolved:
+            return None
+        sets = []
+        for column, value_ids in resolved.items():
+            column_postings = self.postings.get(column, {})
+            parts = [column_postings[v] for v in set(value_ids) if v in column_postings]
+            if not parts:
+                return np.empty(0, dtype=np.int64)
+            sets.append(parts[0] if len(parts) == 1 else np.unique(np.concatenate(parts)))
+        # 由最小的集合開始交集，選擇性高時成本很低
+        sets.sort(key=len)
+        rows = sets[0]
+        for other in sets[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+            if len(rows) == 0:
+                break
+        return rows
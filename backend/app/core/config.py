@@ -13,6 +13,21 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./fashion_store.db"
     DB_PATH: str = "F:\\My_Repo\\Github\\20251119_Fashion-Store-MVP\\backend\\fashion_store.db"
+    ASYNC_DATABASE_URL: str = ""  # 空字串 = 由 DATABASE_URL 推導 (sqlite → sqlite+aiosqlite)
+    SQL_ECHO: bool = False  # 記錄每個 SQL (除錯用；與 DEBUG 分開，避免開發模式洗版)
+    DB_POOL_SIZE: int = 5  # 讀寫 engine 的常駐連線數 (SQLite 同時只有一個寫入者)
+    DB_READ_POOL_SIZE: int = 20  # 唯讀 engine 的常駐連線數 (WAL 下讀取可平行)
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # 取得連線的等待秒數
+    DB_POOL_RECYCLE: int = 3600  # 連線使用超過此秒數後重建 (-1 = 不重建)
+    DB_QUERY_CACHE_SIZE: int = 1200  # SQLAlchemy 編譯後 SQL 的快取數
+    SQLITE_JOURNAL_MODE: str = "WAL"  # WAL：讀取與寫入互不阻塞
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # WAL 下 NORMAL 不會損毀資料庫，只可能遺失最後一筆 commit
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB，以 mmap 讀取資料庫檔
+    SQLITE_CACHE_SIZE_KIB: int = 65536  # 每個連線的 page cache (KiB)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # 遇到鎖定時的等待時間，避免立即 "database is locked"
+    SQLITE_FOREIGN_KEYS: bool = True
+    SQLITE_CACHED_STATEMENTS: int = 256  # 每個連線的 prepared statement 快取數
 
     # App Settings
     APP_NAME: str = "Fashion Store MVP"
@@ -31,6 +46,37 @@ class Settings(BaseSettings):
     # Ollama Settings (for AI features in Phase 3)
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "llama3.1:8b"
+    OLLAMA_TIMEOUT: float = 60.0  # 單一請求的逾時秒數
+    OLLAMA_CONNECT_TIMEOUT: float = 5.0
+    OLLAMA_MAX_CONNECTIONS: int = 20  # 連線池大小
+    OLLAMA_KEEPALIVE_SECONDS: float = 30.0
+    OLLAMA_MAX_CONCURRENCY: int = 4  # 同時進行的生成數量上限
+
+    # Vector Search Settings
+    EMBEDDING_MODEL: str = "paraphrase-multilingual-MiniLM-L12-v2"
+    VECTOR_INDEX_REFRESH_SECONDS: float = 30.0  # 檢查 product_embeddings 是否變動的間隔
+    EMBEDDING_SNAPSHOT_DIR: str = "./embedding_snapshots"  # .npy 快照目錄 (空字串 = 停用)
+    VECTOR_INDEX_BACKEND: str = "exact"  # exact, ivf, hnsw, pq, sq8 (索引由 scripts/build_ann_index.py 建立)
+    EMBEDDING_BACKEND: str = "torch"  # torch, onnx, onnx-int8 (僅 CPU 推論)
+    EMBEDDING_ONNX_DIR: str = "./onnx_models"  # 匯出 / 量化後的 ONNX 模型目錄
+    EMBEDDING_QUANTIZATION: str = "avx2"  # int8 量化設定: arm64, avx2, avx512, avx512_vnni
+    EMBEDDING_BATCH_MAX_SIZE: int = 32  # 線上查詢 micro-batch 的最大筆數
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0  # 收集同一批請求的最長等待時間
+    EMBEDDING_CACHE_SIZE: int = 10000  # 查詢向量 LRU 快取筆數 (0 = 停用)
+    EMBEDDING_CACHE_PATH: str = "./embedding_cache.db"  # 快取的 SQLite spill 檔 (空字串 = 只用記憶體)
+    EMBEDDING_CACHE_DISK_MAX_ENTRIES: int = 100000
+    IVF_NPROBE: int = 8
+    HNSW_EF_SEARCH: int = 64
+    PQ_SUBSPACES: int = 48  # 384 維 / 48 = 每個子空間 8 維，每個向量 48 bytes
+    VECTOR_RERANK_CANDIDATES: int = 100  # pq / sq8 以 float 向量精確重排的候選數
+
+    # NLU Settings
+    RULE_NLU_ENABLED: bool = True  # 先以查找表規則解析，信心不足才呼叫 LLM
+    RULE_NLU_MIN_CONFIDENCE: float = 0.6  # 查詢文字被辨識的比例門檻
+    RULE_NLU_REFRESH_SECONDS: float = 60.0  # 檢查查找表是否變動 (需重建關鍵字 matcher) 的間隔
+    INTENT_CACHE_SIZE: int = 1024  # 0 = 停用
+    INTENT_CACHE_TTL_SECONDS: float = 3600.0
+    INTENT_CACHE_SIMILARITY: float = 0.95  # 語義命中所需的最低餘弦相似度
 
     # Security
     SECRET_KEY: str = "dev-secret-key-change-in-production"
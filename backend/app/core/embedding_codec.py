@@ -0,0 +1,58 @@
+"""
+Embedding vector codec
+product_embeddings.embedding_vector 的序列化格式
+
+二進位格式 (version 1):
+    [0:2]  magic  b"FV"
+    [2]    uint8  格式版本
+    [3]    uint8  dtype 代碼 (1 = little-endian float32)
+    [4:8]  uint32 向量維度 (little-endian)
+    [8:]   向量內容 (dim * 4 bytes)
+
+舊資料為 UTF-8 JSON 陣列，decode_vector 兩種格式皆可讀取。
+"""
+
+import json
+import struct
+from typing import Union
+
+import numpy as np
+
+MAGIC = b"FV"
+FORMAT_VERSION = 1
+DTYPE_FLOAT32 = 1
+
+_HEADER = struct.Struct("<2sBBI")
+_DTYPES = {DTYPE_FLOAT32: np.dtype("<f4")}
+
+HEADER_SIZE = _HEADER.size
+
+
+def is_binary(blob: Union[bytes, memoryview, str]) -> bool:
+    """判斷是否為二進位格式 (否則視為舊的 JSON 格式)"""
+    return not isinstance(blob, str) and bytes(blob[:2]) == MAGIC
+
+
+def encode_vector(vector) -> bytes:
+    """將向量編碼為 header + little-endian float32"""
+    array = np.asarray(vector, dtype="<f4").ravel()
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, DTYPE_FLOAT32, array.shape[0])
+    return header + array.tobytes()
+
+
+def decode_vector(blob: Union[bytes, memoryview, str]) -> np.ndarray:
+    """
+    解碼向量。二進位格式以 np.frombuffer 直接引用原始 bytes (不複製，唯讀)；
+    JSON 格式則解析後轉為 float32。
+    """
+    if not is_binary(blob):
+        if not isinstance(blob, str):
+            blob = bytes(blob).decode("utf-8")
+        return np.asarray(json.loads(blob), dtype=np.float32)
+
+    _, version, dtype_code, dim = _HEADER.unpack_from(blob)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported embedding format version: {version}")
+    if dtype_code not in _DTYPES:
+        raise ValueError(f"Unsupported embedding dtype code: {dtype_code}")
+    return np.frombuffer(blob, dtype=_DTYPES[dtype_code], count=dim, offset=HEADER_SIZE)
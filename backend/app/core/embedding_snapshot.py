@@ -0,0 +1,194 @@
+"""
+Embedding snapshot files
+將正規化後的向量矩陣匯出為 .npy 快照 (加上 id sidecar)，
+讓多個 uvicorn worker 以 np.load(mmap_mode='r') 共用同一份 OS page cache。
+
+目錄結構:
+    <snapshot_dir>/current.json                 目前使用中的版本 (manifest)
+    <snapshot_dir>/<version>.vectors.npy        float32 (N, dim)，已正規化
+    <snapshot_dir>/<version>.ids.npy            int64 (N,)
+    <snapshot_dir>/<version>.<backend>.*        選用的 ANN / 量化索引 (見 ann_index.py)
+
+version = <模型識別字串 (含 backend，見 embedding_model_id)>-<embedding_text 內容雜湊>。
+所有檔案皆先寫入暫存檔再以 os.replace 原子替換，讀取端不會看到寫到一半的檔案。
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+MANIFEST_NAME = "current.json"
+
+
+def embedding_model_id(model_name: str = settings.EMBEDDING_MODEL, backend: str = settings.EMBEDDING_BACKEND,
+                       quantization: str = settings.EMBEDDING_QUANTIZATION) -> str:
+    """
+    向量的模型識別字串，記錄於 product_embeddings.embedding_model、快照 manifest 與查詢向量快取的 key。
+    不同 backend / 量化產生的向量不可混用，因此納入識別字串；torch 維持原本的模型名稱 (與既有資料相容)。
+    """
+    if backend == "torch":
+        return model_name
+    if backend == "onnx-int8":
+        return f"{model_name}@{backend}-{quantization}"
+    return f"{model_name}@{backend}"
+
+
+def compute_text_hash(items: Iterable[Tuple[int, str]]) -> str:
+    """以 (product_id, embedding_text) 計算內容雜湊"""
+    digest = hashlib.sha256()
+    for product_id, text in items:
+        digest.update(f"{product_id}\t{text or ''}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def snapshot_version(model_name: str, text_hash: str) -> str:
+    safe_model = re.sub(r"[^A-Za-z0-9._-]+", "_", model_name)
+    return f"{safe_model}-{text_hash[:16]}"
+
+
+class SnapshotWriter:
+    """
+    以 np.lib.format.open_memmap 逐段寫入快照，記憶體用量與商品數量無關：
+        writer = SnapshotWriter(snapshot_dir, model_name, count, dim)
+        writer.write(offset, ids_chunk, vectors_chunk)   # 可重複呼叫
+        manifest = writer.commit(text_hash)
+    寫入期間使用暫存檔，commit 時才改名並切換 manifest。
+    """
+
+    def __init__(self, snapshot_dir: str, model_name: str, count: int, dim: int):
+        self.directory = Path(snapshot_dir)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.model_name = model_name
+        self.count = count
+        self.dim = dim
+        token = f"{os.getpid()}-{time.time_ns()}"
+        self._tmp_vectors = self.directory / f".{token}.vectors.npy.tmp"
+        self._tmp_ids = self.directory / f".{token}.ids.npy.tmp"
+        self._vectors = np.lib.format.open_memmap(self._tmp_vectors, mode="w+", dtype=np.float32, shape=(count, dim))
+        self._ids = np.lib.format.open_memmap(self._tmp_ids, mode="w+", dtype=np.int64, shape=(count,))
+        self.written = 0
+
+    def write(self, offset: int, ids, vectors) -> None:
+        """寫入 [offset, offset + len(ids)) 的列，向量在此正規化"""
+        vectors = np.array(vectors, dtype=np.float32)
+        if len(ids) != len(vectors):
+            raise ValueError(f"ids ({len(ids)}) and vectors ({len(vectors)}) length mismatch")
+        if len(vectors):
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-8
+        end = offset + len(ids)
+        self._vectors[offset:end] = vectors
+        self._ids[offset:end] = ids
+        self.written = max(self.written, end)
+
+    def _close_files(self) -> None:
+        for array in (self._vectors, self._ids):
+            array.flush()
+            mmap = getattr(array, "_mmap", None)
+            if mmap is not None:
+                mmap.close()
+        self._vectors = self._ids = None
+
+    def commit(self, text_hash: str, keep: int = 2) -> dict:
+        if self.written != self.count:
+            self.abort()
+            raise ValueError(f"Snapshot incomplete: {self.written} of {self.count} rows written")
+        self._close_files()
+        for path in (self._tmp_vectors, self._tmp_ids):
+            with open(path, "rb+") as f:
+                os.fsync(f.fileno())
+
+        version = snapshot_version(self.model_name, text_hash)
+        vectors_file = f"{version}.vectors.npy"
+        ids_file = f"{version}.ids.npy"
+        os.replace(self._tmp_vectors, self.directory / vectors_file)
+        os.replace(self._tmp_ids, self.directory / ids_file)
+
+        manifest = {
+            "version": version,
+            "model": self.model_name,
+            "text_hash": text_hash,
+            "count": int(self.count),
+            "dim": int(self.dim),
+            "vectors": vectors_file,
+            "ids": ids_file,
+            "created_at": time.time(),
+        }
+        tmp_manifest = self.directory / (MANIFEST_NAME + ".tmp")
+        with open(tmp_manifest, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_manifest, self.directory / MANIFEST_NAME)
+
+        _prune_snapshots(self.directory, keep)
+        return manifest
+
+    def abort(self) -> None:
+        """放棄寫到一半的快照 (例如發生例外)"""
+        if self._vectors is not None:
+            self._close_files()
+        for path in (self._tmp_vectors, self._tmp_ids):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def write_snapshot(snapshot_dir: str, model_name: str, text_hash: str, ids, matrix, keep: int = 2) -> dict:
+    """
+    寫入新快照並切換 manifest。
+    matrix 會在此正規化；保留最近 keep 個版本，讓仍在使用舊版的 worker 不受影響。
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if len(ids) != len(matrix):
+        raise ValueError(f"ids ({len(ids)}) and matrix ({len(matrix)}) length mismatch")
+    dim = int(matrix.shape[1]) if matrix.ndim == 2 else 0
+    writer = SnapshotWriter(snapshot_dir, model_name, len(ids), dim)
+    try:
+        writer.write(0, ids, matrix.reshape(len(ids), dim))
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.commit(text_hash, keep=keep)
+
+
+def _prune_snapshots(directory: Path, keep: int) -> None:
+    """刪除較舊的快照版本及其衍生索引檔 (檔案仍被 mmap 時刪除失敗則略過)"""
+    versions = {}
+    for path in directory.glob("*.vectors.npy"):
+        versions[path.name[: -len(".vectors.npy")]] = path.stat().st_mtime
+    for version in sorted(versions, key=versions.get, reverse=True)[keep:]:
+        for path in directory.glob(f"{version}.*"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def read_manifest(snapshot_dir: str) -> Optional[dict]:
+    """讀取目前的 manifest，不存在時回傳 None"""
+    path = Path(snapshot_dir) / MANIFEST_NAME
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_snapshot(snapshot_dir: str, manifest: dict) -> Tuple[np.ndarray, np.ndarray]:
+    """以唯讀 mmap 載入快照，回傳 (ids, matrix)"""
+    directory = Path(snapshot_dir)
+    matrix = np.load(directory / manifest["vectors"], mmap_mode="r")
+    ids = np.load(directory / manifest["ids"])
+    if len(ids) != len(matrix):
+        raise ValueError(f"Snapshot {manifest['version']} is inconsistent")
+    return ids, matrix
@@ -0,0 +1,116 @@
+"""
+Aho-Corasick keyword matcher
+一次掃描查詢字串即可找出所有已知詞彙 (查找表名稱、中文顯示名稱)，
+時間複雜度與查詢長度 + 命中數成正比，與詞彙數量無關。
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+class KeywordMatcher:
+    """
+    matcher = KeywordMatcher([("black", payload), ("黑色", payload), ...])
+    matcher.find("black jeans") -> [(start, end, keyword, [payload, ...]), ...]
+    關鍵字不分大小寫；英數字關鍵字需落在單字邊界 (避免 "tan" 命中 "standard")，
+    中文等其他字元則不需要邊界。重疊時採最左最長 (leftmost-longest) 的結果。
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Any]] = ()):
+        # 每個節點: goto 表、failure link、在此結束的關鍵字
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        self._payloads: Dict[str, List[Any]] = {}
+        for keyword, payload in keywords:
+            self.add(keyword, payload)
+        self._built = False
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def add(self, keyword: str, payload: Any) -> None:
+        keyword = keyword.strip().lower()
+        if not keyword:
+            return
+        payloads = self._payloads.setdefault(keyword, [])
+        if payload not in payloads:
+            payloads.append(payload)
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = nxt
+        if keyword not in self._output[node]:
+            self._output[node].append(keyword)
+        self._built = False
+
+    def build(self) -> None:
+        """以 BFS 建立 failure link 並合併 output"""
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                for keyword in self._output[self._fail[nxt]]:
+                    if keyword not in self._output[nxt]:
+                        self._output[nxt].append(keyword)
+        self._built = True
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """所有 (可能重疊的) 命中: (start, end, keyword)，位置為原始 text 的索引"""
+        if not self._built:
+            self.build()
+        # 部分字元轉小寫後長度會改變 (例如 "İ" -> "i̇")，以 origin 記錄每個小寫字元對應的原始位置
+        lowered: List[str] = []
+        origin: List[int] = []
+        for index, ch in enumerate(text):
+            for lower_ch in ch.lower():
+                lowered.append(lower_ch)
+                origin.append(index)
+        matches = []
+        node = 0
+        for i, ch in enumerate(lowered):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for keyword in self._output[node]:
+                start, end = i + 1 - len(keyword), i + 1
+                # 命中必須落在原始字元的邊界上
+                if start > 0 and origin[start - 1] == origin[start]:
+                    continue
+                if end < len(lowered) and origin[end] == origin[end - 1]:
+                    continue
+                if _is_word_char(keyword[0]) and start > 0 and _is_word_char(lowered[start - 1]):
+                    continue
+                if _is_word_char(keyword[-1]) and end < len(lowered) and _is_word_char(lowered[end]):
+                    continue
+                matches.append((origin[start], origin[end - 1] + 1, keyword))
+        return matches
+
+    def find(self, text: str) -> List[Tuple[int, int, str, List[Any]]]:
+        """最左最長、互不重疊的命中: (start, end, keyword, payloads)"""
+        matches = sorted(self.find_all(text), key=lambda m: (m[0], -(m[1] - m[0])))
+        result = []
+        last_end = 0
+        for start, end, keyword in matches:
+            if start >= last_end:
+                result.append((start, end, keyword, self._payloads[keyword]))
+                last_end = end
+        return result
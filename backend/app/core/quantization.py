@@ -0,0 +1,154 @@
+"""
+Vector quantizers
+低記憶體部署用的向量壓縮：
+
+- ScalarQuantizer (sq8): 每個維度 int8，384 維 = 384 bytes/向量
+- ProductQuantizer (pq): 切成 m 個子空間、各 256 個中心點，m=48 時 = 48 bytes/向量
+
+兩者皆以非對稱距離 (ADC) 計分：查詢保持 float32，只有資料庫向量被壓縮。
+"""
+
+from typing import Dict
+
+import numpy as np
+
+
+def kmeans(data: np.ndarray, n_clusters: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """歐氏距離 k-means (Lloyd)，回傳中心點 (n_clusters, dim)"""
+    rng = np.random.default_rng(seed)
+    data = np.asarray(data, dtype=np.float32)
+    centroids = data[rng.choice(len(data), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assign = nearest_centroids(data, centroids)
+        counts = np.bincount(assign, minlength=n_clusters)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # 空的 cluster 重新抽樣一個點
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), len(empty), replace=False)]
+    return centroids
+
+
+def nearest_centroids(data: np.ndarray, centroids: np.ndarray, batch_size: int = 16384) -> np.ndarray:
+    """分批計算每個向量歐氏距離最近的中心點"""
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    assign = np.empty(len(data), dtype=np.int64)
+    for start in range(0, len(data), batch_size):
+        block = np.asarray(data[start:start + batch_size], dtype=np.float32)
+        # ||x - c||^2 = ||x||^2 - 2 x·c + ||c||^2，||x||^2 不影響 argmin
+        assign[start:start + batch_size] = np.argmin(centroid_norms - 2 * block @ centroids.T, axis=1)
+    return assign
+
+
+class ScalarQuantizer:
+    """每個維度以 min/max 線性映射到 int8"""
+
+    name = "sq8"
+
+    def __init__(self, offset: np.ndarray, scale: np.ndarray):
+        self.offset = offset.astype(np.float32)
+        self.scale = scale.astype(np.float32)
+
+    @property
+    def code_size(self) -> int:
+        """每個向量的 bytes 數"""
+        return len(self.offset)
+
+    @classmethod
+    def train(cls, data: np.ndarray) -> "ScalarQuantizer":
+        data = np.asarray(data, dtype=np.float32)
+        low, high = data.min(axis=0), data.max(axis=0)
+        return cls(low, np.maximum(high - low, 1e-8) / 255.0)
+
+    def encode(self, data: np.ndarray, batch_size: int = 65536) -> np.ndarray:
+        codes = np.empty(data.shape, dtype=np.int8)
+        for start in range(0, len(data), batch_size):
+            block = np.asarray(data[start:start + batch_size], dtype=np.float32)
+            levels = np.clip(np.rint((block - self.offset) / self.scale), 0, 255)
+            codes[start:start + batch_size] = (levels - 128).astype(np.int8)
+        return codes
+
+    def adc_scores(self, codes: np.ndarray, query: np.ndarray, batch_size: int = 2048) -> np.ndarray:
+        """近似內積: x ≈ (code + 128) * scale + offset，分批轉型以留在 CPU cache 內"""
+        weighted = (query * self.scale).astype(np.float32)
+        bias = 128.0 * weighted.sum() + float(self.offset @ query)
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), batch_size):
+            scores[start:start + batch_size] = codes[start:start + batch_size].astype(np.float32) @ weighted
+        return scores + bias
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"offset": self.offset, "scale": self.scale}
+
+    @classmethod
+    def from_state(cls, state) -> "ScalarQuantizer":
+        return cls(state["offset"], state["scale"])
+
+
+class ProductQuantizer:
+    """
+    將向量切為 m 個子空間，各自以 256 個中心點 (1 byte) 編碼。
+    codes 以子空間為主的 (m, N) 排列，ADC 查表時每個子空間是連續記憶體。
+    """
+
+    name = "pq"
+
+    def __init__(self, codebooks: np.ndarray):
+        self.codebooks = codebooks.astype(np.float32)  # (m, ksub, dsub)
+
+    @property
+    def m(self) -> int:
+        return self.codebooks.shape[0]
+
+    @property
+    def dsub(self) -> int:
+        return self.codebooks.shape[2]
+
+    @property
+    def code_size(self) -> int:
+        """每個向量的 bytes 數"""
+        return self.m
+
+    @classmethod
+    def train(cls, data: np.ndarray, m: int = 48, iterations: int = 20, seed: int = 0) -> "ProductQuantizer":
+        data = np.asarray(data, dtype=np.float32)
+        dim = data.shape[1]
+        if dim % m:
+            raise ValueError(f"Dimension {dim} is not divisible by {m} subspaces")
+        dsub = dim // m
+        ksub = min(256, len(data))
+        codebooks = np.stack([
+            kmeans(data[:, j * dsub:(j + 1) * dsub], ksub, iterations, seed + j) for j in range(m)
+        ])
+        return cls(codebooks)
+
+    def encode(self, data: np.ndarray) -> np.ndarray:
+        codes = np.empty((self.m, len(data)), dtype=np.uint8)
+        for j in range(self.m):
+            sub = data[:, j * self.dsub:(j + 1) * self.dsub]
+            codes[j] = nearest_centroids(sub, self.codebooks[j])
+        return codes
+
+    def adc_scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """先算查詢對每個子空間中心點的內積表 (m, ksub)，再逐子空間查表加總"""
+        table = np.einsum("mkd,md->mk", self.codebooks, query.reshape(self.m, self.dsub)).astype(np.float32)
+        scores = np.zeros(codes.shape[1], dtype=np.float32)
+        for j in range(self.m):
+            scores += table[j].take(codes[j])
+        return scores
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"codebooks": self.codebooks}
+
+    @classmethod
+    def from_state(cls, state) -> "ProductQuantizer":
+        return cls(state["codebooks"])
+
+
+QUANTIZERS = {
+    ScalarQuantizer.name: ScalarQuantizer,
+    ProductQuantizer.name: ProductQuantizer,
+}
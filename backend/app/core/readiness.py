@@ -0,0 +1,57 @@
+"""
+Subsystem readiness
+記錄背景 warm-up 中各子系統 (向量索引、embedding 模型、NLU...) 的狀態，由 /api/v1/ready 輸出
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable
+
+PENDING = "pending"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+
+class Readiness:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subsystems: Dict[str, Dict[str, Any]] = {}
+
+    def register(self, names: Iterable[str]) -> None:
+        with self._lock:
+            for name in names:
+                self._subsystems.setdefault(name, {"status": PENDING})
+
+    def mark(self, name: str, status: str, error: str = None) -> None:
+        with self._lock:
+            entry = self._subsystems.setdefault(name, {"status": PENDING})
+            if status == WARMING:
+                entry["started_at"] = time.time()
+            elif "started_at" in entry:
+                entry["seconds"] = round(time.time() - entry["started_at"], 3)
+            entry["status"] = status
+            if error:
+                entry["error"] = error
+            else:
+                entry.pop("error", None)
+
+    def is_ready(self, name: str = None) -> bool:
+        with self._lock:
+            if name is not None:
+                return self._subsystems.get(name, {}).get("status") == READY
+            return all(entry["status"] == READY for entry in self._subsystems.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            subsystems = {
+                name: {key: value for key, value in entry.items() if key != "started_at"}
+                for name, entry in self._subsystems.items()
+            }
+        return {
+            "ready": all(entry["status"] == READY for entry in subsystems.values()),
+            "subsystems": subsystems,
+        }
+
+
+readiness = Readiness()
@@ -0,0 +1,14 @@
+"""
+Asyncio task helpers
+推薦 / NLU 流程中預先啟動 (speculative) 的 task 不再需要時，以此取消並等待結束。
+"""
+
+import asyncio
+
+
+async def cancel_and_wait(task: asyncio.Task) -> None:
+    """取消並等待 task 結束 (不留下仍在執行的 task)；呼叫端本身被取消時照常拋出 CancelledError"""
+    task.cancel()
+    await asyncio.wait([task])
+    if not task.cancelled():
+        task.exception()  # 取出例外，避免 "exception was never retrieved"
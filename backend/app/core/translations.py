@@ -0,0 +1,158 @@
+"""
+Lookup table translations
+查找表英文名稱 -> 中文顯示名稱，由匯入腳本 (display_name) 與規則式 NLU 共用
+"""
+
+# 性別
+GENDER_TRANSLATIONS = {
+    "Men": "男性",
+    "Women": "女性",
+    "Boys": "男童",
+    "Girls": "女童",
+    "Unisex": "中性",
+}
+
+# 主分類
+MASTER_CATEGORY_TRANSLATIONS = {
+    "Apparel": "服飾",
+    "Accessories": "配件",
+    "Footwear": "鞋類",
+    "Personal Care": "個人護理",
+    "Free Items": "免費商品",
+    "Sporting Goods": "運動用品",
+    "Home": "居家用品",
+}
+
+# 子分類
+SUB_CATEGORY_TRANSLATIONS = {
+    "Topwear": "上衣",
+    "Bottomwear": "下著",
+    "Shoes": "鞋子",
+    "Watches": "手錶",
+    "Socks": "襪子",
+    "Bags": "包包",
+    "Belts": "皮帶",
+    "Flip Flops": "拖鞋",
+    "Innerwear": "內衣",
+    "Sandal": "涼鞋",
+    "Shoe Accessories": "鞋類配件",
+    "Fragrance": "香水",
+    "Jewellery": "珠寶",
+    "Eyewear": "眼鏡",
+    "Dress": "洋裝",
+    "Loungewear and Nightwear": "居家睡衣",
+    "Wallets": "錢包",
+    "Apparel Set": "套裝",
+    "Headwear": "帽子",
+    "Mufflers": "圍巾",
+    "Skin Care": "護膚品",
+    "Makeup": "化妝品",
+    "Free Gifts": "贈品",
+    "Ties": "領帶",
+    "Skin": "皮膚保養",
+    "Beauty Accessories": "美妝配件",
+    "Water Bottle": "水壺",
+    "Sports Accessories": "運動配件",
+    "Stoles": "披肩",
+    "Scarves": "圍巾",
+    "Sports Equipment": "運動器材",
+    "Cufflinks": "袖扣",
+    "Hair Accessory": "髮飾",
+    "Gloves": "手套",
+    "Umbrellas": "雨傘",
+    "Vouchers": "禮券",
+    "Lips": "唇部保養",
+    "Saree": "紗麗",
+    "Perfumes": "香水",
+}
+
+# 顏色
+COLOUR_TRANSLATIONS = {
+    "Black": "黑色",
+    "White": "白色",
+    "Blue": "藍色",
+    "Red": "紅色",
+    "Grey": "灰色",
+    "Navy Blue": "海軍藍",
+    "Green": "綠色",
+    "Purple": "紫色",
+    "Pink": "粉紅色",
+    "Yellow": "黃色",
+    "Orange": "橙色",
+    "Brown": "棕色",
+    "Beige": "米色",
+    "Olive": "橄欖綠",
+    "Maroon": "栗色",
+    "Silver": "銀色",
+    "Gold": "金色",
+    "Cream": "奶油色",
+    "Tan": "褐色",
+    "Khaki": "卡其色",
+    "Turquoise Blue": "土耳其藍",
+    "Charcoal": "炭灰色",
+    "Coffee Brown": "咖啡棕",
+    "Mushroom Brown": "蘑菇棕",
+    "Burgundy": "勃根地紅",
+    "Lavender": "薰衣草紫",
+    "Mint": "薄荷綠",
+    "Peach": "桃色",
+    "Coral": "珊瑚色",
+    "Rust": "鐵鏽色",
+    "Teal": "水鴨色",
+    "Multi": "多色",
+    "Metallic": "金屬色",
+    "Fluorescent Green": "螢光綠",
+}
+
+# 季節
+SEASON_TRANSLATIONS = {
+    "Summer": "夏季",
+    "Winter": "冬季",
+    "Spring": "春季",
+    "Fall": "秋季",
+}
+
+# 使用場合
+USAGE_TRANSLATIONS = {
+    "Casual": "休閒",
+    "Formal": "正式",
+    "Sports": "運動",
+    "Ethnic": "民族風",
+    "Party": "派對",
+    "Smart Casual": "智能休閒",
+    "Travel": "旅行",
+    "Home": "居家",
+}
+
+# 顏色 HEX 代碼
+COLOUR_HEX = {
+    "Black": "#000000",
+    "White": "#FFFFFF",
+    "Blue": "#0000FF",
+    "Red": "#FF0000",
+    "Grey": "#808080",
+    "Navy Blue": "#000080",
+    "Green": "#008000",
+    "Purple": "#800080",
+    "Pink": "#FFC0CB",
+    "Yellow": "#FFFF00",
+    "Orange": "#FFA500",
+    "Brown": "#A52A2A",
+    "Beige": "#F5F5DC",
+    "Olive": "#808000",
+    "Maroon": "#800000",
+    "Silver": "#C0C0C0",
+    "Gold": "#FFD700",
+    "Cream": "#FFFDD0",
+    "Tan": "#D2B48C",
+    "Khaki": "#F0E68C",
+    "Turquoise Blue": "#40E0D0",
+    "Charcoal": "#36454F",
+    "Coffee Brown": "#6F4E37",
+    "Burgundy": "#800020",
+    "Lavender": "#E6E6FA",
+    "Mint": "#98FF98",
+    "Peach": "#FFE5B4",
+    "Coral": "#FF7F50",
+    "Teal": "#008080",
+}
@@ -0,0 +1,224 @@
+"""
+In-memory vector index for semantic search
+常駐記憶體的商品向量索引：啟動時建立一次，整個 process 共用
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.ann_index import load_ann_index, top_k_rows
+from app.core.attribute_filter import AttributePostings
+from app.core.config import settings
+from app.core.embedding_codec import decode_vector
+from app.core.embedding_snapshot import embedding_model_id, load_snapshot, read_manifest
+
+
+class VectorIndex:
+    """
+    已正規化的 float32 向量矩陣 + 對應的商品 id 陣列。
+    查詢只需一次矩陣乘法 + argpartition 取 top-k；
+    若設定了 ANN backend 且快照有對應的索引檔，則改用近似搜尋。
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        refresh_interval: float = settings.VECTOR_INDEX_REFRESH_SECONDS,
+        snapshot_dir: Optional[str] = settings.EMBEDDING_SNAPSHOT_DIR,
+        backend: str = settings.VECTOR_INDEX_BACKEND,
+    ):
+        self.db_path = db_path
+        self.snapshot_dir = snapshot_dir
+        self.backend = backend
+        self.refresh_interval = refresh_interval
+        # (ids, matrix, ann, attributes) 以單一 tuple 保存，重新載入時一次替換
+        self._state = (
+            np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32), None, AttributePostings.empty()
+        )
+        self.loaded = False
+        self._signature: Optional[tuple] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._state[0]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._state[1]
+
+    @property
+    def ann(self):
+        return self._state[2]
+
+    @property
+    def attributes(self) -> AttributePostings:
+        return self._state[3]
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def _read_signature(self, conn: sqlite3.Connection) -> tuple:
+        """以筆數、最大 id 與最後更新時間判斷 product_embeddings 是否變動"""
+        return tuple(conn.execute(
+            "SELECT COUNT(*), MAX(id), MAX(updated_at) FROM product_embeddings"
+        ).fetchone())
+
+    def _read_products_signature(self, conn: sqlite3.Connection) -> Optional[tuple]:
+        """products 變動時需重建屬性倒排表"""
+        try:
+            return tuple(conn.execute("SELECT COUNT(*), MAX(updated_at) FROM products").fetchone())
+        except sqlite3.OperationalError:
+            return None
+
+    def _usable_manifest(self) -> Optional[dict]:
+        """回傳可用的快照 manifest；未設定、不存在或模型不符時回傳 None"""
+        if not self.snapshot_dir:
+            return None
+        manifest = read_manifest(self.snapshot_dir)
+        model_id = embedding_model_id()
+        if manifest and manifest.get("model") != model_id:
+            logging.warning(
+                f"Ignoring embedding snapshot {manifest.get('version')}: "
+                f"model {manifest.get('model')} != {model_id}"
+            )
+            return None
+        return manifest
+
+    def load(self) -> None:
+        """
+        重新建立索引。優先使用 mmap 快照 (多個 worker 共用 page cache)，
+        否則從資料庫讀取、解析並正規化 (皆只做一次)。
+        同時從 products 建立 hybrid search 用的屬性倒排表。
+        """
+        with self._lock:
+            manifest = self._usable_manifest()
+            ann = None
+            conn = sqlite3.connect(self.db_path)
+            try:
+                # 同一個 transaction 內讀取，確保 signature 與資料一致
+                conn.execute("BEGIN")
+                if manifest:
+                    ids, matrix = load_snapshot(self.snapshot_dir, manifest)
+                    signature = ("snapshot", manifest["version"])
+                    source = f"snapshot {manifest['version']}"
+                else:
+                    ids, matrix = self._load_from_db(conn)
+                    signature = ("db",) + self._read_signature(conn)
+                    source = self.db_path
+                signature += (self._read_products_signature(conn),)
+                attributes = AttributePostings.load(conn, ids)
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+
+            if self.backend != "exact":
+                if manifest:
+                    ann = load_ann_index(self.snapshot_dir, manifest, self.backend)
+                    if ann is None:
+                        logging.warning(f"No {self.backend} index for snapshot {manifest['version']}, using exact search")
+                else:
+                    logging.warning(f"{self.backend} index requires an embedding snapshot, using exact search")
+
+            # 以單一指派替換，查詢中的執行緒仍可使用舊的陣列
+            self._state = (ids, matrix, ann, attributes)
+            self._signature = signature
+            self._last_check = time.monotonic()
+            self.loaded = True
+            logging.info(f"Vector index loaded: {len(ids)} vectors from {source}")
+
+    def _load_from_db(self, conn: sqlite3.Connection) -> Tuple[np.ndarray, np.ndarray]:
+        rows = conn.execute(
+            "SELECT product_id, embedding_vector FROM product_embeddings ORDER BY product_id"
+        ).fetchall()
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        if rows:
+            # decode_vector 同時支援二進位 float32 與舊的 JSON 格式
+            matrix = np.stack([decode_vector(row[1]) for row in rows]).astype(np.float32, copy=False)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= norms + 1e-8
+            matrix = np.ascontiguousarray(matrix)
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        return ids, matrix
+
+    def _current_signature(self) -> tuple:
+        manifest = self._usable_manifest()
+        conn = sqlite3.connect(self.db_path)
+        try:
+            if manifest:
+                signature = ("snapshot", manifest["version"])
+            else:
+                signature = ("db",) + self._read_signature(conn)
+            return signature + (self._read_products_signature(conn),)
+        finally:
+            conn.close()
+
+    def refresh_if_stale(self) -> None:
+        """
+        每隔 refresh_interval 秒檢查一次快照 manifest 或資料表是否變動，若有則重新載入。
+        新快照以原子 rename 切換，worker 不需重啟即可讀到新版本。
+        """
+        if not self.loaded:
+            self.load()
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.refresh_interval:
+            return
+        self._last_check = now
+        if self._current_signature() != self._signature:
+            self.load()
+
+    def search(
+        self, query_vector, top_k: int = 10, filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[int], List[float]]:
+        """
+        回傳餘弦相似度最高的 top_k 個商品 id 與分數 (由高至低)。
+        filters (如 {"gender": "Men", "usage_id": 3}) 會先以屬性倒排表取得候選 row，
+        只對候選計分，因此條件越嚴格越快，也不會因事後過濾而少於 top_k 筆。
+        """
+        self.refresh_if_stale()
+        ids, matrix, ann, attributes = self._state
+        if len(ids) == 0 or top_k <= 0:
+            return [], []
+
+        query = np.asarray(query_vector, dtype=np.float32).ravel()
+        query = query / (np.linalg.norm(query) + 1e-8)
+
+        candidates = None
+        if filters and attributes.available:
+            candidates = attributes.candidates(attributes.resolve(filters))
+        if candidates is not None:
+            if len(candidates) == 0:
+                return [], []
+            candidate_scores = np.asarray(matrix[candidates]) @ query
+            top = top_k_rows(candidate_scores, top_k)
+            rows, scores = candidates[top], candidate_scores[top]
+        elif ann is not None:
+            rows, scores = ann.search(matrix, query, top_k)
+        else:
+            all_scores = matrix @ query
+            rows = top_k_rows(all_scores, top_k)
+            scores = all_scores[rows]
+        return ids[rows].tolist(), scores.tolist()
+
+
+_indexes: Dict[str, VectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_vector_index(db_path: str = settings.DB_PATH) -> VectorIndex:
+    """取得 (必要時建立) 該資料庫共用的 VectorIndex"""
+    with _indexes_lock:
+        index = _indexes.get(db_path)
+        if index is None:
+            index = VectorIndex(db_path)
+            _indexes[db_path] = index
+        return index
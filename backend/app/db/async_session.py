@@ -0,0 +1,91 @@
+"""
+Async database session (SQLAlchemy AsyncEngine / AsyncSession)
+
+高並行的 endpoint 以 async def 直接在 event loop 上等待資料庫，不佔用 Starlette 的 thread pool。
+- SQLite 使用 aiosqlite driver (sqlite:// 自動轉為 sqlite+aiosqlite://，或以 ASYNC_DATABASE_URL 指定)
+- pragma、連線池與快取設定與同步 engine 相同 (見 app/db/session.py)
+- engine 於第一次使用時才建立：未安裝 aiosqlite 時不影響同步路徑與 app 啟動
+"""
+
+from functools import partial
+from typing import AsyncIterator, Dict, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+from app.db.session import apply_sqlite_pragmas, engine_options, is_sqlite
+
+
+def async_database_url(url: str = settings.DATABASE_URL) -> str:
+    """預設資料庫以 ASYNC_DATABASE_URL 優先；否則把同步的 SQLite URL 換成 aiosqlite driver"""
+    if settings.ASYNC_DATABASE_URL and url == settings.DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.get_driver_name() in ("pysqlite", ""):
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url
+
+
+def create_async_db_engine(url: str = settings.DATABASE_URL, read_only: bool = False,
+                           pool_size: int = settings.DB_POOL_SIZE) -> AsyncEngine:
+    options = engine_options(url, pool_size)
+    if "pool_size" in options:
+        options["poolclass"] = AsyncAdaptedQueuePool
+    async_engine = create_async_engine(async_database_url(url), **options)
+    if is_sqlite(url):
+        # connect 事件掛在底層的同步 engine 上 (aiosqlite 連線提供同步介面的 adapter)
+        event.listen(async_engine.sync_engine, "connect", partial(apply_sqlite_pragmas, read_only=read_only))
+    return async_engine
+
+
+_engines: Dict[Tuple[str, bool], AsyncEngine] = {}
+
+
+def get_async_engine(read_only: bool = False, url: str = settings.DATABASE_URL) -> AsyncEngine:
+    """讀寫 / 唯讀 AsyncEngine (每個資料庫 URL 第一次使用時建立)"""
+    key = (url, read_only)
+    if key not in _engines:
+        _engines[key] = create_async_db_engine(
+            url,
+            read_only=read_only,
+            pool_size=settings.DB_READ_POOL_SIZE if read_only else settings.DB_POOL_SIZE,
+        )
+    return _engines[key]
+
+
+async def dispose_async_engines() -> None:
+    """關閉所有 AsyncEngine 的連線 (shutdown 用)"""
+    while _engines:
+        _, async_engine = _engines.popitem()
+        await async_engine.dispose()
+
+
+# expire_on_commit=False：commit 後仍可讀取屬性，不會觸發 async 下不允許的隱式載入
+# bind 在建立 session 時才指定 (engine 為延遲建立)
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, class_=AsyncSession)
+
+
+def new_async_session(read_only: bool = False, url: str = settings.DATABASE_URL) -> AsyncSession:
+    return AsyncSessionLocal(bind=get_async_engine(read_only, url))
+
+
+# Dependency for FastAPI
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Async dependency (讀寫)
+    Usage in FastAPI: db: AsyncSession = Depends(get_async_db)
+    """
+    async with new_async_session() as db:
+        yield db
+
+
+async def get_async_read_db() -> AsyncIterator[AsyncSession]:
+    """
+    Async dependency (唯讀 query_only 連線)
+    Usage in FastAPI: db: AsyncSession = Depends(get_async_read_db)
+    """
+    async with new_async_session(read_only=True) as db:
+        yield db
@@ -0,0 +1,77 @@
+"""
+SQLite bulk-load mode
+大量匯入時暫時改用較快 (較不安全) 的 pragma，並移除次要索引，載入完成後重建索引並執行 ANALYZE。
+
+    with bulk_load(conn, [Product.__table__]):
+        ...  # executemany 寫入
+
+- conn 為 sqlite3 的 DBAPI 連線 (SQLAlchemy 連線可用 connection.driver_connection 取得)
+- 不論成功或失敗，離開時都會重建索引並還原原本的 pragma
+- 預設 journal_mode=WAL：journal_mode=OFF 雖然更快，但 ROLLBACK 的行為未定義，
+  而匯入 / embedding 腳本都依賴失敗時回滾整批 (與檢查點一致)
+"""
+
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+
+from sqlalchemy import Index, Table
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateIndex
+
+BULK_LOAD_CACHE_KIB = 512 * 1024  # cache_size (KiB)，索引重建時的排序也會用到
+
+# 匯入期間使用的 pragma；離開時還原為進入前的值
+BULK_LOAD_PRAGMAS = ("journal_mode", "synchronous", "cache_size", "temp_store")
+
+
+def secondary_indexes(tables: Iterable[Table]) -> List[Index]:
+    """可以暫時移除的索引 (非 UNIQUE；UNIQUE 索引涉及 ON CONFLICT / REPLACE 的語意，保留)"""
+    return [index for table in tables for index in sorted(table.indexes, key=lambda i: i.name) if not index.unique]
+
+
+def _read_pragmas(conn: sqlite3.Connection) -> Dict[str, object]:
+    return {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in BULK_LOAD_PRAGMAS}
+
+
+def _set_pragmas(conn: sqlite3.Connection, values: Dict[str, object]) -> None:
+    for name, value in values.items():
+        conn.execute(f"PRAGMA {name}={value}")
+
+
+@contextmanager
+def bulk_load(conn: sqlite3.Connection, tables: Iterable[Table] = (), journal_mode: str = "WAL",
+              cache_kib: int = BULK_LOAD_CACHE_KIB):
+    """進入 bulk-load 模式；tables 的次要索引會在區塊結束後重建"""
+    conn.commit()  # journal_mode 無法在 transaction 中切換
+    saved = _read_pragmas(conn)
+    indexes = secondary_indexes(tables)
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    dropped = [index for index in indexes if index.name in existing]
+
+    _set_pragmas(conn, {
+        "journal_mode": journal_mode,
+        "synchronous": "OFF",
+        "cache_size": -cache_kib,  # 負值單位為 KiB
+        "temp_store": "MEMORY",
+    })
+    try:
+        for index in dropped:
+            conn.execute(f'DROP INDEX IF EXISTS "{index.name}"')
+        conn.commit()
+        logging.info(f"Bulk-load mode: dropped {len(dropped)} indexes, journal_mode={journal_mode}, synchronous=OFF")
+        yield conn
+    finally:
+        try:
+            conn.rollback()  # 放棄失敗時未提交的部分，之後的 DDL 才不會混入
+            start = time.perf_counter()
+            for index in dropped:
+                ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=sqlite.dialect()))
+                conn.execute(ddl)
+            conn.execute("ANALYZE")
+            conn.commit()
+            logging.info(f"Bulk-load mode: rebuilt {len(dropped)} indexes + ANALYZE in {time.perf_counter() - start:.1f}s")
+        finally:
+            _set_pragmas(conn, saved)
@@ -1,23 +1,93 @@
 """
 Database session configuration and base class
+
+SQLite 連線設定 (每個新連線建立時套用，見 apply_sqlite_pragmas)：
+- WAL + synchronous=NORMAL：讀取與寫入互不阻塞，commit 不必每次 fsync
+- mmap_size / cache_size / temp_store=MEMORY：減少讀取時的系統呼叫與暫存檔
+- busy_timeout：遇到寫入鎖時等待而不是立即回傳 "database is locked"
+- foreign_keys：啟用外鍵檢查 (SQLite 預設關閉)
+
+engine 分為讀寫 (engine / SessionLocal / get_db) 與唯讀 (read_engine / ReadSessionLocal / get_read_db)：
+唯讀連線設定 query_only，連線池較大，讀取流量不會佔用寫入用的連線。
+非同步版本 (aiosqlite) 見 app/db/async_session.py，共用相同的 pragma 與連線池設定。
 """
 
-from sqlalchemy import create_engine
+from functools import partial
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args=(
-        {"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-    ),
-    echo=settings.DEBUG,  # Log SQL queries in debug mode
-)
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:" or "mode=memory" in url
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record, read_only: bool = False):
+    """connect 事件：每個新的 DBAPI 連線只執行一次"""
+    cursor = dbapi_connection.cursor()
+    try:
+        # journal_mode 會寫入資料庫檔頭 (持久設定)，由讀寫連線負責
+        if not read_only:
+            cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA cache_size={-int(settings.SQLITE_CACHE_SIZE_KIB)}")  # 負值單位為 KiB
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA foreign_keys={'ON' if settings.SQLITE_FOREIGN_KEYS else 'OFF'}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+
+def engine_options(url: str, pool_size: int = settings.DB_POOL_SIZE) -> dict:
+    """create_engine / create_async_engine 共用的參數 (echo、快取、連線池、SQLite 連線參數)"""
+    kwargs = {
+        "echo": settings.SQL_ECHO,
+        "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+    }
+    if not (is_sqlite(url) and _is_memory_sqlite(url)):
+        # 記憶體資料庫使用 SingletonThreadPool，不支援這些參數
+        kwargs.update(
+            pool_size=pool_size,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    if is_sqlite(url):
+        kwargs["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+            "cached_statements": settings.SQLITE_CACHED_STATEMENTS,
+        }
+    return kwargs
+
+
+def create_db_engine(url: str = settings.DATABASE_URL, read_only: bool = False,
+                     pool_size: int = settings.DB_POOL_SIZE):
+    """依設定建立 engine；SQLite 會掛上 connect 事件套用 pragma"""
+    db_engine = create_engine(url, **engine_options(url, pool_size))
+    if is_sqlite(url):
+        event.listen(db_engine, "connect", partial(apply_sqlite_pragmas, read_only=read_only))
+    return db_engine
+
+
+# Create SQLAlchemy engines (讀寫 / 唯讀)
+engine = create_db_engine()
+read_engine = create_db_engine(read_only=True, pool_size=settings.DB_READ_POOL_SIZE)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # Create Base class for models
 Base = declarative_base()
@@ -34,3 +104,15 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """
+    唯讀 session (query_only 連線)，供只讀取資料的 endpoint 使用
+    Usage in FastAPI: db: Session = Depends(get_read_db)
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
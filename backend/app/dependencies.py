@@ -1,8 +1,10 @@
 from fastapi import Depends
 from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.repositories.product_repository import ProductRepository
-from app.services.product_service import ProductService
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.async_session import get_async_read_db
+from app.db.session import get_db, get_read_db
+from app.repositories.product_repository import AsyncProductRepository, ProductRepository
+from app.services.product_service import AsyncProductService, ProductService
 from app.repositories.master_category_repository import MasterCategoryRepository
 from app.services.master_category_service import MasterCategoryService
 
@@ -10,6 +12,16 @@ def get_product_service(db: Session = Depends(get_db)) -> ProductService:
     repo = ProductRepository(db)
     return ProductService(repo)
 
+def get_async_product_service(db: AsyncSession = Depends(get_async_read_db)) -> AsyncProductService:
+    """async endpoint 使用 (唯讀 AsyncEngine，不佔用 thread pool)"""
+    repo = AsyncProductRepository(db)
+    return AsyncProductService(repo)
+
 def get_master_category_service(db: Session = Depends(get_db)) -> MasterCategoryService:
     repo = MasterCategoryRepository(db)
     return MasterCategoryService(repo)
+
+def get_read_master_category_service(db: Session = Depends(get_read_db)) -> MasterCategoryService:
+    """只讀取分類的 endpoint 使用唯讀 engine"""
+    repo = MasterCategoryRepository(db)
+    return MasterCategoryService(repo)
@@ -1,13 +1,78 @@
 
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.api.product_api import router as product_router
 from app.api.category_api import router as category_router
-from app.api.recommendation_api import router as recommendation_router
+from app.api.recommendation_api import (
+    router as recommendation_router, get_recommendation_service, peek_recommendation_service
+)
 from fastapi.staticfiles import StaticFiles
+from app.core.metrics import metrics
+from app.core.readiness import FAILED, READY, WARMING, readiness
+from app.db.async_session import dispose_async_engines
+from app.services.ollama_service import close_ollama_client, get_ollama_client
+
+WARM_UP_SUBSYSTEMS = ("recommendation_service", "vector_index", "embedding_model", "embedding_cache", "nlu_rules")
+
+
+async def _warm_step(name: str, fn) -> None:
+    """在 thread pool 執行一個 warm-up 步驟並記錄狀態，失敗不影響其他步驟"""
+    readiness.mark(name, WARMING)
+    try:
+        await asyncio.to_thread(fn)
+    except Exception as e:
+        logging.warning(f"Warm-up of {name} failed: {e}")
+        readiness.mark(name, FAILED, error=str(e))
+    else:
+        readiness.mark(name, READY)
+
+
+def _load_vector_index() -> None:
+    from app.core.vector_index import get_vector_index
+    get_vector_index().load()
+
 
+async def _warm_up() -> None:
+    """
+    背景載入重量級子系統 (numpy / torch / 模型 / 向量索引)，
+    API 啟動後立即可服務商品與分類查詢，推薦相關元件就緒後由 /api/v1/ready 回報
+    """
+    await _warm_step("recommendation_service", get_recommendation_service)
+    service = peek_recommendation_service()
+    steps = [_warm_step("vector_index", _load_vector_index)]
+    if service is not None:
+        steps.append(_warm_step("embedding_model", service.embedder.load))
+        if service.batcher.cache is not None:
+            steps.append(_warm_step("embedding_cache", service.batcher.cache.preload))
+        else:
+            readiness.mark("embedding_cache", READY)
+        if service.nlu.rules is not None:
+            steps.append(_warm_step("nlu_rules", lambda: service.nlu.rules.matcher))
+        else:
+            readiness.mark("nlu_rules", READY)
+    await asyncio.gather(*steps)
 
-app = FastAPI(title="Fashion Store API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    readiness.register(WARM_UP_SUBSYSTEMS)
+    warm_up_task = asyncio.create_task(_warm_up())
+    # 整個 app 共用一個 Ollama 連線池
+    get_ollama_client()
+    yield
+    warm_up_task.cancel()
+    service = peek_recommendation_service()
+    if service is not None:
+        await service.batcher.close()
+    await close_ollama_client()
+    await dispose_async_engines()
+
+
+app = FastAPI(title="Fashion Store API", lifespan=lifespan)
 
 # 加入 CORS 設定，允許所有來源跨域
 app.add_middleware(
@@ -26,4 +91,16 @@ app.include_router(recommendation_router, prefix="/api/v1")
 def health():
     return {"status": "ok"}
 
+
+@app.get("/api/v1/ready")
+def ready():
+    """各子系統是否已完成 warm-up；尚未全部就緒時回傳 503"""
+    snapshot = readiness.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+
+@app.get("/api/v1/metrics")
+def get_metrics():
+    return metrics.snapshot()
+
 app.mount("/api/v1/images", StaticFiles(directory="../fashion-dataset/images"), name="images")
@@ -14,7 +14,7 @@ from sqlalchemy import (
     LargeBinary,
 )
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from app.db.session import Base
 
 
@@ -33,9 +33,13 @@ class ProductEmbedding(Base):
         String(100), nullable=False, comment="使用的 embedding 模型"
     )
     embedding_vector = Column(
-        LargeBinary, nullable=False, comment="向量資料（序列化存儲）"
+        LargeBinary, nullable=False, comment="向量資料（float32 二進位格式，見 app/core/embedding_codec.py）"
     )
     embedding_text = Column(Text, comment="用於生成向量的文本")
+    # deferred：一般查詢不載入 (舊資料庫在 generate_embeddings 補上欄位前仍可正常讀取)
+    embedding_text_hash = deferred(Column(
+        String(64), comment="embedding_text 的 SHA-256，增量更新時判斷是否需要重新計算"
+    ))
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
 
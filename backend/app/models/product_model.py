@@ -15,7 +15,7 @@ from sqlalchemy import (
     DECIMAL,
 )
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from app.db.session import Base
 
 
@@ -66,6 +66,12 @@ class Product(Base):
     review_count = Column(Integer, default=0, comment="評論數量")
     view_count = Column(Integer, default=0, comment="瀏覽次數")
 
+    # 差異同步
+    # deferred：一般查詢不載入 (舊資料庫在匯入腳本補上欄位前仍可正常讀取)
+    content_fingerprint = deferred(Column(
+        String(64), comment="CSV 列 + JSON 內容的 SHA-256，差異同步時判斷商品是否變動"
+    ))
+
     # 時間戳記
     created_at = Column(TIMESTAMP, server_default=func.now(), comment="建立時間")
     updated_at = Column(
@@ -1,7 +1,8 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.product_model import Product
 from typing import List, Optional
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 
 class ProductRepository:
@@ -63,3 +64,73 @@ class ProductRepository:
         if price_max is not None:
             q = q.filter(Product.price <= price_max)
         return q.offset(skip).limit(limit).all()
+
+
+class AsyncProductRepository:
+    """ProductRepository 的 async 版本 (AsyncSession)；關聯資料需以 selectinload 預先載入"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_product_by_id(self, product_id: int) -> Optional[Product]:
+        result = await self.db.execute(
+            select(Product)
+            .options(selectinload(Product.images), selectinload(Product.attributes))
+            .where(Product.id == product_id)
+        )
+        return result.scalars().first()
+
+    async def create_product(self, data) -> Product:
+        obj = Product(**data.model_dump())
+        self.db.add(obj)
+        await self.db.commit()
+        await self.db.refresh(obj)
+        return obj
+
+    async def update_product(self, product_id: int, data) -> Product:
+        obj = await self.db.get(Product, product_id)
+        for key, value in data.model_dump(exclude_unset=True).items():
+            setattr(obj, key, value)
+        await self.db.commit()
+        await self.db.refresh(obj)
+        return obj
+
+    async def delete_product(self, product_id: int) -> None:
+        obj = await self.db.get(Product, product_id)
+        if obj:
+            await self.db.delete(obj)
+            await self.db.commit()
+
+    async def get_products(self, skip: int = 0, limit: int = 20) -> List[Product]:
+        result = await self.db.execute(select(Product).offset(skip).limit(limit))
+        return list(result.scalars())
+
+    async def search_products(self, query: str, skip: int = 0, limit: int = 20) -> List[Product]:
+        result = await self.db.execute(
+            select(Product)
+            .where(func.lower(Product.product_display_name).like(f"%{query.lower()}%"))
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(result.scalars())
+
+    async def filter_products(
+        self,
+        gender: Optional[str] = None,
+        category: Optional[str] = None,
+        price_min: Optional[float] = None,
+        price_max: Optional[float] = None,
+        skip: int = 0,
+        limit: int = 20,
+    ) -> List[Product]:
+        q = select(Product)
+        if gender:
+            q = q.where(Product.gender.has(name=gender))
+        if category:
+            q = q.where(Product.master_category.has(name=category))
+        if price_min is not None:
+            q = q.where(Product.price >= price_min)
+        if price_max is not None:
+            q = q.where(Product.price <= price_max)
+        result = await self.db.execute(q.offset(skip).limit(limit))
+        return list(result.scalars())
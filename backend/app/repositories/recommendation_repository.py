@@ -1,15 +1,19 @@
+import asyncio
 import sqlite3
-import json
-import numpy as np
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import URL
 from app.core.config import settings
+from app.db.async_session import new_async_session
+from app.core.vector_index import VectorIndex, get_vector_index
 
 DB_PATH = settings.DB_PATH
 
 
 class RecommendationRepository:
-    def __init__(self, db_path: str = DB_PATH):
+    def __init__(self, db_path: str = DB_PATH, index: Optional[VectorIndex] = None):
         self.db_path = db_path
+        self.index = index or get_vector_index(db_path)
 
     def exact_search(self, entities: Dict[str, Any], limit: int = 10) -> List[int]:
         """
@@ -30,22 +34,19 @@ class RecommendationRepository:
 
     def semantic_search(self, query_vector: List[float], top_k: int = 10) -> List[int]:
         """
-        根據語義向量搜尋最相近商品 id (餘弦相似度)
+        根據語義向量搜尋最相近商品 id (餘弦相似度，使用常駐記憶體的 VectorIndex)
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.execute("SELECT product_id, embedding_vector FROM product_embeddings")
-        product_ids = []
-        embeddings = []
-        for row in cursor:
-            product_ids.append(row[0])
-            embeddings.append(json.loads(row[1]))
-        conn.close()
-        # 計算餘弦相似度
-        query_vec = np.array(query_vector)
-        emb_matrix = np.array(embeddings)
-        scores = emb_matrix @ query_vec / (np.linalg.norm(emb_matrix, axis=1) * np.linalg.norm(query_vec) + 1e-8)
-        top_indices = np.argsort(scores)[-top_k:][::-1]
-        return [product_ids[i] for i in top_indices]
+        ids, _ = self.index.search(query_vector, top_k)
+        return ids
+
+    def hybrid_search(
+        self, query_vector: List[float], filters: Dict[str, Any], top_k: int = 10
+    ) -> Tuple[List[int], List[float]]:
+        """
+        在符合屬性條件 (gender / base_colour / usage / season / article_type，
+        可用名稱、中文顯示名稱或 id) 的商品中做語義排序，回傳 (商品 id, 相似度)
+        """
+        return self.index.search(query_vector, top_k, filters=filters)
 
     def style_based_search(self, filters: Dict[str, Any], limit: int = 10) -> List[int]:
         """
@@ -63,3 +64,47 @@ class RecommendationRepository:
         results = [row[0] for row in cursor.fetchall()]
         conn.close()
         return results
+
+
+class AsyncRecommendationRepository:
+    """
+    RecommendationService 使用的 async 版本：
+    - exact / style 查詢透過唯讀 AsyncSession (aiosqlite) 在 event loop 上等待
+    - 向量搜尋為 CPU 計算 (numpy)，交給 worker thread 執行
+    SQL 查詢與向量索引皆來自同一個 db_path。
+    """
+
+    def __init__(self, db_path: str = DB_PATH, index: Optional[VectorIndex] = None):
+        self.db_path = db_path
+        self.database_url = URL.create("sqlite", database=db_path).render_as_string()
+        self.index = index or get_vector_index(db_path)
+
+    async def _select_ids(self, conditions: Dict[str, Any], limit: int) -> List[int]:
+        query = "SELECT id FROM products WHERE 1=1"
+        params: Dict[str, Any] = {"limit": limit}
+        for i, (key, value) in enumerate(conditions.items()):
+            query += f" AND {key}=:p{i}"
+            params[f"p{i}"] = value
+        query += " LIMIT :limit"
+        async with new_async_session(read_only=True, url=self.database_url) as db:
+            result = await db.execute(text(query), params)
+            return [row[0] for row in result.all()]
+
+    async def exact_search(self, entities: Dict[str, Any], limit: int = 10) -> List[int]:
+        """根據 entities (如顏色、類型等) 精確搜尋商品 id"""
+        return await self._select_ids(entities, limit)
+
+    async def semantic_search(self, query_vector: List[float], top_k: int = 10) -> List[int]:
+        """根據語義向量搜尋最相近商品 id"""
+        ids, _ = await asyncio.to_thread(self.index.search, query_vector, top_k)
+        return ids
+
+    async def hybrid_search(
+        self, query_vector: List[float], filters: Dict[str, Any], top_k: int = 10
+    ) -> Tuple[List[int], List[float]]:
+        """在符合屬性條件的商品中做語義排序，回傳 (商品 id, 相似度)"""
+        return await asyncio.to_thread(self.index.search, query_vector, top_k, filters=filters)
+
+    async def style_based_search(self, filters: Dict[str, Any], limit: int = 10) -> List[int]:
+        """根據風格/條件 (如季節、場合) 搜尋商品 id"""
+        return await self._select_ids(filters, limit)
@@ -10,6 +10,7 @@ class ProductEmbeddingBase(BaseModel):
     embedding_model: Optional[str] = None
     embedding_vector: Optional[bytes] = None
     embedding_text: Optional[str] = None
+    embedding_text_hash: Optional[str] = None
 
 class ProductEmbedding(ProductEmbeddingBase):
     id: int
@@ -25,6 +26,7 @@ class ProductEmbeddingUpdate(BaseModel):
     embedding_model: Optional[str] = None
     embedding_vector: Optional[bytes] = None
     embedding_text: Optional[str] = None
+    embedding_text_hash: Optional[str] = None
 
 class ProductEmbeddingOut(ProductEmbedding):
     model_config = {
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import metrics
+
+if TYPE_CHECKING:
+    from .embedding_cache import EmbeddingCache
+    from .embedding_service import EmbeddingService
+
+
+class EmbeddingBatcher:
+    """
+    EmbeddingService.encode 的非同步前端 (dynamic micro-batching)：
+    同時到達的 encode 請求會被收集成一批 (最多 max_batch_size 筆、最多等待 max_wait_ms)，
+    在專用的 worker thread 上以一次 model.encode(list) 計算，再分別完成各自的 future。
+    模型忙碌時新請求會自然累積，下一批一次處理，因此負載越高批次越大。
+    """
+
+    def __init__(
+        self,
+        embedder: "EmbeddingService",
+        max_batch_size: int = settings.EMBEDDING_BATCH_MAX_SIZE,
+        max_wait_ms: float = settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+        cache: Optional["EmbeddingCache"] = None,
+    ):
+        self.embedder = embedder
+        # 命中快取的查詢不進入批次
+        self.cache = cache
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        # 單一 worker：模型推論本身已使用多執行緒，同時跑多批只會互相搶 CPU (於第一次請求時建立，close 時關閉)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        metrics.gauge(
+            "embed.dedupe_ratio",
+            lambda: 1 - metrics.counter("embed.dedupe.unique") / max(metrics.counter("embed.dedupe.requests"), 1),
+        )
+        metrics.gauge(
+            "embed.avg_batch_size",
+            lambda: metrics.counter("embed.batched_texts") / max(metrics.counter("embed.batches"), 1),
+        )
+
+    async def encode(self, text: str) -> List[float]:
+        """與 EmbeddingService.encode 相同的結果，但可與其他並行請求合併計算"""
+        if self.cache is not None:
+            # event loop 上只查記憶體；磁碟 spill 的查詢在 worker thread 執行
+            vector = self.cache.get_memory(self.embedder.model_id, text)
+            if vector is None:
+                if self.cache.persistent:
+                    vector = await asyncio.to_thread(self.cache.get_disk, self.embedder.model_id, text)
+                else:
+                    vector = self.cache.get_disk(self.embedder.model_id, text)
+            if vector is not None:
+                return vector
+        future = asyncio.get_running_loop().create_future()
+        self._ensure_worker().put_nowait((text, future))
+        return await future
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-batcher")
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def _collect(self, queue: asyncio.Queue) -> List[Tuple[str, asyncio.Future]]:
+        batch = [await queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        # 已取消 (例如 NLU 判定不需要向量) 的請求不必計算
+        return [(text, future) for text, future in batch if not future.done()]
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect(queue)
+            if not batch:
+                continue
+            # 同一批中相同的查詢只計算一次
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            metrics.incr("embed.dedupe.requests", len(batch))
+            metrics.incr("embed.dedupe.unique", len(texts))
+            start = time.perf_counter()
+            try:
+                vectors = await loop.run_in_executor(self._executor, self.embedder.batch_encode, texts)
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                logging.warning(f"Embedding batch of {len(texts)} failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            metrics.observe("embed.batch", time.perf_counter() - start)
+            metrics.incr("embed.batches")
+            # batched_requests：此批服務的請求數；batched_texts：實際送入模型的筆數 (去重後)
+            metrics.incr("embed.batched_requests", len(batch))
+            metrics.incr("embed.batched_texts", len(texts))
+            by_text = dict(zip(texts, vectors))
+            if self.cache is not None:
+                for text, vector in by_text.items():
+                    self.cache.put(self.embedder.model_id, text, vector)
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(by_text[text])
+            if self.cache is not None and self.cache.spill_due:
+                # 淘汰項目的寫入在 thread pool 執行，不阻塞 event loop
+                await asyncio.to_thread(self.cache.write_spill)
+
+    async def close(self) -> None:
+        """停止 worker 與其執行緒，尚在排隊的請求以 CancelledError 結束，並把快取寫入磁碟"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.close)
@@ -0,0 +1,227 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.embedding_codec import decode_vector, encode_vector
+from app.core.metrics import metrics
+from .intent_cache import normalize_query
+
+SPILL_BATCH_SIZE = 64
+
+
+class EmbeddingCache:
+    """
+    查詢向量的 LRU 快取：(模型名稱, 正規化查詢) -> float32 向量。
+    可選的 SQLite spill 檔：被淘汰的項目與關閉時仍在記憶體中的項目寫入磁碟，
+    記憶體未命中時再查磁碟，重啟 / 部署後熱門查詢不必重新計算。
+    get_memory / put 只操作記憶體；get_disk / write_spill / flush 會做磁碟 I/O，async 呼叫端應在 thread 執行。
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.EMBEDDING_CACHE_SIZE,
+        persist_path: Optional[str] = settings.EMBEDDING_CACHE_PATH,
+        disk_max_entries: int = settings.EMBEDDING_CACHE_DISK_MAX_ENTRIES,
+    ):
+        self.max_size = max_size
+        self.persist_path = persist_path or None
+        self.disk_max_entries = disk_max_entries
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        # 已淘汰、等待寫入磁碟的項目 (累積成批再寫，避免每次淘汰都 commit)
+        self._spill: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        # _lock 保護記憶體中的 dict (持有時間極短)；_disk_lock 序列化 SQLite 連線的使用，查詢磁碟時不阻塞記憶體查詢
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_failed = False
+        metrics.gauge("embed.cache.size", lambda: len(self))
+        metrics.gauge("embed.cache.memory_bytes", lambda: self.memory_bytes)
+        metrics.gauge("embed.cache.hit_ratio", self.hit_ratio)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def memory_bytes(self) -> int:
+        """向量本身佔用的記憶體 (不含 dict / key 的額外開銷)"""
+        return self._memory_bytes
+
+    @staticmethod
+    def hit_ratio() -> float:
+        hits = metrics.counter("embed.cache.hit") + metrics.counter("embed.cache.disk_hit")
+        total = hits + metrics.counter("embed.cache.miss")
+        return hits / total if total else 0.0
+
+    @property
+    def persistent(self) -> bool:
+        """是否有可用的磁碟 spill 檔 (有的話未命中記憶體時需查磁碟)"""
+        return self.persist_path is not None and not self._disk_failed
+
+    @property
+    def spill_due(self) -> bool:
+        """淘汰的項目已累積一批，應呼叫 write_spill 寫入磁碟"""
+        return len(self._spill) >= SPILL_BATCH_SIZE
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """同步查詢 (記憶體 → 磁碟)；event loop 上請改用 get_memory + 在 thread 執行 get_disk"""
+        vector = self.get_memory(model, text)
+        return vector if vector is not None else self.get_disk(model, text)
+
+    def get_memory(self, model: str, text: str) -> Optional[List[float]]:
+        """只查記憶體中的 LRU (不做 I/O，可在 event loop 上呼叫)；未命中時不計入 miss"""
+        key = (model, normalize_query(text))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                return None
+            self._entries.move_to_end(key)
+        metrics.incr("embed.cache.hit")
+        return vector.tolist()
+
+    def get_disk(self, model: str, text: str) -> Optional[List[float]]:
+        """查詢等待寫入的 spill 與 SQLite 檔 (會做磁碟 I/O，應在 worker thread 執行)"""
+        key = (model, normalize_query(text))
+        with self._lock:
+            vector = self._spill.get(key)
+        if vector is None:
+            vector = self._disk_select(key)
+        if vector is None:
+            metrics.incr("embed.cache.miss")
+            return None
+        with self._lock:
+            self._spill.pop(key, None)
+            self._insert(key, vector)
+        metrics.incr("embed.cache.disk_hit")
+        return vector.tolist()
+
+    def put(self, model: str, text: str, vector) -> None:
+        """寫入記憶體 (不做 I/O)；淘汰的項目先放在 spill，spill_due 時由呼叫端以 write_spill 寫入磁碟"""
+        if self.max_size <= 0:
+            return
+        key = (model, normalize_query(text))
+        with self._lock:
+            self._insert(key, np.asarray(vector, dtype=np.float32))
+
+    def write_spill(self) -> None:
+        """把已淘汰的項目寫入磁碟 (應在 worker thread 執行)"""
+        with self._lock:
+            items = list(self._spill.items())
+        self._disk_put(items)
+        with self._lock:
+            # 寫入期間被取回 / 重新淘汰的項目保留原狀
+            for key, vector in items:
+                if self._spill.get(key) is vector:
+                    del self._spill[key]
+
+    def _insert(self, key: Tuple[str, str], vector: np.ndarray) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old.nbytes
+        self._entries[key] = vector
+        self._memory_bytes += vector.nbytes
+        while len(self._entries) > self.max_size:
+            evicted_key, evicted_vector = self._entries.popitem(last=False)
+            self._memory_bytes -= evicted_vector.nbytes
+            metrics.incr("embed.cache.eviction")
+            if self.persist_path is not None:
+                self._spill[evicted_key] = evicted_vector
+
+    # ===== SQLite spill =====
+
+    def _disk(self) -> Optional[sqlite3.Connection]:
+        if self.persist_path is None or self._disk_failed:
+            return None
+        if self._conn is None:
+            try:
+                self._conn = sqlite3.connect(self.persist_path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS query_embeddings (
+                        model TEXT NOT NULL,
+                        query TEXT NOT NULL,
+                        vector BLOB NOT NULL,
+                        used_at REAL NOT NULL,
+                        PRIMARY KEY (model, query)
+                    )
+                """)
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_query_embeddings_used_at ON query_embeddings (used_at)")
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logging.warning(f"Embedding cache persistence disabled: {e}")
+                self._disk_failed = True
+                self._conn = None
+        return self._conn
+
+    def _disk_select(self, key: Tuple[str, str]) -> Optional[np.ndarray]:
+        with self._disk_lock:
+            conn = self._disk()
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT vector FROM query_embeddings WHERE model = ? AND query = ?", key
+            ).fetchone()
+        return decode_vector(row[0]) if row else None
+
+    def _disk_put(self, items: List[Tuple[Tuple[str, str], np.ndarray]]) -> None:
+        if not items:
+            return
+        # items 由舊到新排列，used_at 依序遞增以保留 LRU 順序
+        now = time.time()
+        with self._disk_lock:
+            conn = self._disk()
+            if conn is None:
+                return
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO query_embeddings (model, query, vector, used_at) VALUES (?, ?, ?, ?)",
+                    [(model, query, encode_vector(vector), now + i * 1e-6) for i, ((model, query), vector) in enumerate(items)],
+                )
+
+    def preload(self, limit: Optional[int] = None) -> int:
+        """啟動時把磁碟上最近使用的項目載入記憶體，回傳載入筆數"""
+        limit = min(limit or self.max_size, self.max_size)
+        with self._disk_lock:
+            conn = self._disk()
+            if conn is None:
+                return 0
+            rows = conn.execute(
+                "SELECT model, query, vector FROM query_embeddings ORDER BY used_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        with self._lock:
+            # 由舊到新插入，最近使用的項目位於 LRU 尾端
+            for model, query, blob in reversed(rows):
+                self._insert((model, query), decode_vector(blob))
+        return len(rows)
+
+    def flush(self) -> None:
+        """把記憶體中的項目寫入磁碟，並只保留最近使用的 disk_max_entries 筆"""
+        if not self.persistent:
+            return
+        with self._lock:
+            items = list(self._spill.items()) + list(self._entries.items())
+            self._spill.clear()
+        self._disk_put(items)
+        with self._disk_lock:
+            conn = self._disk()
+            if conn is None:
+                return
+            with conn:
+                conn.execute(
+                    "DELETE FROM query_embeddings WHERE rowid NOT IN "
+                    "(SELECT rowid FROM query_embeddings ORDER BY used_at DESC LIMIT ?)",
+                    (self.disk_max_entries,),
+                )
+
+    def close(self) -> None:
+        self.flush()
+        with self._disk_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,9 +1,97 @@
+import logging
+import re
+import threading
+from pathlib import Path
 from typing import List
-from sentence_transformers import SentenceTransformer
+from app.core.config import settings
+from app.core.embedding_snapshot import embedding_model_id
+
+# 推論 backend：
+# - torch:     PyTorch fp32 (預設)
+# - onnx:      ONNX Runtime fp32，第一次使用時由本機快取的權重匯出
+# - onnx-int8: ONNX Runtime + dynamic int8 量化 (CPU 上延遲與記憶體最低)
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+QUANTIZED_FILE_SUFFIX = "qint8"
+
+
+def onnx_export_dir(model_name: str, onnx_dir: str = settings.EMBEDDING_ONNX_DIR) -> Path:
+    """匯出的 ONNX 模型存放目錄 (每個模型一個子目錄)"""
+    return Path(onnx_dir) / re.sub(r"[^A-Za-z0-9._-]+", "_", model_name)
+
+
+def _load_torch(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device="cpu")
+
+
+def _load_onnx(model_name: str):
+    """載入已匯出的 ONNX 模型；尚未匯出時由本機快取的權重匯出並存檔，之後啟動直接載入"""
+    from sentence_transformers import SentenceTransformer
+    export_dir = onnx_export_dir(model_name)
+    if (export_dir / "onnx" / "model.onnx").exists():
+        return SentenceTransformer(str(export_dir), backend="onnx", device="cpu")
+    logging.info(f"Exporting {model_name} to ONNX at {export_dir}")
+    model = SentenceTransformer(model_name, backend="onnx", device="cpu")
+    model.save_pretrained(str(export_dir))
+    return model
+
+
+def _load_onnx_int8(model_name: str):
+    """以 ONNX 模型為基礎做 dynamic int8 量化 (權重 int8、activation 於執行時量化)"""
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+    export_dir = onnx_export_dir(model_name)
+    file_name = f"onnx/model_{QUANTIZED_FILE_SUFFIX}.onnx"
+    if not (export_dir / file_name).exists():
+        logging.info(f"Quantizing {model_name} ({settings.EMBEDDING_QUANTIZATION}) at {export_dir}")
+        export_dynamic_quantized_onnx_model(
+            _load_onnx(model_name),
+            quantization_config=settings.EMBEDDING_QUANTIZATION,
+            model_name_or_path=str(export_dir),
+            push_to_hub=False,
+            file_suffix=QUANTIZED_FILE_SUFFIX,
+        )
+    return SentenceTransformer(
+        str(export_dir), backend="onnx", device="cpu", model_kwargs={"file_name": file_name}
+    )
+
+
+_LOADERS = {
+    "torch": _load_torch,
+    "onnx": _load_onnx,
+    "onnx-int8": _load_onnx_int8,
+}
+
 
 class EmbeddingService:
-    def __init__(self, model_name: str = "paraphrase-multilingual-MiniLM-L12-v2"):
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name: str = settings.EMBEDDING_MODEL, backend: str = settings.EMBEDDING_BACKEND):
+        if backend not in _LOADERS:
+            raise ValueError(f"Unknown embedding backend '{backend}', expected one of {EMBEDDING_BACKENDS}")
+        self.model_name = model_name
+        self.backend = backend
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_id(self) -> str:
+        """模型 + backend 的識別字串 (見 embedding_model_id)"""
+        return embedding_model_id(self.model_name, self.backend)
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def model(self):
+        """第一次使用時才載入 (import torch / sentence_transformers 需數秒，不應拖慢 API 啟動)"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = _LOADERS[self.backend](self.model_name)
+        return self._model
+
+    def load(self) -> None:
+        """預先載入模型並執行一次推論 (背景 warm-up 用)"""
+        self.model.encode(["warm-up"])
 
     def encode(self, text: str) -> List[float]:
         """
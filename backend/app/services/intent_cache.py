@@ -0,0 +1,113 @@
+import copy
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+def normalize_query(query: str) -> str:
+    """全形轉半形、轉小寫並合併空白，作為精確比對的 key"""
+    return " ".join(unicodedata.normalize("NFKC", query).lower().split())
+
+
+class IntentCache:
+    """
+    NLU 意圖的兩層快取：
+    1. 精確比對：正規化後的查詢字串 -> intent (LRU + TTL)
+    2. 語義比對：查詢向量與已快取查詢的餘弦相似度 >= threshold 時重用其 intent
+    兩層共用同一份 LRU 容量；向量存放於固定大小的矩陣，以 slot 對應。
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.INTENT_CACHE_SIZE,
+        ttl: float = settings.INTENT_CACHE_TTL_SECONDS,
+        similarity_threshold: float = settings.INTENT_CACHE_SIMILARITY,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        # key -> (expires_at, intent, slot)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any], Optional[int]]]" = OrderedDict()
+        self._vectors: Optional[np.ndarray] = None
+        self._slot_keys: List[Optional[str]] = []
+        self._free_slots: List[int] = []
+        self._lock = threading.Lock()
+        metrics.gauge("nlu.cache.size", lambda: len(self))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """精確比對 (第一層)"""
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            metrics.incr("nlu.cache.exact_hit")
+            return copy.deepcopy(entry[1])
+
+    def get_similar(self, query_vector) -> Optional[Dict[str, Any]]:
+        """語義比對 (第二層)：回傳最相近且超過門檻的已快取 intent"""
+        with self._lock:
+            if self._vectors is None or not self._entries:
+                return None
+            query = self._normalize_vector(query_vector)
+            scores = self._vectors @ query
+            slot = int(np.argmax(scores))
+            key = self._slot_keys[slot]
+            if key is None or scores[slot] < self.similarity_threshold:
+                return None
+            expires_at, intent, _ = self._entries[key]
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            metrics.incr("nlu.cache.semantic_hit")
+            return copy.deepcopy(intent)
+
+    def put(self, query: str, intent: Dict[str, Any], query_vector=None) -> None:
+        if self.max_size <= 0:
+            return
+        key = normalize_query(query)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while len(self._entries) >= self.max_size:
+                self._remove(next(iter(self._entries)))
+                metrics.incr("nlu.cache.eviction")
+
+            slot = None
+            if query_vector is not None:
+                vector = self._normalize_vector(query_vector)
+                if self._vectors is None:
+                    self._vectors = np.zeros((self.max_size, len(vector)), dtype=np.float32)
+                    self._slot_keys = [None] * self.max_size
+                    self._free_slots = list(range(self.max_size - 1, -1, -1))
+                slot = self._free_slots.pop()
+                self._vectors[slot] = vector
+                self._slot_keys[slot] = key
+            self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(intent), slot)
+
+    def _remove(self, key: str) -> None:
+        _, _, slot = self._entries.pop(key)
+        if slot is not None:
+            self._vectors[slot] = 0.0
+            self._slot_keys[slot] = None
+            self._free_slots.append(slot)
+
+    @staticmethod
+    def _normalize_vector(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        return vector / (np.linalg.norm(vector) + 1e-8)
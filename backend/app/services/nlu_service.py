@@ -1,15 +1,78 @@
+import asyncio
+import inspect
 from typing import Dict, Any, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.tasks import cancel_and_wait
+from .intent_cache import IntentCache
 from .ollama_service import OllamaService
+from .rule_nlu_service import RuleBasedNLUService
+
+# 由規則式 fast path 處理 (未呼叫 LLM、也未查快取) 的查詢比例
+metrics.gauge(
+    "nlu.fast_path_ratio",
+    lambda: metrics.counter("nlu.fast_path") / max(metrics.counter("nlu.requests"), 1),
+)
 
 class NLUService:
-    def __init__(self, ollama_service: Optional[OllamaService] = None):
+    def __init__(
+        self,
+        ollama_service: Optional[OllamaService] = None,
+        cache: Optional[IntentCache] = None,
+        rules: Optional[RuleBasedNLUService] = None,
+    ):
         self.ollama_service = ollama_service or OllamaService()
+        self.cache = cache or IntentCache()
+        self.rules = rules or (RuleBasedNLUService() if settings.RULE_NLU_ENABLED else None)
 
-    async def parse_intent(self, user_input: str) -> Dict[str, Any]:
+    async def parse_intent(self, user_input: str, query_vector: Any = None) -> Dict[str, Any]:
         """
         解析使用者自然語言查詢，返回 intentType, entities, filters。
-        會呼叫 Ollama LLM 進行語意解析。
+        1. 規則式 fast path (查找表關鍵字)，信心足夠時直接回傳
+        2. 快取 (精確比對，再以 query_vector 做語義比對)
+        3. 未命中才使用 Ollama LLM 的結果 (query_vector 尚未完成時，LLM 與語義比對同時開始)
+        query_vector 可為向量或尚未完成的 awaitable (例如預先計算中的 embedding task)。
         """
+        metrics.incr("nlu.requests")
+        if self.rules is not None:
+            intent = self.rules.parse(user_input)
+            if intent is not None:
+                metrics.incr("nlu.fast_path")
+                return intent
+
+        cached = self.cache.get(user_input)
+        if cached is not None:
+            return cached
+
+        llm_task = None
+        if inspect.isawaitable(query_vector):
+            # 向量尚未算好：LLM 與語義快取查詢同時進行，語義命中時再取消 LLM
+            llm_task = asyncio.create_task(self._llm_parse(user_input))
+            try:
+                query_vector = await query_vector
+                cached = self.cache.get_similar(query_vector) if query_vector is not None else None
+            except BaseException:
+                await cancel_and_wait(llm_task)
+                raise
+            if cached is not None:
+                await cancel_and_wait(llm_task)
+                metrics.incr("nlu.llm.cancelled")
+        elif query_vector is not None:
+            cached = self.cache.get_similar(query_vector)
+        if cached is not None:
+            self.cache.put(user_input, cached, query_vector)
+            return cached
+        metrics.incr("nlu.cache.miss")
+
+        result = await (llm_task or self._llm_parse(user_input))
+        # 若解析失敗，回傳預設格式 (不寫入快取，下次重新解析)
+        if result is None:
+            return {"intentType": "unknown", "entities": [], "filters": {}}
+        self.cache.put(user_input, result, query_vector)
+        return result
+
+    async def _llm_parse(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """呼叫 Ollama LLM 解析查詢；回應無法解析為非空 dict 時回傳 None"""
         prompt = (
             "請將以下使用者查詢解析為 JSON 格式，包含 intentType, entities, filters。"
             "\n查詢: '" + user_input + "'"
@@ -17,7 +80,6 @@ class NLUService:
         )
         response = await self.ollama_service.chat(prompt)
         result = self.ollama_service.parse_json_response(response)
-        # 若解析失敗，回傳預設格式
-        if not isinstance(result, dict):
-            result = {"intentType": "unknown", "entities": [], "filters": {}}
+        if not isinstance(result, dict) or not result:
+            return None
         return result
@@ -1,41 +1,102 @@
+import asyncio
+import json
+import logging
 import httpx
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Optional
+from app.core.config import settings
+
+# 由 FastAPI lifespan 建立 / 關閉的共用 client (連線池 + keep-alive)
+_client: Optional[httpx.AsyncClient] = None
+# 限制同時進行的生成數量，避免壓垮本機 Ollama
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def get_ollama_client() -> httpx.AsyncClient:
+    """取得共用的 AsyncClient，尚未建立 (例如在 script 中使用) 時自動建立"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                keepalive_expiry=settings.OLLAMA_KEEPALIVE_SECONDS,
+            ),
+            timeout=httpx.Timeout(settings.OLLAMA_TIMEOUT, connect=settings.OLLAMA_CONNECT_TIMEOUT),
+        )
+    return _client
+
+
+async def close_ollama_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.OLLAMA_MAX_CONCURRENCY)
+    return _semaphore
+
 
 class OllamaService:
-    def __init__(self, base_url: str = "http://localhost:11434/api/generate", model: str = "llama3.1:8b"):
+    def __init__(
+        self,
+        base_url: str = f"{settings.OLLAMA_BASE_URL}/api/generate",
+        model: str = settings.OLLAMA_MODEL,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
         self.base_url = base_url
         self.model = model
+        self._client = client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_ollama_client()
 
-    async def chat(self, prompt: str, system: Optional[str] = None, timeout: float = 60.0) -> str:
-        import logging
+    async def chat_stream(
+        self, prompt: str, system: Optional[str] = None, timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """
+        以串流方式逐一產生 LLM 回應的 token：
+        async for token in ollama.chat_stream(prompt): ...
+        """
         payload = {
             "model": self.model,
             "prompt": prompt,
+            "stream": True,
         }
         if system:
             payload["system"] = system
-        async with httpx.AsyncClient() as client:
-            response = await client.post(self.base_url, json=payload, timeout=timeout)
-            response.raise_for_status()
-            raw_content = response.text
-            logging.info(f"Ollama raw response: {raw_content}")
-            # Handle streaming/multi-line JSON
-            import json
-            last_response = ""
-            for line in raw_content.splitlines():
-                try:
-                    data = json.loads(line)
-                    if "response" in data:
-                        last_response = data["response"]
-                except Exception:
-                    continue
-            return last_response
+        request_timeout = httpx.Timeout(timeout or settings.OLLAMA_TIMEOUT, connect=settings.OLLAMA_CONNECT_TIMEOUT)
+        async with _get_semaphore():
+            async with self.client.stream("POST", self.base_url, json=payload, timeout=request_timeout) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except ValueError:
+                        continue
+                    token = data.get("response")
+                    if token:
+                        yield token
+                    if data.get("done"):
+                        break
+
+    async def chat(self, prompt: str, system: Optional[str] = None, timeout: Optional[float] = None) -> str:
+        """收集完整的串流回應"""
+        tokens = [token async for token in self.chat_stream(prompt, system=system, timeout=timeout)]
+        response = "".join(tokens)
+        logging.debug(f"Ollama response: {response}")
+        return response
 
     def parse_json_response(self, response: str) -> Dict[str, Any]:
         """
         嘗試將 LLM 回應解析為 JSON 格式，若失敗則回傳空 dict。
         """
-        import json
         try:
             return json.loads(response)
         except Exception:
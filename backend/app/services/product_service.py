@@ -1,5 +1,5 @@
 from typing import List, Optional
-from app.repositories.product_repository import ProductRepository
+from app.repositories.product_repository import AsyncProductRepository, ProductRepository
 from app.schemas.product_schema import ProductDetail, ProductBase
 
 
@@ -37,3 +37,41 @@ class ProductService:
         for key, value in filters.items():
             products = [p for p in products if getattr(p, key, None) == value]
         return [ProductBase.model_validate(p) for p in products]
+
+
+class AsyncProductService:
+    """ProductService 的 async 版本，供 async def 的 endpoint 使用"""
+
+    def __init__(self, repo: AsyncProductRepository):
+        self.repo = repo
+
+    async def create_product(self, data) -> ProductDetail:
+        product = await self.repo.create_product(data)
+        return ProductDetail.model_validate(product)
+
+    async def update_product(self, product_id: int, data) -> ProductDetail:
+        product = await self.repo.update_product(product_id, data)
+        return ProductDetail.model_validate(product)
+
+    async def delete_product(self, product_id: int) -> None:
+        await self.repo.delete_product(product_id)
+
+    async def get_product_detail(self, product_id: int) -> Optional[ProductDetail]:
+        product = await self.repo.get_product_by_id(product_id)
+        if not product:
+            return None
+        return ProductDetail.model_validate(product)
+
+    async def list_products(self, skip: int = 0, limit: int = 20) -> List[ProductBase]:
+        products = await self.repo.get_products(skip=skip, limit=limit)
+        return [ProductBase.model_validate(p) for p in products]
+
+    async def search_products(self, query: str, skip: int = 0, limit: int = 20) -> List[ProductBase]:
+        products = await self.repo.search_products(query=query, skip=skip, limit=limit)
+        return [ProductBase.model_validate(p) for p in products]
+
+    async def filter_products(self, filters: dict, skip: int = 0, limit: int = 20) -> List[ProductBase]:
+        products = await self.repo.get_products(skip=skip, limit=limit)
+        for key, value in filters.items():
+            products = [p for p in products if getattr(p, key, None) == value]
+        return [ProductBase.model_validate(p) for p in products]
@@ -1,55 +1,49 @@
-from typing import List, Dict, Any
-from app.repositories.recommendation_repository import RecommendationRepository
+import asyncio
+import time
+from typing import AsyncIterator, List, Dict, Any, Tuple
+from app.core.metrics import metrics
+from app.core.tasks import cancel_and_wait
+from app.repositories.recommendation_repository import AsyncRecommendationRepository
 from app.services.nlu_service import NLUService
 from app.services.embedding_service import EmbeddingService
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_cache import EmbeddingCache
 from app.services.ollama_service import OllamaService
 
 class RecommendationService:
     def __init__(self,
-                 repo: RecommendationRepository = None,
+                 repo: AsyncRecommendationRepository = None,
                  nlu: NLUService = None,
                  embedder: EmbeddingService = None,
-                 ollama: OllamaService = None):
-        self.repo = repo or RecommendationRepository()
+                 ollama: OllamaService = None,
+                 batcher: EmbeddingBatcher = None):
+        self.repo = repo or AsyncRecommendationRepository()
         self.nlu = nlu or NLUService()
         self.embedder = embedder or EmbeddingService()
         self.ollama = ollama or OllamaService()
+        # 並行請求的查詢向量合併成 micro-batch 計算，熱門查詢直接由 LRU 快取回傳
+        self.batcher = batcher or EmbeddingBatcher(self.embedder, cache=EmbeddingCache())
 
     async def recommend(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """
-        主要推薦邏輯：
-        1. 呼叫 NLU Service 解析意圖
-        2. 根據意圖類型選擇搜尋策略
-        3. 呼叫對應的 Repository 方法
-        4. 生成推薦理由 (使用 LLM)
-        5. 返回推薦商品列表
+        主要推薦邏輯 (以並行的 DAG 執行)：
+        1. 推薦理由 (LLM) 只依賴查詢字串，與搜尋同時開始
+        2. NLU 解析意圖的同時，在 thread pool 預先計算查詢向量
+        3. 根據意圖類型選擇搜尋策略並呼叫對應的 Repository 方法
+        4. 組合並返回推薦商品列表
+        各階段耗時記錄於 metrics (recommend.*)
         """
-        intent = await self.nlu.parse_intent(query)
-        intent_type = intent.get("intentType", "unknown")
-        entities = intent.get("entities", {})
-        filters = intent.get("filters", {})
-        product_ids = []
-        match_scores = []
-
-        if intent_type == "exact":
-            product_ids = self.repo.exact_search(entities, limit)
-            match_scores = [1.0] * len(product_ids)
-        elif intent_type == "semantic":
-            query_vec = self.embedder.encode(query)
-            product_ids = self.repo.semantic_search(query_vec, limit)
-            match_scores = [1.0] * len(product_ids)  # 可進一步計算相似度
-        elif intent_type == "style":
-            product_ids = self.repo.style_based_search(filters, limit)
-            match_scores = [1.0] * len(product_ids)
-        else:
-            # fallback: semantic search
-            query_vec = self.embedder.encode(query)
-            product_ids = self.repo.semantic_search(query_vec, limit)
-            match_scores = [1.0] * len(product_ids)
-
-        # 生成推薦理由 (可用 LLM)
-        reason_prompt = f"請為查詢 '{query}' 生成推薦理由，並以簡短中文說明。"
-        reason = await self.ollama.chat(reason_prompt)
+        start = time.perf_counter()
+        reason_task = asyncio.create_task(
+            metrics.timed("recommend.reason", self.ollama.chat(self._reason_prompt(query)))
+        )
+        try:
+            product_ids, match_scores = await self._search(query, limit)
+        except BaseException:
+            await cancel_and_wait(reason_task)
+            raise
+        reason = await reason_task
+        metrics.observe("recommend.total", time.perf_counter() - start)
 
         # 組合回傳格式
         recommendations = []
@@ -60,3 +54,78 @@ class RecommendationService:
                 "reason": reason
             })
         return recommendations
+
+    async def recommend_stream(self, query: str, limit: int = 10) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        串流版推薦，依序產生 (event, data)：
+        - ("products", [{"product_id", "matchScore"}, ...]) 搜尋完成後立即送出
+        - ("reason", token) 推薦理由逐 token 送出 (與搜尋同時生成，先到的 token 先暫存)
+        - ("done", {})
+        """
+        tokens: asyncio.Queue = asyncio.Queue()
+        reason_task = asyncio.create_task(self._pump_reason(query, tokens))
+        try:
+            product_ids, match_scores = await self._search(query, limit)
+            yield "products", [
+                {"product_id": pid, "matchScore": score} for pid, score in zip(product_ids, match_scores)
+            ]
+            while True:
+                token = await tokens.get()
+                if token is None:
+                    break
+                yield "reason", token
+            await reason_task
+            yield "done", {}
+        finally:
+            if not reason_task.done():
+                await cancel_and_wait(reason_task)
+
+    async def _pump_reason(self, query: str, tokens: asyncio.Queue) -> None:
+        try:
+            async for token in self.ollama.chat_stream(self._reason_prompt(query)):
+                await tokens.put(token)
+        finally:
+            await tokens.put(None)
+
+    async def _search(self, query: str, limit: int) -> Tuple[List[int], List[float]]:
+        """解析意圖並選擇搜尋策略，回傳 (商品 id, 分數)"""
+        # 查詢向量與 NLU 無相依，先交給 batcher 在 worker thread 計算，避免阻塞 event loop
+        embed_task = asyncio.create_task(metrics.timed("recommend.embed", self.batcher.encode(query)))
+        try:
+            intent = await metrics.timed("recommend.nlu", self.nlu.parse_intent(query, query_vector=embed_task))
+        except BaseException:
+            await cancel_and_wait(embed_task)
+            raise
+        intent_type = intent.get("intentType", "unknown")
+        entities = intent.get("entities", {})
+        filters = intent.get("filters", {})
+
+        if intent_type in ("exact", "style"):
+            # 不需要向量時放棄預先計算的結果
+            await cancel_and_wait(embed_task)
+            if intent_type == "exact":
+                search = self.repo.exact_search(entities, limit)
+            else:
+                search = self.repo.style_based_search(filters, limit)
+            product_ids = await metrics.timed("recommend.search", search)
+            return product_ids, [1.0] * len(product_ids)
+
+        # semantic 與 fallback: 語義排序，並把可辨識的屬性條件推入索引
+        query_vec = await embed_task
+        return await metrics.timed(
+            "recommend.search",
+            self.repo.hybrid_search(query_vec, self._attribute_filters(entities, filters), limit),
+        )
+
+    @staticmethod
+    def _reason_prompt(query: str) -> str:
+        return f"請為查詢 '{query}' 生成推薦理由，並以簡短中文說明。"
+
+    @staticmethod
+    def _attribute_filters(entities: Any, filters: Any) -> Dict[str, Any]:
+        """合併 NLU 回傳的 entities / filters (僅 dict 形式) 作為屬性條件"""
+        merged: Dict[str, Any] = {}
+        for part in (entities, filters):
+            if isinstance(part, dict):
+                merged.update(part)
+        return merged
@@ -0,0 +1,204 @@
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.attribute_filter import FILTERABLE_COLUMNS
+from app.core.config import settings
+from app.core.keyword_matcher import KeywordMatcher
+from app.core.translations import (
+    GENDER_TRANSLATIONS, MASTER_CATEGORY_TRANSLATIONS, SUB_CATEGORY_TRANSLATIONS,
+    COLOUR_TRANSLATIONS, SEASON_TRANSLATIONS, USAGE_TRANSLATIONS,
+)
+
+# products 欄位 -> (查找表, 中文翻譯)；只有 FILTERABLE_COLUMNS 會成為 filters，
+# 分類只作為已辨識的 entities (語義向量本身已涵蓋分類)
+LOOKUP_TABLES = {
+    "gender_id": ("genders", GENDER_TRANSLATIONS),
+    "base_colour_id": ("colours", COLOUR_TRANSLATIONS),
+    "usage_id": ("usages", USAGE_TRANSLATIONS),
+    "season_id": ("seasons", SEASON_TRANSLATIONS),
+    "article_type_id": ("article_types", {}),
+    "sub_category_id": ("sub_categories", SUB_CATEGORY_TRANSLATIONS),
+    "master_category_id": ("master_categories", MASTER_CATEGORY_TRANSLATIONS),
+}
+
+# 口語說法 -> (products 欄位, 查找表 name)
+SYNONYMS = {
+    "man": ("gender_id", "Men"),
+    "mens": ("gender_id", "Men"),
+    "men's": ("gender_id", "Men"),
+    "男生": ("gender_id", "Men"),
+    "男士": ("gender_id", "Men"),
+    "男裝": ("gender_id", "Men"),
+    "woman": ("gender_id", "Women"),
+    "womens": ("gender_id", "Women"),
+    "women's": ("gender_id", "Women"),
+    "ladies": ("gender_id", "Women"),
+    "女生": ("gender_id", "Women"),
+    "女士": ("gender_id", "Women"),
+    "女裝": ("gender_id", "Women"),
+    "autumn": ("season_id", "Fall"),
+    "秋天": ("season_id", "Fall"),
+    "夏天": ("season_id", "Summer"),
+    "冬天": ("season_id", "Winter"),
+    "春天": ("season_id", "Spring"),
+    "gray": ("base_colour_id", "Grey"),
+    "navy": ("base_colour_id", "Navy Blue"),
+}
+
+# 不影響意圖的填充詞，計入覆蓋率但不產生條件
+STOPWORDS = [
+    "a", "an", "the", "some", "any", "for", "with", "in", "on", "of", "and", "or", "to",
+    "i", "me", "my", "want", "need", "looking", "show", "find", "buy", "please", "recommend",
+    "我", "想", "要", "買", "找", "請", "推薦", "給", "一件", "一雙", "一些", "有沒有", "的", "和", "與", "適合", "穿",
+]
+
+_STOPWORD = ("stopword", None, None)
+
+
+def _countable(ch: str) -> bool:
+    """計算覆蓋率時只看文字 (英數字與 CJK)，忽略空白與標點"""
+    return ch.isalnum()
+
+
+class RuleBasedNLUService:
+    """
+    以查找表 (名稱、中文顯示名稱、翻譯與口語同義詞) 建立 Aho-Corasick matcher，
+    在微秒等級內抽出 entities / filters，輸出格式與 NLUService 相同。
+    查詢中被辨識 (含填充詞) 的文字比例即為信心值，低於門檻時回傳 None 交由 LLM 解析。
+    查找表 (例如重新匯入資料後) 變動時，由 refresh_if_stale 重新建立 matcher。
+    """
+
+    def __init__(
+        self,
+        db_path: str = settings.DB_PATH,
+        min_confidence: float = settings.RULE_NLU_MIN_CONFIDENCE,
+        refresh_interval: float = settings.RULE_NLU_REFRESH_SECONDS,
+    ):
+        self.db_path = db_path
+        self.min_confidence = min_confidence
+        self.refresh_interval = refresh_interval
+        self._matcher: Optional[KeywordMatcher] = None
+        self._signature: Optional[tuple] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def matcher(self) -> KeywordMatcher:
+        if self._matcher is None:
+            with self._lock:
+                if self._matcher is None:
+                    self._matcher, self._signature = self._build_matcher()
+                    self._last_check = time.monotonic()
+        return self._matcher
+
+    def reload(self) -> None:
+        """查找表變動後重新建立 matcher"""
+        matcher, signature = self._build_matcher()
+        with self._lock:
+            self._matcher, self._signature = matcher, signature
+            self._last_check = time.monotonic()
+
+    def refresh_if_stale(self) -> None:
+        """每隔 refresh_interval 秒檢查一次查找表是否變動，若有則重新建立 matcher"""
+        if self._matcher is None:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.refresh_interval:
+            return
+        self._last_check = now
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                signature = self._read_signature(conn)
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            signature = None
+        if signature != self._signature:
+            self.reload()
+
+    @staticmethod
+    def _read_signature(conn: sqlite3.Connection) -> tuple:
+        """以各查找表的筆數、最大 id 與名稱總長度判斷是否變動"""
+        return tuple(
+            tuple(conn.execute(
+                f"SELECT COUNT(*), MAX(id), TOTAL(LENGTH(name)) + TOTAL(LENGTH(display_name)) FROM {table}"
+            ).fetchone())
+            for table, _ in LOOKUP_TABLES.values()
+        )
+
+    def _build_matcher(self) -> Tuple[KeywordMatcher, Optional[tuple]]:
+        """回傳 (matcher, 查找表 signature)；查找表無法讀取時只含填充詞，signature 為 None"""
+        matcher = KeywordMatcher((word, _STOPWORD) for word in STOPWORDS)
+        names: Dict[Tuple[str, str], int] = {}
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                signature = self._read_signature(conn)
+                for column, (table, translations) in LOOKUP_TABLES.items():
+                    for value_id, name, display_name in conn.execute(f"SELECT id, name, display_name FROM {table}"):
+                        if not name:
+                            continue
+                        names[(column, name)] = value_id
+                        payload = (column, value_id, name)
+                        for label in (name, display_name, translations.get(name)):
+                            if label:
+                                matcher.add(label, payload)
+                        # 英文複數 / 單數 (Tshirts -> tshirt, Heels -> heel)
+                        lower = name.lower()
+                        if lower.endswith("s") and not lower.endswith("ss"):
+                            matcher.add(lower[:-1], payload)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logging.warning(f"Rule-based NLU unavailable: {e}")
+            return matcher, None
+
+        for word, (column, name) in SYNONYMS.items():
+            if (column, name) in names:
+                matcher.add(word, (column, names[(column, name)], name))
+        matcher.build()
+        return matcher, signature
+
+    def parse(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """回傳 {"intentType", "entities", "filters", "confidence"}；信心不足時回傳 None"""
+        self.refresh_if_stale()
+        intent, confidence = self.analyze(user_input)
+        if intent is None or confidence < self.min_confidence:
+            return None
+        return intent
+
+    def analyze(self, user_input: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        text = unicodedata.normalize("NFKC", user_input)
+        total = sum(1 for ch in text if _countable(ch))
+        if total == 0:
+            return None, 0.0
+
+        covered = 0
+        entities: List[str] = []
+        filters: Dict[str, List[int]] = {}
+        for start, end, keyword, payloads in self.matcher.find(text):
+            covered += sum(1 for ch in text[start:end] if _countable(ch))
+            if _STOPWORD in payloads:
+                continue
+            entities.append(text[start:end])
+            # 同一詞對應到多個可過濾欄位時意義不確定，不作為條件
+            filterable = {(column, value_id) for column, value_id, _ in payloads if column in FILTERABLE_COLUMNS}
+            if len({column for column, _ in filterable}) == 1:
+                for column, value_id in filterable:
+                    values = filters.setdefault(column, [])
+                    if value_id not in values:
+                        values.append(value_id)
+
+        confidence = covered / total
+        if not entities:
+            return None, confidence
+        return {
+            "intentType": "semantic",
+            "entities": entities,
+            "filters": filters,
+            "confidence": round(confidence, 3),
+        }, confidence
@@ -0,0 +1,136 @@
+"""
+比較 EmbeddingService 各推論 backend (torch / onnx / onnx-int8)
+- 每個 backend 在獨立的 process 中載入，記憶體量測互不干擾
+- 回報載入時間、單句延遲 (p50 / p95)、批次吞吐量、RSS 與相對 torch 的餘弦相似度
+"""
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.translations import COLOUR_TRANSLATIONS, GENDER_TRANSLATIONS, SUB_CATEGORY_TRANSLATIONS
+
+
+def sample_texts(count: int) -> List[str]:
+    """以查找表詞彙組合出中英文查詢 (不需要資料庫)"""
+    texts = []
+    for (colour, colour_zh), (gender, gender_zh), (sub, sub_zh) in product(
+        COLOUR_TRANSLATIONS.items(), GENDER_TRANSLATIONS.items(), SUB_CATEGORY_TRANSLATIONS.items()
+    ):
+        texts.append(f"{colour} {sub} for {gender}")
+        texts.append(f"適合{gender_zh}的{colour_zh}{sub_zh}")
+        if len(texts) >= count:
+            break
+    return texts[:count]
+
+
+def _rss_mb() -> float:
+    """目前的 RSS (MB)；非 Linux 時退回 peak RSS"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_backend(backend: str, model_name: str, texts: List[str], batch_size: int, single_runs: int) -> Dict:
+    """在子 process 中執行：載入 backend 並量測"""
+    import numpy as np
+    from app.services.embedding_service import EmbeddingService
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    service = EmbeddingService(model_name, backend=backend)
+    service.load()
+    load_seconds = time.perf_counter() - start
+    rss_model = _rss_mb()
+
+    latencies = []
+    for text in texts[:single_runs]:
+        start = time.perf_counter()
+        service.model.encode(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    vectors = service.model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "load_s": load_seconds,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "throughput": len(texts) / batch_seconds,
+        "model_rss_mb": rss_model - rss_before,
+        "peak_rss_mb": _rss_mb(),
+        "vectors": np.asarray(vectors, dtype=np.float32),
+    }
+
+
+def cosine_agreement(reference, vectors) -> Dict[str, float]:
+    import numpy as np
+    a = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    b = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    cosine = np.sum(a * b, axis=1)
+    return {"mean": float(cosine.mean()), "min": float(cosine.min())}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='比較 embedding 推論 backend 的延遲、吞吐量與記憶體')
+    parser.add_argument('--backends', nargs='+', default=['torch', 'onnx', 'onnx-int8'], help='要比較的 backend')
+    parser.add_argument('--model', default=settings.EMBEDDING_MODEL, help='SentenceTransformer 模型名稱')
+    parser.add_argument('--texts', type=int, default=512, help='測試文字數量')
+    parser.add_argument('--texts-file', default=None, help='自訂測試文字 (每行一句)')
+    parser.add_argument('--batch-size', type=int, default=64, help='吞吐量測試的 batch size')
+    parser.add_argument('--single-runs', type=int, default=100, help='單句延遲的量測次數')
+
+    args = parser.parse_args()
+
+    if args.texts_file:
+        texts = [line.strip() for line in Path(args.texts_file).read_text(encoding="utf-8").splitlines() if line.strip()]
+    else:
+        texts = sample_texts(args.texts)
+
+    print("=" * 80)
+    print(f"📊 Embedding backend 比較 ({args.model}, {len(texts)} 句)")
+    print("=" * 80)
+
+    results = []
+    for backend in args.backends:
+        print(f"\n⏳ {backend} ...")
+        # 每個 backend 使用全新的 process (spawn)，避免共用已載入的模型與 allocator
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            try:
+                results.append(
+                    pool.submit(run_backend, backend, args.model, texts, args.batch_size, args.single_runs).result()
+                )
+            except Exception as e:
+                print(f"❌ {backend} 失敗: {e}")
+
+    reference = next((r["vectors"] for r in results if r["backend"] == "torch"), None)
+    print(f"\n{'backend':<12}{'載入 (s)':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'句/秒':>10}"
+          f"{'模型 RSS':>10}{'峰值 RSS':>10}{'cos 平均':>10}{'cos 最小':>10}")
+    print("-" * 92)
+    for r in results:
+        agreement = cosine_agreement(reference, r["vectors"]) if reference is not None else None
+        cos_mean = f"{agreement['mean']:.4f}" if agreement else "-"
+        cos_min = f"{agreement['min']:.4f}" if agreement else "-"
+        print(f"{r['backend']:<12}{r['load_s']:>10.2f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+              f"{r['throughput']:>10.1f}{r['model_rss_mb']:>9.0f}M{r['peak_rss_mb']:>9.0f}M{cos_mean:>10}{cos_min:>10}")
+
+
+if __name__ == "__main__":
+    main()
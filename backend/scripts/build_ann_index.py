@@ -0,0 +1,102 @@
+"""
+離線建立 ANN 索引 (IVF-flat / HNSW / PQ / int8)
+- 讀取目前的 embedding 快照 (由 generate_embeddings.py 產生)
+- 建立索引並與快照同版本存放
+- --benchmark: 以精確搜尋為基準，回報不同 nprobe / ef / rerank 的 recall@k 與延遲
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.ann_index import (
+    ANN_BACKENDS, HNSWIndex, IVFFlatIndex, QuantizedIndex, ann_index_path, evaluate_search, top_k_rows
+)
+from app.core.config import settings
+from app.core.embedding_snapshot import load_snapshot, read_manifest
+
+
+def sample_queries(matrix: np.ndarray, count: int, noise: float = 0.05, seed: int = 42) -> np.ndarray:
+    """以加上雜訊的商品向量模擬查詢向量"""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(matrix), min(count, len(matrix)), replace=False)
+    queries = np.asarray(matrix[rows], dtype=np.float32)
+    queries = queries + rng.normal(scale=noise, size=queries.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def benchmark(index, matrix: np.ndarray, queries: np.ndarray, top_k: int, params, param_name: str):
+    exact_fn = lambda q, k: top_k_rows(matrix @ q, k)
+    ground_truth = [exact_fn(q, top_k) for q in queries]
+
+    exact = evaluate_search(exact_fn, ground_truth, queries, top_k)
+    print(f"\n{'設定':<16}{'recall@' + str(top_k):>12}{'平均 (ms)':>12}{'p95 (ms)':>12}")
+    print("-" * 52)
+    print(f"{'exact':<16}{exact['recall']:>12.3f}{exact['mean_ms']:>12.2f}{exact['p95_ms']:>12.2f}")
+    for value in params:
+        kwargs = {param_name: value}
+        result = evaluate_search(lambda q, k: index.search(matrix, q, k, **kwargs)[0], ground_truth, queries, top_k)
+        label = f"{param_name}={value}"
+        print(f"{label:<16}{result['recall']:>12.3f}{result['mean_ms']:>12.2f}{result['p95_ms']:>12.2f}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='建立 embedding 的 ANN 索引')
+    parser.add_argument('--backend', choices=sorted(ANN_BACKENDS), default='ivf', help='ANN 演算法')
+    parser.add_argument('--snapshot-dir', default=settings.EMBEDDING_SNAPSHOT_DIR, help='embedding 快照目錄')
+    parser.add_argument('--nlist', type=int, default=None, help='IVF list 數量 (預設 4 * sqrt(N))')
+    parser.add_argument('--iterations', type=int, default=20, help='k-means 迭代次數')
+    parser.add_argument('--m', type=int, default=16, help='HNSW M')
+    parser.add_argument('--ef-construction', type=int, default=200, help='HNSW ef_construction')
+    parser.add_argument('--subspaces', type=int, default=settings.PQ_SUBSPACES, help='PQ 子空間數 (= bytes/向量)')
+    parser.add_argument('--benchmark', action='store_true', help='建立後回報 recall@k 與延遲')
+    parser.add_argument('--queries', type=int, default=200, help='benchmark 查詢數量')
+    parser.add_argument('--top-k', type=int, default=10, help='benchmark 的 k')
+
+    args = parser.parse_args()
+
+    manifest = read_manifest(args.snapshot_dir)
+    if not manifest:
+        print(f"❌ 找不到 embedding 快照: {args.snapshot_dir} (請先執行 generate_embeddings.py)")
+        sys.exit(1)
+    _, matrix = load_snapshot(args.snapshot_dir, manifest)
+    print(f"📦 快照 {manifest['version']}: {manifest['count']} 筆, dim={manifest['dim']}")
+
+    start = time.perf_counter()
+    if args.backend == IVFFlatIndex.backend:
+        index = IVFFlatIndex.build(matrix, nlist=args.nlist, iterations=args.iterations)
+        print(f"✅ IVF-flat 建立完成: nlist={index.nlist} ({time.perf_counter() - start:.1f}s)")
+    elif args.backend == HNSWIndex.backend:
+        index = HNSWIndex.build(matrix, m=args.m, ef_construction=args.ef_construction)
+        print(f"✅ HNSW 建立完成: M={args.m} ({time.perf_counter() - start:.1f}s)")
+    else:
+        index = QuantizedIndex.build(matrix, kind=args.backend, subspaces=args.subspaces)
+        float_bytes = manifest["dim"] * 4
+        print(f"✅ {args.backend} 建立完成 ({time.perf_counter() - start:.1f}s): "
+              f"{index.bytes_per_vector} bytes/向量 (float32 為 {float_bytes} bytes, "
+              f"{float_bytes / index.bytes_per_vector:.0f}x 壓縮)")
+
+    path = ann_index_path(args.snapshot_dir, manifest["version"], args.backend)
+    index.save(str(path))
+    print(f"💾 已儲存: {path}")
+
+    if args.benchmark:
+        queries = sample_queries(matrix, args.queries)
+        if args.backend == IVFFlatIndex.backend:
+            params = [p for p in (1, 2, 4, 8, 16, 32, 64) if p <= index.nlist]
+            benchmark(index, matrix, queries, args.top_k, params, "nprobe")
+        elif args.backend == HNSWIndex.backend:
+            benchmark(index, matrix, queries, args.top_k, (16, 32, 64, 128, 256), "ef_search")
+        else:
+            # rerank=0 為純 ADC 分數，可看出量化本身的 recall 損失
+            benchmark(index, matrix, queries, args.top_k, (0, 20, 50, 100, 200, 500), "rerank")
+
+
+if __name__ == "__main__":
+    main()
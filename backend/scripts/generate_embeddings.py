@@ -1,66 +1,511 @@
-import sqlite3
+import hashlib
 import json
+import os
+import sqlite3
+import time
+import traceback
+from collections import OrderedDict
+from contextlib import nullcontext
 from tqdm import tqdm
+from app.core.config import settings
+from app.core.embedding_codec import decode_vector, encode_vector
+from app.core.embedding_snapshot import SnapshotWriter, compute_text_hash, read_manifest, snapshot_version
+from app.db.bulk_load import bulk_load
+from app.models import ProductEmbedding
 from app.services.embedding_service import EmbeddingService  # ✅ 不再需要 backend 前綴
 
 DB_PATH = "fashion_store.db"   # ✅ 直接在 backend 下找 DB
 TABLE_NAME = "product_embeddings"
 PRODUCT_TABLE = "products"
+CHECKPOINT_TABLE = "embedding_checkpoints"
+JOB_NAME = "generate_embeddings"
+CHUNK_SIZE = 1024
+DEDUPE_CACHE_SIZE = 20000  # 跨 chunk 保留的 文字 -> 向量 筆數 (384 維約 1.7 KB / 筆，每個 process 約 35 MB)
 
-# 建立 product_embeddings 資料表 (如尚未存在)
-def create_embeddings_table(conn):
+# 舊資料庫補上 embedding_text_hash 欄位 (增量更新用)
+def ensure_text_hash_column(conn):
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({TABLE_NAME})")}
+    if "embedding_text_hash" not in columns:
+        conn.execute(f"ALTER TABLE {TABLE_NAME} ADD COLUMN embedding_text_hash VARCHAR(64)")
+        conn.commit()
+        print("Added embedding_text_hash column")
+
+# 進度檢查點 (與每個 chunk 的寫入在同一個 transaction 中更新)
+def create_checkpoint_table(conn):
     conn.execute(f"""
-        CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
-            product_id INTEGER PRIMARY KEY,
-            embedding TEXT NOT NULL
+        CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+            job TEXT PRIMARY KEY,
+            embedding_model TEXT NOT NULL,
+            full_rebuild INTEGER NOT NULL,
+            last_product_id INTEGER NOT NULL,
+            processed INTEGER NOT NULL,
+            encoded INTEGER NOT NULL,
+            finished INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
     conn.commit()
 
-# 讀取所有商品資料
-def fetch_products(conn):
-    cursor = conn.execute("""
-        SELECT p.id,
-               p.product_display_name,
-               at.name AS article_type,
-               c.name AS base_colour,
-               s.name AS season,
-               u.name AS usage
-        FROM products p
-        LEFT JOIN article_types at ON p.article_type_id = at.id
-        LEFT JOIN colours c ON p.base_colour_id = c.id
-        LEFT JOIN seasons s ON p.season_id = s.id
-        LEFT JOIN usages u ON p.usage_id = u.id
-    """)
-    return cursor.fetchall()
+# 讀取可續跑的檢查點: 同模型、同模式且尚未完成時回傳 (last_product_id, processed, encoded)
+def load_checkpoint(conn, model_name, full, job=JOB_NAME):
+    row = conn.execute(
+        f"SELECT embedding_model, full_rebuild, last_product_id, processed, encoded, finished "
+        f"FROM {CHECKPOINT_TABLE} WHERE job = ?",
+        (job,),
+    ).fetchone()
+    if row and not row[5] and row[0] == model_name and bool(row[1]) == full:
+        return row[2], row[3], row[4]
+    return None
+
+def save_checkpoint(conn, model_name, full, last_product_id, processed, encoded, finished=False, job=JOB_NAME):
+    conn.execute(
+        f"""REPLACE INTO {CHECKPOINT_TABLE}
+            (job, embedding_model, full_rebuild, last_product_id, processed, encoded, finished, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)""",
+        (job, model_name, int(full), last_product_id, processed, encoded, int(finished)),
+    )
+
+PRODUCT_QUERY = """
+    SELECT p.id,
+           p.product_display_name,
+           at.name AS article_type,
+           c.name AS base_colour,
+           s.name AS season,
+           u.name AS usage
+    FROM products p
+    LEFT JOIN article_types at ON p.article_type_id = at.id
+    LEFT JOIN colours c ON p.base_colour_id = c.id
+    LEFT JOIN seasons s ON p.season_id = s.id
+    LEFT JOIN usages u ON p.usage_id = u.id
+    WHERE COALESCE(p.is_active, 1) = 1
+"""
+
+# 以 keyset pagination 逐段讀取商品 (after_id < id <= until_id)，記憶體只保留一個 chunk
+def iter_product_chunks(conn, after_id=0, chunk_size=CHUNK_SIZE, until_id=None):
+    while True:
+        if until_id is None:
+            rows = conn.execute(
+                PRODUCT_QUERY + " AND p.id > ? ORDER BY p.id LIMIT ?", (after_id, chunk_size)
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                PRODUCT_QUERY + " AND p.id > ? AND p.id <= ? ORDER BY p.id LIMIT ?", (after_id, until_id, chunk_size)
+            ).fetchall()
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1][0]
 
 # 組合商品描述文字
 def build_text(row):
     # row: (id, product_display_name, article_type, base_colour, season, usage)
     return " ".join([str(x) for x in row[1:] if x])
 
-# 批次生成並儲存向量
-def main():
-    conn = sqlite3.connect(DB_PATH)
-    products = fetch_products(conn)
-    texts = [build_text(row) for row in products]
-    product_ids = [row[0] for row in products]
+# 單一商品文字的雜湊 (與 embedding_text 一起保存)
+def hash_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+# 讀取 chunk 範圍內已存在的向量狀態: product_id -> (embedding_model, embedding_text_hash)
+def fetch_existing(conn, first_id, last_id):
+    cursor = conn.execute(
+        f"SELECT product_id, embedding_model, embedding_text_hash FROM {TABLE_NAME} "
+        f"WHERE product_id BETWEEN ? AND ?",
+        (first_id, last_id),
+    )
+    return {row[0]: (row[1], row[2]) for row in cursor}
+
+# 比對一個 chunk 的商品與已存在的向量，決定要重新計算的商品
+def plan_changes(products, existing, model_name, full=False):
+    to_encode = []
+    stats = {"new": 0, "changed": 0, "unchanged": 0}
+    for row in products:
+        text = build_text(row)
+        digest = hash_text(text)
+        current = existing.get(row[0])
+        if current is None:
+            stats["new"] += 1
+        elif full or current != (model_name, digest):
+            stats["changed"] += 1
+        else:
+            stats["unchanged"] += 1
+            continue
+        to_encode.append((row[0], text, digest))
+    return to_encode, stats
+
+# 跨 chunk 的 文字 -> 向量 快取 (LRU，筆數有上限以維持固定的記憶體用量)
+# 向量以 encode_vector 的 bytes 保存 (float32 + 8 bytes header)，
+# Python list 每個 float 都是獨立物件，384 維會佔用約 12 KB
+class VectorMemo:
+    def __init__(self, max_size=DEDUPE_CACHE_SIZE):
+        self.max_size = max_size
+        self._vectors = OrderedDict()
+
+    def __len__(self):
+        return len(self._vectors)
+
+    def get(self, text):
+        vector = self._vectors.get(text)
+        if vector is not None:
+            self._vectors.move_to_end(text)
+        return vector
+
+    def put(self, text, vector):
+        if self.max_size <= 0:
+            return
+        self._vectors[text] = vector
+        self._vectors.move_to_end(text)
+        while len(self._vectors) > self.max_size:
+            self._vectors.popitem(last=False)
+
+# 相同文字只計算一次：chunk 內去重，並重用先前 chunk 已算過的向量
+# 回傳 (已編碼的向量 bytes, 實際計算的文字數)
+def encode_deduplicated(embedder, texts, memo):
+    vectors = {}
+    pending = []
+    for text in dict.fromkeys(texts):
+        vector = memo.get(text)
+        if vector is None:
+            pending.append(text)
+        else:
+            vectors[text] = vector
+    if pending:
+        for text, vector in zip(pending, embedder.batch_encode(pending)):
+            blob = encode_vector(vector)
+            vectors[text] = blob
+            memo.put(text, blob)
+    return [vectors[text] for text in texts], len(pending)
+
+# 寫入一個 chunk 的向量 (呼叫端負責 transaction)；vectors 可為向量或已編碼的 bytes
+def save_embeddings(conn, model_name, records, vectors):
+    conn.executemany(
+        f"""REPLACE INTO {TABLE_NAME}
+            (product_id, embedding_model, embedding_vector, embedding_text, embedding_text_hash)
+            VALUES (?, ?, ?, ?, ?)""",
+        [
+            (product_id, model_name, sqlite3.Binary(vector if isinstance(vector, bytes) else encode_vector(vector)), text, digest)
+            for (product_id, text, digest), vector in zip(records, vectors)
+        ],
+    )
+
+# ===== 多 process 分片模式 (--shards) =====
+
+# 依商品數量把 id 切成 N 個不重疊的範圍: [(first_id, last_id), ...]
+def shard_ranges(conn, shards):
+    total = conn.execute(f"SELECT COUNT(*) FROM {PRODUCT_TABLE}").fetchone()[0]
+    if total == 0:
+        return []
+    shards = max(1, min(shards, total))
+    starts = [
+        conn.execute(f"SELECT id FROM {PRODUCT_TABLE} ORDER BY id LIMIT 1 OFFSET ?", (i * total // shards,)).fetchone()[0]
+        for i in range(shards)
+    ]
+    max_id = conn.execute(f"SELECT MAX(id) FROM {PRODUCT_TABLE}").fetchone()[0]
+    return [(start, (starts[i + 1] - 1) if i + 1 < shards else max_id) for i, start in enumerate(starts)]
+
+def shard_job(index, shards, first_id, last_id):
+    return f"{JOB_NAME}:shard-{index + 1}-of-{shards}:{first_id}-{last_id}"
+
+# 計算一個分片範圍 (after_id < id <= last_id) 的向量，每個 chunk 以一則訊息交給寫入端
+def encode_shard(conn, embedder, index, after_id, last_id, chunk_size, full, memo, queue):
+    for rows in iter_product_chunks(conn, after_id, chunk_size, until_id=last_id):
+        to_encode, chunk_stats = plan_changes(
+            rows, fetch_existing(conn, rows[0][0], rows[-1][0]), embedder.model_id, full=full
+        )
+        blobs, unique = encode_deduplicated(embedder, [text for _, text, _ in to_encode], memo)
+        queue.put(("chunk", index, rows[-1][0], len(rows), to_encode, blobs, chunk_stats, unique))
+
+# 子 process：只負責讀取與計算，結果交給主 process (唯一的寫入者) 保存
+def shard_worker(index, db_path, first_id, last_id, after_id, chunk_size, full, threads, dedupe_cache_size, queue):
+    try:
+        # 限制每個 process 的 intra-op 執行緒數，讓 N 個分片平均使用所有核心
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+        os.environ["MKL_NUM_THREADS"] = str(threads)
+        import torch
+        torch.set_num_threads(threads)
+
+        conn = sqlite3.connect(db_path)
+        embedder = EmbeddingService()
+        embedder.load()
+        encode_shard(conn, embedder, index, after_id, last_id, chunk_size, full, VectorMemo(dedupe_cache_size), queue)
+        conn.close()
+        queue.put(("done", index))
+    except BaseException:
+        queue.put(("error", index, traceback.format_exc()))
+
+# 寫入一則 "chunk" 訊息：向量與該分片的檢查點在同一個 transaction
+def write_shard_chunk(conn, model_name, full, state, message):
+    _, _, last_id, row_count, records, blobs, _, _ = message
+    state["last_id"] = last_id
+    state["processed"] += row_count
+    state["encoded"] += len(records)
+    with conn:
+        save_embeddings(conn, model_name, records, blobs)
+        save_checkpoint(conn, model_name, full, last_id, state["processed"], state["encoded"], job=state["job"])
+
+# 分片完成：標記檢查點為已完成
+def finish_shard(conn, model_name, full, state):
+    with conn:
+        save_checkpoint(conn, model_name, full, state["last_id"], state["processed"],
+                        state["encoded"], finished=True, job=state["job"])
+    state["done"] = True
+
+# 主 process：啟動分片 worker 並依序寫入結果 (每個 chunk 與該分片的檢查點在同一個 transaction)
+def run_sharded(conn, args, model_name):
+    from multiprocessing import get_context
 
+    ranges = shard_ranges(conn, args.shards)
+    ctx = get_context("spawn")
+    queue = ctx.Queue(maxsize=max(4, 2 * len(ranges)))  # 有上限：寫入跟不上時 worker 會等待
+    stats = {"new": 0, "changed": 0, "unchanged": 0}
+    totals = {"processed": 0, "encoded": 0, "model_texts": 0}
+    shard_state = {}
+    workers = []
+    bars = []
+    for index, (first_id, last_id) in enumerate(ranges):
+        job = shard_job(index, len(ranges), first_id, last_id)
+        checkpoint = None if args.restart else load_checkpoint(conn, model_name, args.full, job=job)
+        after_id, processed, encoded = checkpoint or (first_id - 1, 0, 0)
+        size = conn.execute(
+            f"SELECT COUNT(*) FROM {PRODUCT_TABLE} WHERE id BETWEEN ? AND ?", (first_id, last_id)
+        ).fetchone()[0]
+        shard_state[index] = {"job": job, "last_id": after_id, "processed": processed, "encoded": encoded, "done": False}
+        bars.append(tqdm(total=size, initial=processed, position=index, desc=f"Shard {index + 1}/{len(ranges)}"))
+        worker = ctx.Process(
+            target=shard_worker,
+            args=(index, args.db_path, first_id, last_id, after_id, args.chunk_size, args.full,
+                  args.threads_per_shard, args.dedupe_cache_size, queue),
+            daemon=True,
+        )
+        workers.append(worker)
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    try:
+        remaining = len(workers)
+        while remaining:
+            message = queue.get()
+            kind, index = message[0], message[1]
+            state = shard_state[index]
+            if kind == "error":
+                raise RuntimeError(f"Shard {index + 1} failed:\n{message[2]}")
+            if kind == "done":
+                finish_shard(conn, model_name, args.full, state)
+                remaining -= 1
+                continue
+            write_shard_chunk(conn, model_name, args.full, state, message)
+            _, _, _, row_count, records, _, chunk_stats, unique = message
+            for key, value in chunk_stats.items():
+                stats[key] += value
+            totals["processed"] += row_count
+            totals["encoded"] += len(records)
+            totals["model_texts"] += unique
+            bars[index].update(row_count)
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        for bar in bars:
+            bar.close()
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"\n{len(ranges)} shards x {args.threads_per_shard} threads: {totals['processed']} products, "
+        f"{totals['model_texts']} texts encoded in {elapsed:.1f}s "
+        f"({totals['model_texts'] / max(elapsed, 1e-9):.1f} texts/s, {totals['processed'] / max(elapsed, 1e-9):.1f} products/s)"
+    )
+    return stats, totals
+
+# 刪除已不存在或已下架的商品的向量
+def delete_removed(conn):
+    with conn:
+        cursor = conn.execute(
+            f"DELETE FROM {TABLE_NAME} WHERE product_id NOT IN "
+            f"(SELECT id FROM {PRODUCT_TABLE} WHERE COALESCE(is_active, 1) = 1)"
+        )
+    return cursor.rowcount
+
+# ===== 變更清單模式 (--changes-file) =====
+
+# 讀取 import_fashion_data.py --changes-out 產生的變更清單: (需重新計算的 id, 已下架的 id)
+def load_changes(path):
+    with open(path, encoding="utf-8") as f:
+        changes = json.load(f)
+    refresh = sorted(set(changes.get("inserted", [])) | set(changes.get("updated", [])))
+    return refresh, sorted(changes.get("deleted", []))
+
+# 依 id 清單逐段讀取商品
+def iter_products_by_ids(conn, product_ids, chunk_size=CHUNK_SIZE):
+    for start in range(0, len(product_ids), chunk_size):
+        batch = product_ids[start:start + chunk_size]
+        rows = conn.execute(
+            PRODUCT_QUERY + f" AND p.id IN ({','.join('?' * len(batch))}) ORDER BY p.id", batch
+        ).fetchall()
+        if rows:
+            yield rows
+
+# 只處理變更清單中的商品 (不使用檢查點：清單本身就是要處理的範圍)
+def run_changes(conn, args, model_name):
+    refresh, deleted = load_changes(args.changes_file)
+    print(f"Changes file: {len(refresh)} to refresh, {len(deleted)} removed")
     embedder = EmbeddingService()
-    print(f"Generating embeddings for {len(products)} products...")
-    vectors = embedder.batch_encode(texts)
-
-    for product_id, text, vector in tqdm(zip(product_ids, texts, vectors), total=len(product_ids), desc="Embedding products"):
-        embedding_json = json.dumps(vector)  # 向量序列化成 JSON
-        conn.execute(
-            f"""REPLACE INTO {TABLE_NAME} 
-                (product_id, embedding_model, embedding_vector, embedding_text) 
-                VALUES (?, ?, ?, ?)""",
-            (product_id, "your_model_name", sqlite3.Binary(embedding_json.encode("utf-8")), text),
+    stats = {"new": 0, "changed": 0, "unchanged": 0}
+    memo = VectorMemo(args.dedupe_cache_size)
+    processed = encoded = model_texts = 0
+    with tqdm(total=len(refresh), desc="Embedding changed products") as progress:
+        for rows in iter_products_by_ids(conn, refresh, args.chunk_size):
+            to_encode, chunk_stats = plan_changes(
+                rows, fetch_existing(conn, rows[0][0], rows[-1][0]), model_name, full=args.full
+            )
+            vectors, unique = encode_deduplicated(embedder, [text for _, text, _ in to_encode], memo)
+            model_texts += unique
+            processed += len(rows)
+            encoded += len(to_encode)
+            with conn:
+                save_embeddings(conn, model_name, to_encode, vectors)
+            for key, value in chunk_stats.items():
+                stats[key] += value
+            progress.update(len(rows))
+
+    removed = 0
+    with conn:
+        for start in range(0, len(deleted), args.chunk_size):
+            batch = deleted[start:start + args.chunk_size]
+            removed += conn.execute(
+                f"DELETE FROM {TABLE_NAME} WHERE product_id IN ({','.join('?' * len(batch))})", batch
+            ).rowcount
+    return stats, processed, encoded, model_texts, removed
+
+# 以 keyset pagination 逐段讀取已存的向量: [(product_id, embedding_text, embedding_vector), ...]
+def iter_embedding_chunks(conn, chunk_size=CHUNK_SIZE, with_vectors=True):
+    columns = "product_id, embedding_text" + (", embedding_vector" if with_vectors else "")
+    after_id = -1
+    while True:
+        rows = conn.execute(
+            f"SELECT {columns} FROM {TABLE_NAME} WHERE product_id > ? ORDER BY product_id LIMIT ?",
+            (after_id, chunk_size),
+        ).fetchall()
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1][0]
+
+# 匯出 mmap 快照：先串流計算內容雜湊，有變動時再逐段寫入 open_memmap (記憶體用量固定)
+def export_snapshot(conn, model_name, snapshot_dir, chunk_size=CHUNK_SIZE, force=False):
+    text_hash = compute_text_hash(
+        (product_id, text)
+        for rows in iter_embedding_chunks(conn, chunk_size, with_vectors=False)
+        for product_id, text in rows
+    )
+    current = read_manifest(snapshot_dir)
+    if current and current.get("version") == snapshot_version(model_name, text_hash) and not force:
+        print(f"Snapshot {current['version']} is up to date")
+        return current
+
+    count = conn.execute(f"SELECT COUNT(*) FROM {TABLE_NAME}").fetchone()[0]
+    first = conn.execute(f"SELECT embedding_vector FROM {TABLE_NAME} LIMIT 1").fetchone()
+    dim = len(decode_vector(first[0])) if first else 0
+    writer = SnapshotWriter(snapshot_dir, model_name, count, dim)
+    try:
+        offset = 0
+        for rows in tqdm(iter_embedding_chunks(conn, chunk_size), total=-(-count // chunk_size), desc="Exporting snapshot"):
+            writer.write(offset, [row[0] for row in rows], [decode_vector(row[2]) for row in rows])
+            offset += len(rows)
+        manifest = writer.commit(text_hash)
+    except BaseException:
+        writer.abort()
+        raise
+    print(f"Snapshot {manifest['version']} written to {snapshot_dir}")
+    return manifest
+
+# 串流生成並儲存向量 (每個 chunk 一個 transaction，可中斷後續跑)
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='生成商品 embedding (預設只重新計算有變動的商品)')
+    parser.add_argument('--db-path', default=DB_PATH, help='SQLite 資料庫路徑')
+    parser.add_argument('--full', action='store_true', help='忽略文字雜湊，全部重新計算')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='每次讀取 / 計算 / 寫入的商品數')
+    parser.add_argument('--restart', action='store_true', help='忽略未完成的檢查點，從頭開始')
+    parser.add_argument('--dedupe-cache-size', type=int, default=DEDUPE_CACHE_SIZE, help='跨 chunk 重用向量的文字數上限')
+    parser.add_argument('--shards', type=int, default=1, help='平行計算的 worker process 數 (各自負責一段 id 範圍)')
+    parser.add_argument('--threads-per-shard', type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help='每個 worker 的 torch 執行緒數 (建議 shards x threads <= 實體核心數)')
+    parser.add_argument('--bulk-load', action='store_true',
+                        help='SQLite bulk-load 模式：synchronous=OFF、暫時移除次要索引，完成後重建並 ANALYZE')
+    parser.add_argument('--changes-file', default=None,
+                        help='只處理 import_fashion_data.py --changes-out 輸出的變更商品')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db_path)
+    ensure_text_hash_column(conn)
+    create_checkpoint_table(conn)
+
+    # 模型識別字串包含 backend / 量化設定：切換 EMBEDDING_BACKEND 後既有向量視為過期並重新產生
+    model_name = EmbeddingService().model_id
+    if args.bulk_load:
+        print("Bulk-load mode: synchronous=OFF, secondary indexes rebuilt afterwards")
+    with bulk_load(conn, [ProductEmbedding.__table__]) if args.bulk_load else nullcontext():
+        if args.changes_file:
+            stats, processed, encoded, model_texts, removed = run_changes(conn, args, model_name)
+        elif args.shards > 1:
+            stats, totals = run_sharded(conn, args, model_name)
+            processed, encoded, model_texts = totals["processed"], totals["encoded"], totals["model_texts"]
+            removed = delete_removed(conn)
+        else:
+            stats, processed, encoded, model_texts, removed = run_single(conn, args, model_name)
+    print(
+        f"{processed} products: {stats['new']} new, {stats['changed']} changed, "
+        f"{stats['unchanged']} unchanged, {removed} removed ({encoded} encoded in total)"
+    )
+    embedded = stats["new"] + stats["changed"]
+    if embedded:
+        print(
+            f"Dedupe: {embedded} texts -> {model_texts} unique encoded "
+            f"(dedupe ratio {1 - model_texts / embedded:.1%})"
         )
-    conn.commit()
-    conn.close()
     print("All product embeddings generated and saved.")
 
+    # 匯出 mmap 快照，供多個 worker 共用 (版本由內容雜湊決定，內容沒變時不重寫)
+    if settings.EMBEDDING_SNAPSHOT_DIR:
+        export_snapshot(conn, model_name, settings.EMBEDDING_SNAPSHOT_DIR, args.chunk_size, force=args.full)
+    conn.close()
+
+# 單 process 模式：依 id 順序逐 chunk 計算與寫入
+def run_single(conn, args, model_name):
+    embedder = EmbeddingService()
+    checkpoint = None if args.restart else load_checkpoint(conn, model_name, args.full)
+    last_id, processed, encoded = checkpoint or (0, 0, 0)
+    if checkpoint:
+        print(f"Resuming after product {last_id} ({processed} processed, {encoded} encoded)")
+
+    total = conn.execute(f"SELECT COUNT(*) FROM {PRODUCT_TABLE}").fetchone()[0]
+    stats = {"new": 0, "changed": 0, "unchanged": 0}
+    memo = VectorMemo(args.dedupe_cache_size)
+    model_texts = 0
+    with tqdm(total=total, initial=processed, desc="Embedding products") as progress:
+        for rows in iter_product_chunks(conn, last_id, args.chunk_size):
+            to_encode, chunk_stats = plan_changes(
+                rows, fetch_existing(conn, rows[0][0], rows[-1][0]), model_name, full=args.full
+            )
+            vectors, unique = encode_deduplicated(embedder, [text for _, text, _ in to_encode], memo)
+            model_texts += unique
+            last_id = rows[-1][0]
+            processed += len(rows)
+            encoded += len(to_encode)
+            # 向量與檢查點在同一個 transaction：中斷時兩者一致，續跑不會漏算或重算
+            with conn:
+                save_embeddings(conn, model_name, to_encode, vectors)
+                save_checkpoint(conn, model_name, args.full, last_id, processed, encoded)
+            for key, value in chunk_stats.items():
+                stats[key] += value
+            progress.update(len(rows))
+
+    removed = delete_removed(conn)
+    with conn:
+        save_checkpoint(conn, model_name, args.full, last_id, processed, encoded, finished=True)
+    return stats, processed, encoded, model_texts, removed
+
 if __name__ == "__main__":
     main()
@@ -6,32 +6,133 @@
 """
 import sys
 import json
+import hashlib
+import os
+import time
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from datetime import datetime
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.db.session import SessionLocal
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.db.bulk_load import bulk_load
+from app.db.session import SessionLocal, engine
 from app.models import (
     Gender, MasterCategory, SubCategory, ArticleType,
     Colour, Season, Usage, Brand, Product, ProductImage,
     ProductAttribute, ProductSize
 )
+from app.core.translations import (
+    GENDER_TRANSLATIONS, MASTER_CATEGORY_TRANSLATIONS, SUB_CATEGORY_TRANSLATIONS,
+    COLOUR_TRANSLATIONS, SEASON_TRANSLATIONS, USAGE_TRANSLATIONS, COLOUR_HEX
+)
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson 為選用套件
+    _json_loads = json.loads
+
+BULK_BATCH_SIZE = 5000  # bulk 模式每次 executemany 的商品數
+JSON_PARSE_CHUNK_SIZE = 64  # 每次送給解析 process 的檔案數
+EMPTY_JSON_RECORD = {"brand": None, "price": 0.0, "description": None, "images": [], "attributes": []}
+STYLE_IMAGE_TYPES = (('default', 'front'), ('back', 'back'), ('search', 'search'))
+# 差異同步時不覆寫的欄位 (庫存、評分等由營運資料維護)
+SYNC_PRESERVED_COLUMNS = {"id", "stock_count"}
+LOOKUP_MODELS = {
+    "genders": Gender,
+    "master_categories": MasterCategory,
+    "sub_categories": SubCategory,
+    "article_types": ArticleType,
+    "colours": Colour,
+    "seasons": Season,
+    "usages": Usage,
+    "brands": Brand,
+}
+
+
+def parse_price(price_str) -> float:
+    """移除貨幣符號和逗號後轉為 float，無法解析時為 0"""
+    if not price_str:
+        return 0.0
+    price_str = str(price_str).replace('₹', '').replace(',', '').strip()
+    try:
+        return float(price_str)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def parse_product_json(path: str) -> Optional[Dict]:
+    """
+    解析單一 styles/<id>.json，只保留匯入需要的欄位 (在 process pool 中執行)。
+    檔案不存在或格式錯誤時回傳 None。
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = _json_loads(f.read()).get('data')
+    except (OSError, ValueError, AttributeError):
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    brand_name = data.get('brandName')
+    style_images = data.get('styleImages') or {}
+    descriptors = (data.get('productDescriptors') or {}).get('description', {})
+    return {
+        "brand": brand_name.strip() if isinstance(brand_name, str) and brand_name.strip() else None,
+        "price": parse_price(data.get('price', '0')),
+        "description": data.get('productDisplayName'),
+        "images": [
+            (image_type, url)
+            for key, image_type in STYLE_IMAGE_TYPES
+            if (url := (style_images.get(key) or {}).get('imageURL', ''))
+        ],
+        "attributes": [(key, str(value)) for key, value in descriptors.items() if value],
+    }
+
+
+def _fingerprint_value(value):
+    """統一 pandas 的 NaN / float 表示 (同一欄位在不同 chunk 可能被推斷成 int 或 float)"""
+    if pd.isna(value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return str(value) if not isinstance(value, (int, str)) else value
+
+
+def content_fingerprint(row: Tuple, record: Optional[Dict]) -> str:
+    """CSV 列 (itertuples，不含行號) + JSON 精簡記錄的 SHA-256，用於差異同步"""
+    payload = [[_fingerprint_value(value) for value in row[1:]], record]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
 
 
 class FashionDataImporter:
     """Fashion Dataset 匯入器"""
     
-    def __init__(self, dataset_path: str = "../fashion-dataset"):
+    def __init__(self, dataset_path: str = "../fashion-dataset", bulk: bool = False,
+                 batch_size: int = BULK_BATCH_SIZE, workers: int = 0, bulk_load: bool = False,
+                 sync: bool = False, changes_out: Optional[str] = None):
         self.dataset_path = Path(dataset_path)
+        self.bulk = bulk or bulk_load or sync
+        self.bulk_load = bulk_load
+        self.sync = sync
+        self.changes_out = changes_out
+        self.batch_size = batch_size
+        self.workers = workers
         self.csv_path = self.dataset_path / "styles.csv"
         self.json_dir = self.dataset_path / "styles"
         self.images_dir = self.dataset_path / "images"
         
-        self.db = SessionLocal()
+        # bulk-load 模式的 pragma 是連線層級的設定：整個匯入固定使用同一個連線
+        self.connection = engine.connect() if bulk_load else None
+        self.db = SessionLocal(bind=self.connection) if self.connection is not None else SessionLocal()
         
         # 快取查找表 ID (避免重複查詢)
         self.gender_cache: Dict[str, int] = {}
@@ -49,9 +150,15 @@ class FashionDataImporter:
             "successful_imports": 0,
             "failed_imports": 0,
             "skipped_rows": 0,
+            "created_lookups": {},
+            "unchanged_rows": 0,
             "lookup_tables": {},
+            "phases": {},
             "errors": []
         }
+        
+        # 差異同步的變更清單 (商品 id)，供 embedding 生成與下游快取只更新受影響的商品
+        self.changes: Dict[str, List[int]] = {"inserted": [], "updated": [], "deleted": []}
     
     def import_all(self):
         """執行完整匯入流程"""
@@ -60,20 +167,29 @@ class FashionDataImporter:
         print("=" * 80)
         
         try:
-            # 1. 匯入查找表
-            self.import_lookup_tables()
+            if self.bulk:
+                # 1-3. 單次串流：分塊讀取 CSV，同一輪中建立查找表並匯入商品
+                with self._bulk_load_mode():
+                    self.import_streaming()
+            else:
+                # 1. 讀取 CSV (只讀一次，查找表與商品共用)
+                print("\n" + "=" * 80)
+                print("📖 讀取 CSV 檔案...")
+                df = pd.read_csv(self.csv_path, on_bad_lines='skip', encoding='utf-8')
+                self.stats["total_rows"] = len(df)
+                print(f"✅ 讀取 {len(df)} 筆資料")
+                
+                # 2. 匯入查找表 (品牌階段解析的 JSON 記錄由商品匯入重用，每個檔案只解析一次)
+                records = self.import_lookup_tables(df)
+                
+                # 3. 批次匯入商品
+                self.import_products(df, records)
             
-            # 2. 讀取 CSV
-            print("\n" + "=" * 80)
-            print("📖 讀取 CSV 檔案...")
-            df = pd.read_csv(self.csv_path, on_bad_lines='skip', encoding='utf-8')
-            self.stats["total_rows"] = len(df)
-            print(f"✅ 讀取 {len(df)} 筆資料")
-            
-            # 3. 批次匯入商品
-            self.import_products(df)
+            # 4. 輸出變更清單
+            if self.changes_out:
+                self.write_changes(self.changes_out)
             
-            # 4. 顯示統計
+            # 5. 顯示統計
             self.print_statistics()
             
             print("\n" + "=" * 80)
@@ -86,283 +202,76 @@ class FashionDataImporter:
             raise
         finally:
             self.db.close()
+            if self.connection is not None:
+                self.connection.close()
     
-    def import_lookup_tables(self):
-        """匯入所有查找表"""
+    def _bulk_load_mode(self):
+        """--bulk-load：匯入期間放寬 pragma 並移除商品 / 圖片 / 屬性的次要索引，結束後重建並 ANALYZE"""
+        if not self.bulk_load:
+            return nullcontext()
+        self.db.commit()
+        print("🚚 Bulk-load 模式: synchronous=OFF, 暫時移除次要索引 (結束後重建並 ANALYZE)")
+        return bulk_load(
+            self.connection.connection.driver_connection,
+            [Product.__table__, ProductImage.__table__, ProductAttribute.__table__],
+        )
+    
+    def import_lookup_tables(self, df: pd.DataFrame) -> Dict[str, Optional[Dict]]:
+        """
+        匯入所有查找表 (每個表一次 IN 查詢，缺少的值以 executemany 建立)。
+        回傳品牌階段解析的 JSON 精簡記錄 (檔名 id -> 記錄)。
+        """
         print("\n" + "=" * 80)
         print("📊 匯入查找表...")
         print("=" * 80)
         
-        # 讀取 CSV 以取得所有唯一值 (處理格式錯誤)
-        df = pd.read_csv(self.csv_path, on_bad_lines='skip', encoding='utf-8')
-        
-        # 1. Genders
-        self._import_genders(df)
-        
-        # 2. Categories
-        self._import_master_categories(df)
-        
-        # 3. Sub Categories
-        self._import_sub_categories(df)
-        
-        # 4. Article Types
-        self._import_article_types(df)
-        
-        # 5. Colours
-        self._import_colours(df)
-        
-        # 6. Seasons
-        self._import_seasons(df)
-        
-        # 7. Usages
-        self._import_usages(df)
+        # 1-7. 性別 / 分類 / 商品類型 / 顏色 / 季節 / 使用場合 (與 bulk 模式共用)
+        self._resolve_lookups(df)
         
         # 8. Brands
-        self._import_brands(df)
+        records = self._import_brands()
         
+        self._count_lookup_tables()
+        for key, total in self.stats["lookup_tables"].items():
+            print(f"✅ {key}: {total} 個 (新增 {self.stats['created_lookups'].get(key, 0)} 個)")
         print("\n✅ 所有查找表匯入完成")
+        return records
     
-    def _import_master_categories(self, df: pd.DataFrame):
-        """
-        匯入主分類
-        """
-        print("\n📝 匯入主分類 (MasterCategories)...")
-
-        unique_master_categories = df['masterCategory'].dropna().unique()
-        created = 0
-
-        for cat_name in unique_master_categories:
-            existing = self.db.query(MasterCategory).filter_by(name=cat_name).first()
-            if not existing:
-                master_category = MasterCategory(
-                    name=cat_name,
-                    display_name=self._translate_category(cat_name)
-                )
-                self.db.add(master_category)
-                created += 1
-
-        self.db.commit()
-
-        # 建立快取
-        for cat in self.db.query(MasterCategory).all():
-            self.master_category_cache[cat.name] = cat.id
-
-        total = len(self.master_category_cache)
-        print(f"✅ 主分類: {total} 個 (新增 {created} 個)")
-        self.stats["lookup_tables"]["master_categories"] = total
-    
-    def _import_sub_categories(self, df: pd.DataFrame):
-        """匯入子分類"""
-        print("\n📝 匯入子分類 (Sub Categories)...")
-        
-        # 需要同時考慮 category 和 subCategory 的組合
-        unique_pairs = df[['masterCategory', 'subCategory']].dropna().drop_duplicates()
-        created = 0
-        
-        for _, row in unique_pairs.iterrows():
-            master_cat_name = row['masterCategory']
-            sub_cat_name = row['subCategory']
-
-            if master_cat_name not in self.master_category_cache:
-                continue
-
-            existing = self.db.query(SubCategory).filter_by(name=sub_cat_name).first()
-            if not existing:
-                sub_cat = SubCategory(
-                    master_category_id=self.master_category_cache[master_cat_name],
-                    name=sub_cat_name,
-                    display_name=self._translate_sub_category(sub_cat_name)
-                )
-                self.db.add(sub_cat)
-                created += 1
-        
-        self.db.commit()
-        
-        # 建立快取
-        for sub_cat in self.db.query(SubCategory).all():
-            self.sub_category_cache[sub_cat.name] = sub_cat.id
-        
-        total = len(self.sub_category_cache)
-        print(f"✅ 子分類: {total} 個 (新增 {created} 個)")
-        self.stats["lookup_tables"]["sub_categories"] = total
-    
-    def _import_article_types(self, df: pd.DataFrame):
-        """匯入商品類型"""
-        print("\n📝 匯入商品類型 (Article Types)...")
-        
-        unique_types = df['articleType'].dropna().unique()
-        created = 0
-        
-        for type_name in unique_types:
-            existing = self.db.query(ArticleType).filter_by(name=type_name).first()
-            if not existing:
-                article_type = ArticleType(
-                    name=type_name,
-                    display_name=type_name  # 保持原名
-                )
-                self.db.add(article_type)
-                created += 1
-        
-        self.db.commit()
-        
-        # 建立快取
-        for at in self.db.query(ArticleType).all():
-            self.article_type_cache[at.name] = at.id
-        
-        total = len(self.article_type_cache)
-        print(f"✅ 商品類型: {total} 個 (新增 {created} 個)")
-        self.stats["lookup_tables"]["article_types"] = total
-    
-    def _import_colours(self, df: pd.DataFrame):
-        """匯入顏色"""
-        print("\n📝 匯入顏色 (Colours)...")
-        
-        unique_colours = df['baseColour'].dropna().unique()
-        created = 0
-        
-        for colour_name in unique_colours:
-            # 標準化顏色名稱 (處理大小寫、空格)
-            colour_name_clean = colour_name.strip()
-            
-            existing = self.db.query(Colour).filter_by(name=colour_name_clean).first()
-            if not existing:
-                colour = Colour(
-                    name=colour_name_clean,
-                    display_name=self._translate_colour(colour_name_clean),
-                    hex_code=self._get_colour_hex(colour_name_clean)
-                )
-                self.db.add(colour)
-                created += 1
-        
-        self.db.commit()
-        
-        # 建立快取
-        for colour in self.db.query(Colour).all():
-            self.colour_cache[colour.name] = colour.id
-        
-        total = len(self.colour_cache)
-        print(f"✅ 顏色: {total} 個 (新增 {created} 個)")
-        self.stats["lookup_tables"]["colours"] = total
-    
-    def _import_seasons(self, df: pd.DataFrame):
-        """匯入季節"""
-        print("\n📝 匯入季節 (Seasons)...")
-        
-        unique_seasons = df['season'].dropna().unique()
-        created = 0
-        
-        for season_name in unique_seasons:
-            existing = self.db.query(Season).filter_by(name=season_name).first()
-            if not existing:
-                season = Season(
-                    name=season_name,
-                    display_name=self._translate_season(season_name)
-                )
-                self.db.add(season)
-                created += 1
-        
-        self.db.commit()
-        
-        # 建立快取
-        for season in self.db.query(Season).all():
-            self.season_cache[season.name] = season.id
-        
-        total = len(self.season_cache)
-        print(f"✅ 季節: {total} 個 (新增 {created} 個)")
-        self.stats["lookup_tables"]["seasons"] = total
-    
-    def _import_usages(self, df: pd.DataFrame):
-        """匯入使用場合"""
-        print("\n📝 匯入使用場合 (Usages)...")
-        
-        unique_usages = df['usage'].dropna().unique()
-        created = 0
-        
-        for usage_name in unique_usages:
-            existing = self.db.query(Usage).filter_by(name=usage_name).first()
-            if not existing:
-                usage = Usage(
-                    name=usage_name,
-                    display_name=self._translate_usage(usage_name)
-                )
-                self.db.add(usage)
-                created += 1
-        
-        self.db.commit()
-        
-        # 建立快取
-        for usage in self.db.query(Usage).all():
-            self.usage_cache[usage.name] = usage.id
-        
-        total = len(self.usage_cache)
-        print(f"✅ 使用場合: {total} 個 (新增 {created} 個)")
-        self.stats["lookup_tables"]["usages"] = total
-    
-    def _import_brands(self, df: pd.DataFrame):
-        """匯入品牌 (從 JSON 讀取)"""
+    def _import_brands(self) -> Dict[str, Optional[Dict]]:
+        """匯入品牌 (解析所有 JSON；workers > 1 時由 process pool 平行解析)，回傳 檔名 id -> 精簡記錄"""
         print("\n📝 匯入品牌 (Brands)...")
         
-        brands_set: Set[str] = set()
-        
-        # 從 JSON 檔案讀取品牌
-        json_files = list(self.json_dir.glob("*.json"))
-        for json_file in json_files[:1000]:  # 先讀取 1000 個檔案以建立品牌列表
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if 'data' in data and 'brandName' in data['data']:
-                        brand_name = data['data']['brandName']
-                        if brand_name and brand_name.strip():
-                            brands_set.add(brand_name.strip())
-            except Exception:
-                continue
-        
-        created = 0
-        for brand_name in brands_set:
-            existing = self.db.query(Brand).filter_by(name=brand_name).first()
-            if not existing:
-                brand = Brand(
-                    name=brand_name,
-                    display_name=brand_name,
-                    is_active=True
-                )
-                self.db.add(brand)
-                created += 1
-        
-        self.db.commit()
-        
-        # 建立快取
-        for brand in self.db.query(Brand).all():
-            self.brand_cache[brand.name] = brand.id
+        json_files = sorted(self.json_dir.glob("*.json"))
+        with self._json_parser() as parse:
+            records = dict(zip((path.stem for path in json_files), parse([str(path) for path in json_files])))
+        brands_set: Set[str] = {record["brand"] for record in records.values() if record and record["brand"]}
         
-        total = len(self.brand_cache)
-        print(f"✅ 品牌: {total} 個 (新增 {created} 個)")
-        self.stats["lookup_tables"]["brands"] = total
+        if self._resolve_lookup("brands", Brand, self.brand_cache, brands_set,
+                                lambda name: {"display_name": name, "is_active": True}):
+            self.db.commit()
+        return records
     
-    def import_products(self, df: pd.DataFrame):
-        """批次匯入商品"""
+    def import_products(self, df: pd.DataFrame, records: Dict[str, Optional[Dict]]):
+        """批次匯入商品 (records 為 import_lookup_tables 回傳的 JSON 精簡記錄)"""
         print("\n" + "=" * 80)
         print("📦 匯入商品資料...")
         print("=" * 80)
         
         batch_size = 100
         total_rows = len(df)
+        existing_ids: Set[int] = set(self.db.execute(select(Product.id)).scalars())
         
         for batch_start in range(0, total_rows, batch_size):
             batch_end = min(batch_start + batch_size, total_rows)
             batch_df = df.iloc[batch_start:batch_end]
             
-            for idx, row in batch_df.iterrows():
+            for row in batch_df.itertuples(name="StyleRow"):
                 try:
-                    self._import_single_product(row)
+                    self._import_single_product(row, existing_ids, records)
                     self.stats["successful_imports"] += 1
                 except Exception as e:
                     self.stats["failed_imports"] += 1
-                    self.stats["errors"].append({
-                        "row": idx,
-                        "product_id": row.get('id'),
-                        "error": str(e)
-                    })
+                    self._record_error(row.Index, row.id, e)
                     # Rollback 當前錯誤，繼續處理下一筆
                     self.db.rollback()
             
@@ -381,168 +290,390 @@ class FashionDataImporter:
         
         print(f"\n✅ 商品匯入完成: {self.stats['successful_imports']} 筆成功")
     
-    def _import_single_product(self, row: pd.Series):
-        """匯入單一商品"""
-        product_id = int(row['id'])
+    # ===== Bulk 模式 =====
+
+    @contextmanager
+    def _phase(self, name: str, rows: int = 0):
+        """累計各階段的耗時與筆數 (rows 可在 with 區塊內透過回傳的 dict 增加)"""
+        phase = self.stats["phases"].setdefault(name, {"rows": 0, "seconds": 0.0})
+        phase["rows"] += rows
+        start = time.perf_counter()
+        try:
+            yield phase
+        finally:
+            phase["seconds"] += time.perf_counter() - start
+
+    def import_streaming(self):
+        """
+        Bulk 匯入 (單次串流 + producer / consumer)：
+        - styles.csv 以 chunksize 分塊讀取一次；每塊先以 IN 查詢解析 / 建立查找表，再產生商品資料
+        - 一次載入已存在的商品 id (取代每筆 SELECT)
+        - process pool 平行解析 styles/<id>.json 成精簡記錄 (producer)，
+          下一塊的 JSON 在寫入上一塊時就開始解析
+        - 主 process 為唯一的寫入者：遇到新品牌即建立，
+          商品 / 圖片 / 屬性組成 dict 後以 Core insert executemany 分批寫入 (consumer)
+        """
+        print("\n" + "=" * 80)
+        print(f"📦 Bulk 匯入 (每批 {self.batch_size} 筆, {self.workers or 1} 個 JSON 解析 process)...")
+        print("=" * 80)
+
+        self._ensure_fingerprint_column()
+        self._load_brand_cache()
+        with self._phase("existing_ids") as phase:
+            # id -> (content_fingerprint, is_active)；非同步模式只用來跳過已存在的 id
+            existing = {
+                product_id: (fingerprint, is_active)
+                for product_id, fingerprint, is_active in self.db.execute(
+                    select(Product.id, Product.content_fingerprint, Product.is_active)
+                )
+            }
+            phase["rows"] += len(existing)
+        seen: Set[int] = set()
+
+        pending = None
+        with self._json_parser() as parse, \
+                pd.read_csv(self.csv_path, on_bad_lines='skip', encoding='utf-8', chunksize=self.batch_size) as reader:
+            while True:
+                with self._phase("read_csv") as phase:
+                    chunk = next(reader, None)
+                    phase["rows"] += 0 if chunk is None else len(chunk)
+                if chunk is None:
+                    break
+                self.stats["total_rows"] += len(chunk)
+
+                with self._phase("lookups", len(chunk)):
+                    self._resolve_lookups(chunk)
+                with self._phase("select_rows", len(chunk)):
+                    rows = self._select_rows(chunk, existing, seen)
+
+                # 先送出這一塊的 JSON 解析，再寫入上一塊 (解析與寫入重疊)
+                records = parse([str(self.json_dir / f"{product_id}.json") for _, product_id, _ in rows])
+                if pending is not None:
+                    self._write_batch(*pending, existing)
+                pending = (rows, records)
+            if pending is not None:
+                self._write_batch(*pending, existing)
+
+        if self.sync:
+            self._deactivate_missing(existing, seen)
+
+        self._count_lookup_tables()
+        print(f"\n✅ 商品匯入完成: {self.stats['successful_imports']} 筆成功 "
+              f"(新增查找值: {self.stats['created_lookups']})")
+
+    def _count_lookup_tables(self):
+        for key, model in LOOKUP_MODELS.items():
+            self.stats["lookup_tables"][key] = self.db.execute(
+                select(func.count()).select_from(model.__table__)
+            ).scalar()
+
+    def _resolve_lookups(self, chunk: pd.DataFrame):
+        """解析這一塊 CSV 用到的查找值 (每個表一次 IN 查詢)，缺少的一次建立並提交"""
+        created = 0
+        created += self._resolve_lookup(
+            "genders", Gender, self.gender_cache, chunk['gender'].dropna().unique(),
+            lambda name: {"display_name": self._translate_gender(name)})
+        created += self._resolve_lookup(
+            "master_categories", MasterCategory, self.master_category_cache, chunk['masterCategory'].dropna().unique(),
+            lambda name: {"display_name": self._translate_category(name)})
+
+        # 子分類需要所屬主分類 (以第一次出現的組合為準)
+        pairs = chunk[['masterCategory', 'subCategory']].dropna().drop_duplicates('subCategory')
+        parents = dict(zip(pairs['subCategory'], pairs['masterCategory']))
+        created += self._resolve_lookup(
+            "sub_categories", SubCategory, self.sub_category_cache,
+            [name for name, parent in parents.items() if parent in self.master_category_cache],
+            lambda name: {"master_category_id": self.master_category_cache[parents[name]],
+                          "display_name": self._translate_sub_category(name)})
+
+        created += self._resolve_lookup(
+            "article_types", ArticleType, self.article_type_cache, chunk['articleType'].dropna().unique(),
+            lambda name: {"display_name": name})  # 保持原名
+        created += self._resolve_lookup(
+            "colours", Colour, self.colour_cache, chunk['baseColour'].dropna().astype(str).str.strip().unique(),
+            lambda name: {"display_name": self._translate_colour(name), "hex_code": self._get_colour_hex(name)})
+        created += self._resolve_lookup(
+            "seasons", Season, self.season_cache, chunk['season'].dropna().unique(),
+            lambda name: {"display_name": self._translate_season(name)})
+        created += self._resolve_lookup(
+            "usages", Usage, self.usage_cache, chunk['usage'].dropna().unique(),
+            lambda name: {"display_name": self._translate_usage(name)})
+        if created:
+            # 立即提交：之後某批商品寫入失敗回滾時不會連帶移除查找值
+            self.db.commit()
+
+    def _resolve_lookup(self, key: str, model, cache: Dict[str, int], names, build) -> int:
+        """以一次 IN 查詢取得尚未快取的名稱的 id，不存在的以 executemany 建立；回傳新增數量"""
+        missing = {name for name in names if name not in cache}
+        if not missing:
+            return 0
+        table = model.__table__
+        cache.update(self.db.execute(select(table.c.name, table.c.id).where(table.c.name.in_(missing))).all())
+        new_names = sorted(name for name in missing if name not in cache)
+        if not new_names:
+            return 0
+        self.db.execute(table.insert(), [{"name": name, **build(name)} for name in new_names])
+        cache.update(self.db.execute(select(table.c.name, table.c.id).where(table.c.name.in_(new_names))).all())
+        self.stats["created_lookups"][key] = self.stats["created_lookups"].get(key, 0) + len(new_names)
+        return len(new_names)
+
+    def _select_rows(self, chunk: pd.DataFrame, existing: Dict[int, Tuple], seen: Set[int]) -> List[Tuple]:
+        """篩掉缺名稱 / id 重複 (及非同步模式下已存在) 的資料，回傳 (行號, 商品 id, row) 列表"""
+        rows = []
+        for row in chunk.itertuples(name="StyleRow"):
+            try:
+                product_id = int(row.id)
+            except (ValueError, TypeError) as e:
+                self.stats["failed_imports"] += 1
+                self._record_error(row.Index, row.id, e)
+                continue
+            product_name = row.productDisplayName
+            if pd.isna(product_name) or not str(product_name).strip():
+                self.stats["skipped_rows"] += 1
+                continue
+            if product_id in seen or (not self.sync and product_id in existing):
+                self.stats["skipped_rows"] += 1
+                continue
+            seen.add(product_id)
+            rows.append((row.Index, product_id, row))
+        return rows
+
+    def _write_batch(self, rows: List[Tuple], records: Iterator[Optional[Dict]], existing: Dict[int, Tuple]):
+        """
+        消費一塊的 JSON 記錄並以一個 transaction 寫入商品 / 圖片 / 屬性。
+        同步模式下依指紋分成新增 / 變動 / 未變動：新增與變動以 INSERT ... ON CONFLICT DO UPDATE 寫入，
+        變動商品的圖片與屬性先刪除再重新寫入。
+        """
+        products, images, attributes = [], [], []
+        inserted, updated = [], []
+        records = iter(records)
+        for idx, product_id, row in rows:
+            with self._phase("parse_json", 1):
+                record = next(records)  # 等待 producer (通常已解析完成)
+            with self._phase("build_rows", 1):
+                try:
+                    product, product_images, product_attributes = self._build_product_rows(product_id, row, record)
+                    product["content_fingerprint"] = content_fingerprint(row, record)
+                except Exception as e:
+                    self.stats["failed_imports"] += 1
+                    self._record_error(idx, product_id, e)
+                    continue
+            if product_id in existing:
+                fingerprint, is_active = existing[product_id]
+                if fingerprint == product["content_fingerprint"] and is_active:
+                    self.stats["unchanged_rows"] += 1
+                    continue
+                updated.append(product_id)
+            else:
+                inserted.append(product_id)
+            products.append(product)
+            images.extend(product_images)
+            attributes.extend(product_attributes)
+
+        try:
+            if self.sync:
+                self._bulk_upsert_products(products)
+                self._delete_children(updated)
+            else:
+                self._bulk_insert("products", Product, products)
+            self._bulk_insert("images", ProductImage, images)
+            self._bulk_insert("attributes", ProductAttribute, attributes)
+            self.db.commit()
+            self.stats["successful_imports"] += len(products)
+            self.changes["inserted"].extend(inserted)
+            self.changes["updated"].extend(updated)
+            for product in products:
+                existing[product["id"]] = (product["content_fingerprint"], True)
+        except Exception as e:
+            # 整批回滾 (含這批新建的品牌)；重跑時這些商品會再次匯入
+            self.db.rollback()
+            self._load_brand_cache()
+            self.stats["failed_imports"] += len(products)
+            self._record_error(f"{rows[0][0]}-{rows[-1][0]}", None, e)
+
+        print(f"進度: CSV {self.stats['total_rows']} 筆 - "
+              f"成功: {self.stats['successful_imports']}, "
+              f"失敗: {self.stats['failed_imports']}, "
+              f"跳過: {self.stats['skipped_rows']}")
+
+    # ===== 差異同步 =====
+
+    def _ensure_fingerprint_column(self):
+        """舊資料庫補上 products.content_fingerprint 欄位"""
+        columns = {row[1] for row in self.db.execute(text("PRAGMA table_info(products)"))}
+        if "content_fingerprint" not in columns:
+            self.db.execute(text("ALTER TABLE products ADD COLUMN content_fingerprint VARCHAR(64)"))
+            self.db.commit()
+            print("➕ 新增 products.content_fingerprint 欄位")
+
+    def _bulk_upsert_products(self, products: List[Dict]):
+        """INSERT ... ON CONFLICT(id) DO UPDATE：新增與變動的商品一次 executemany 寫入"""
+        if not products:
+            return
+        statement = sqlite_insert(Product.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Product.__table__.c.id],
+            set_={
+                **{key: statement.excluded[key] for key in products[0] if key not in SYNC_PRESERVED_COLUMNS},
+                "updated_at": func.now(),  # Core upsert 不會套用 onupdate
+            },
+        )
+        with self._phase("products_upsert", len(products)):
+            self.db.execute(statement, products)
+
+    def _delete_children(self, product_ids: List[int]):
+        """刪除變動商品的圖片與屬性 (之後依新的 JSON 重新寫入)"""
+        if not product_ids:
+            return
+        with self._phase("delete_children", len(product_ids)):
+            for model in (ProductImage, ProductAttribute):
+                self.db.execute(model.__table__.delete().where(model.__table__.c.product_id.in_(product_ids)))
+
+    def _deactivate_missing(self, existing: Dict[int, Tuple], seen: Set[int]):
+        """
+        CSV 中已不存在的商品改為下架 (is_active = False) 而非刪除：訂單與評論仍參照這些商品。
+        清除指紋，日後重新出現時會被視為變動並重新上架。
+        """
+        if not seen:
+            print("⚠️ CSV 沒有任何有效商品，略過下架處理")
+            return
+        missing = sorted(
+            product_id for product_id, (_, is_active) in existing.items()
+            if product_id not in seen and is_active
+        )
+        table = Product.__table__
+        with self._phase("deactivate", len(missing)):
+            for start in range(0, len(missing), self.batch_size):
+                batch = missing[start:start + self.batch_size]
+                self.db.execute(
+                    table.update()
+                    .where(table.c.id.in_(batch))
+                    .values(is_active=False, content_fingerprint=None, updated_at=func.now())
+                )
+            self.db.commit()
+        self.changes["deleted"].extend(missing)
+
+    def write_changes(self, path: str):
+        """輸出變更清單 JSON (generate_embeddings.py --changes-file 可讀取)"""
+        payload = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "csv_path": str(self.csv_path),
+            **{key: sorted(ids) for key, ids in self.changes.items()},
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        print(f"📝 變更清單已寫入 {path}: " + ", ".join(f"{key} {len(ids)}" for key, ids in self.changes.items()))
+
+    @contextmanager
+    def _json_parser(self):
+        """
+        提供 parse(paths) -> 依序產生精簡記錄的 iterator。
+        workers > 1 時由 process pool 解析：呼叫當下即送出所有工作，結果於取用時才等待。
+        """
+        if self.workers <= 1:
+            yield lambda paths: map(parse_product_json, paths)
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            # chunksize 讓每次 IPC 攜帶多筆，減少 pickling / 排程開銷
+            yield lambda paths: pool.map(parse_product_json, paths, chunksize=JSON_PARSE_CHUNK_SIZE)
+
+    def _bulk_insert(self, phase_name: str, model, rows: List[Dict]):
+        """以 Core insert 一次 executemany 寫入 (不建立 ORM 物件)"""
+        if not rows:
+            return
+        with self._phase(phase_name, len(rows)):
+            self.db.execute(model.__table__.insert(), rows)
+
+    def _build_product_rows(self, product_id: int, row: Tuple, record: Optional[Dict]) -> Tuple[Dict, List[Dict], List[Dict]]:
+        """把一筆 CSV 資料 (itertuples 的 namedtuple) 與 JSON 精簡記錄轉成 (商品, 圖片列表, 屬性列表) 的 dict"""
+        record = record or EMPTY_JSON_RECORD
+        image_types = {image_type for image_type, _ in record["images"]}
+        product = {
+            "id": product_id,
+            "product_display_name": str(row.productDisplayName).strip(),
+            "gender_id": self._get_gender_id(row.gender),
+            "master_category_id": self._get_master_category_id(row.masterCategory),
+            "sub_category_id": self._get_sub_category_id(row.subCategory),
+            "article_type_id": self._get_article_type_id(row.articleType),
+            "base_colour_id": self._get_colour_id(row.baseColour),
+            "season_id": self._get_season_id(row.season),
+            "usage_id": self._get_usage_id(row.usage),
+            "year": self._parse_year(row.year),
+            "brand_id": self._get_or_create_brand_id(record["brand"]),
+            "price": record["price"],
+            "description": record["description"],
+            "has_front_image": "front" in image_types,
+            "has_back_image": "back" in image_types,
+            "has_search_image": "search" in image_types,
+            "is_active": True,
+            "stock_count": 100  # 預設庫存
+        }
+        images = [
+            {
+                "product_id": product_id,
+                "image_type": image_type,
+                "image_url": image_url,
+                "is_primary": image_type == 'front',
+                "display_order": order
+            }
+            for order, (image_type, image_url) in enumerate(record["images"])
+        ]
+        attributes = [
+            {"product_id": product_id, "attribute_key": key, "attribute_value": value}
+            for key, value in record["attributes"]
+        ]
+        return product, images, attributes
+
+    def _get_or_create_brand_id(self, brand_name: Optional[str]) -> Optional[int]:
+        """bulk 模式的品牌查找：所有 JSON 都會經過這裡，遇到新品牌即寫入 (與商品同一個 transaction)"""
+        if not brand_name:
+            return None
+        brand_id = self.brand_cache.get(brand_name)
+        if brand_id is None:
+            result = self.db.execute(
+                Brand.__table__.insert(), {"name": brand_name, "display_name": brand_name, "is_active": True}
+            )
+            brand_id = result.inserted_primary_key[0]
+            self.brand_cache[brand_name] = brand_id
+            self.stats["created_lookups"]["brands"] = self.stats["created_lookups"].get("brands", 0) + 1
+        return brand_id
+
+    def _load_brand_cache(self):
+        self.brand_cache = {name: brand_id for brand_id, name in self.db.execute(select(Brand.id, Brand.name))}
+
+    def _record_error(self, row, product_id, error: Exception):
+        self.stats["errors"].append({
+            "row": row,
+            "product_id": product_id,
+            "error": str(error)
+        })
+
+    def _import_single_product(self, row: Tuple, existing_ids: Set[int], records: Dict[str, Optional[Dict]]):
+        """匯入單一商品 (row 為 itertuples 的 namedtuple)"""
+        product_id = int(row.id)
         
-        # 檢查是否已存在
-        existing = self.db.query(Product).filter_by(id=product_id).first()
-        if existing:
+        # 檢查是否已存在 (existing_ids 於匯入開始時一次載入)
+        if product_id in existing_ids:
             self.stats["skipped_rows"] += 1
             return
         
         # 檢查必要欄位
-        product_name = row.get('productDisplayName')
+        product_name = row.productDisplayName
         if pd.isna(product_name) or not str(product_name).strip():
             # 跳過沒有商品名稱的資料
             self.stats["skipped_rows"] += 1
             return
         
-        # 讀取 JSON 資料
-        json_data = self._read_product_json(product_id)
-        
-        # 建立商品
-        product = Product(
-            id=product_id,
-            product_display_name=str(product_name).strip(),
-            gender_id=self._get_gender_id(row.get('gender')),
-            master_category_id=self._get_master_category_id(row.get('masterCategory')),
-            sub_category_id=self._get_sub_category_id(row.get('subCategory')),
-            article_type_id=self._get_article_type_id(row.get('articleType')),
-            base_colour_id=self._get_colour_id(row.get('baseColour')),
-            season_id=self._get_season_id(row.get('season')),
-            usage_id=self._get_usage_id(row.get('usage')),
-            year=self._parse_year(row.get('year')),
-            brand_id=self._get_brand_id_from_json(json_data),
-            price=self._parse_price(json_data),
-            description=self._get_description(json_data),
-            is_active=True,
-            stock_count=100  # 預設庫存
-        )
-        
-        self.db.add(product)
-        self.db.flush()  # 取得 product.id
+        # 與 bulk 模式共用欄位轉換 (JSON 已在品牌階段解析)
+        product, images, attributes = self._build_product_rows(product_id, row, records.get(str(product_id)))
         
-        # 匯入圖片
-        self._import_product_images(product, json_data)
+        self.db.add(Product(**product))
+        self.db.flush()
+        existing_ids.add(product_id)
         
-        # 匯入屬性
-        self._import_product_attributes(product, json_data)
-    
-    def _import_product_images(self, product: Product, json_data: Optional[Dict]):
-        """匯入商品圖片"""
-        if not json_data or 'data' not in json_data:
-            return
-        
-        data = json_data['data']
-        display_order = 0
-        
-        # 主圖
-        if 'styleImages' in data:
-            style_images = data['styleImages']
-            
-            # Default (正面圖)
-            if 'default' in style_images:
-                image_url = style_images['default'].get('imageURL', '')
-                if image_url:
-                    product_image = ProductImage(
-                        product_id=product.id,
-                        image_type='front',
-                        image_url=image_url,
-                        is_primary=True,
-                        display_order=display_order
-                    )
-                    self.db.add(product_image)
-                    display_order += 1
-                    product.has_front_image = True
-            
-            # Back
-            if 'back' in style_images:
-                image_url = style_images['back'].get('imageURL', '')
-                if image_url:
-                    product_image = ProductImage(
-                        product_id=product.id,
-                        image_type='back',
-                        image_url=image_url,
-                        is_primary=False,
-                        display_order=display_order
-                    )
-                    self.db.add(product_image)
-                    display_order += 1
-                    product.has_back_image = True
-            
-            # Search
-            if 'search' in style_images:
-                image_url = style_images['search'].get('imageURL', '')
-                if image_url:
-                    product_image = ProductImage(
-                        product_id=product.id,
-                        image_type='search',
-                        image_url=image_url,
-                        is_primary=False,
-                        display_order=display_order
-                    )
-                    self.db.add(product_image)
-                    product.has_search_image = True
-    
-    def _import_product_attributes(self, product: Product, json_data: Optional[Dict]):
-        """匯入商品屬性"""
-        if not json_data or 'data' not in json_data:
-            return
-        
-        data = json_data['data']
-        
-        # 從 JSON 提取各種屬性
-        attributes = {}
-        
-        if 'productDescriptors' in data:
-            descriptors = data['productDescriptors'].get('description', {})
-            for key, value in descriptors.items():
-                if value:
-                    attributes[key] = str(value)
-        
-        # 儲存屬性
-        for key, value in attributes.items():
-            product_attr = ProductAttribute(
-                product_id=product.id,
-                attribute_key=key,
-                attribute_value=value
-            )
-            self.db.add(product_attr)
-
-    def _import_genders(self, df: pd.DataFrame):
-        """匯入性別查找表"""
-        print("\n📝 匯入性別 (Genders)...")
-        unique_genders = df['gender'].dropna().unique()
-        created = 0
-        for gender_name in unique_genders:
-            existing = self.db.query(Gender).filter_by(name=gender_name).first()
-            if not existing:
-                gender = Gender(
-                    name=gender_name,
-                    display_name=self._translate_gender(gender_name)
-                )
-                self.db.add(gender)
-                created += 1
-        self.db.commit()
-        # 建立快取
-        for gender in self.db.query(Gender).all():
-            self.gender_cache[gender.name] = gender.id
-        total = len(self.gender_cache)
-        print(f"✅ 性別: {total} 個 (新增 {created} 個)")
-        self.stats["lookup_tables"]["genders"] = total
-
-    def _read_product_json(self, product_id: int) -> Optional[Dict]:
-        """讀取商品 JSON 檔案"""
-        json_file = self.json_dir / f"{product_id}.json"
-        if not json_file.exists():
-            return None
-        
-        try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            return None
+        # 圖片與屬性
+        self.db.add_all(ProductImage(**image) for image in images)
+        self.db.add_all(ProductAttribute(**attribute) for attribute in attributes)
     
     # ===== 輔助方法 =====
     
@@ -582,16 +713,6 @@ class FashionDataImporter:
             return None
         return self.usage_cache.get(usage_name)
     
-    def _get_brand_id_from_json(self, json_data: Optional[Dict]) -> Optional[int]:
-        if not json_data or 'data' not in json_data:
-            return None
-        
-        brand_name = json_data['data'].get('brandName')
-        if not brand_name:
-            return None
-        
-        return self.brand_cache.get(brand_name.strip())
-    
     def _parse_year(self, year_value) -> Optional[int]:
         if pd.isna(year_value):
             return None
@@ -600,193 +721,29 @@ class FashionDataImporter:
         except (ValueError, TypeError):
             return None
     
-    def _parse_price(self, json_data: Optional[Dict]) -> float:
-        """從 JSON 解析價格"""
-        if not json_data or 'data' not in json_data:
-            return 0.0
-        
-        price_str = json_data['data'].get('price', '0')
-        if not price_str:
-            return 0.0
-        
-        # 移除貨幣符號和逗號
-        price_str = str(price_str).replace('₹', '').replace(',', '').strip()
-        
-        try:
-            return float(price_str)
-        except (ValueError, TypeError):
-            return 0.0
-    
-    def _get_description(self, json_data: Optional[Dict]) -> Optional[str]:
-        """從 JSON 取得商品描述"""
-        if not json_data or 'data' not in json_data:
-            return None
-        
-        return json_data['data'].get('productDisplayName')
-    
     # ===== 翻譯方法 =====
     
     def _translate_gender(self, name: str) -> str:
-        translations = {
-            'Men': '男性',
-            'Women': '女性',
-            'Boys': '男童',
-            'Girls': '女童',
-            'Unisex': '中性'
-        }
-        return translations.get(name, name)
+        return GENDER_TRANSLATIONS.get(name, name)
     
     def _translate_category(self, name: str) -> str:
-        translations = {
-            'Apparel': '服飾',
-            'Accessories': '配件',
-            'Footwear': '鞋類',
-            'Personal Care': '個人護理',
-            'Free Items': '免費商品',
-            'Sporting Goods': '運動用品',
-            'Home': '居家用品'
-        }
-        return translations.get(name, name)
+        return MASTER_CATEGORY_TRANSLATIONS.get(name, name)
     
     def _translate_sub_category(self, name: str) -> str:
-        translations = {
-            'Topwear': '上衣',
-            'Bottomwear': '下著',
-            'Shoes': '鞋子',
-            'Watches': '手錶',
-            'Socks': '襪子',
-            'Bags': '包包',
-            'Belts': '皮帶',
-            'Flip Flops': '拖鞋',
-            'Innerwear': '內衣',
-            'Sandal': '涼鞋',
-            'Shoe Accessories': '鞋類配件',
-            'Fragrance': '香水',
-            'Jewellery': '珠寶',
-            'Eyewear': '眼鏡',
-            'Dress': '洋裝',
-            'Loungewear and Nightwear': '居家睡衣',
-            'Wallets': '錢包',
-            'Apparel Set': '套裝',
-            'Headwear': '帽子',
-            'Mufflers': '圍巾',
-            'Skin Care': '護膚品',
-            'Makeup': '化妝品',
-            'Free Gifts': '贈品',
-            'Ties': '領帶',
-            'Skin': '皮膚保養',
-            'Beauty Accessories': '美妝配件',
-            'Water Bottle': '水壺',
-            'Sports Accessories': '運動配件',
-            'Stoles': '披肩',
-            'Scarves': '圍巾',
-            'Sports Equipment': '運動器材',
-            'Cufflinks': '袖扣',
-            'Hair Accessory': '髮飾',
-            'Gloves': '手套',
-            'Umbrellas': '雨傘',
-            'Vouchers': '禮券',
-            'Lips': '唇部保養',
-            'Saree': '紗麗',
-            'Perfumes': '香水'
-        }
-        return translations.get(name, name)
+        return SUB_CATEGORY_TRANSLATIONS.get(name, name)
     
     def _translate_colour(self, name: str) -> str:
-        translations = {
-            'Black': '黑色',
-            'White': '白色',
-            'Blue': '藍色',
-            'Red': '紅色',
-            'Grey': '灰色',
-            'Navy Blue': '海軍藍',
-            'Green': '綠色',
-            'Purple': '紫色',
-            'Pink': '粉紅色',
-            'Yellow': '黃色',
-            'Orange': '橙色',
-            'Brown': '棕色',
-            'Beige': '米色',
-            'Olive': '橄欖綠',
-            'Maroon': '栗色',
-            'Silver': '銀色',
-            'Gold': '金色',
-            'Cream': '奶油色',
-            'Tan': '褐色',
-            'Khaki': '卡其色',
-            'Turquoise Blue': '土耳其藍',
-            'Charcoal': '炭灰色',
-            'Coffee Brown': '咖啡棕',
-            'Mushroom Brown': '蘑菇棕',
-            'Burgundy': '勃根地紅',
-            'Lavender': '薰衣草紫',
-            'Mint': '薄荷綠',
-            'Peach': '桃色',
-            'Coral': '珊瑚色',
-            'Rust': '鐵鏽色',
-            'Teal': '水鴨色',
-            'Multi': '多色',
-            'Metallic': '金屬色',
-            'Fluorescent Green': '螢光綠'
-        }
-        return translations.get(name, name)
+        return COLOUR_TRANSLATIONS.get(name, name)
     
     def _translate_season(self, name: str) -> str:
-        translations = {
-            'Summer': '夏季',
-            'Winter': '冬季',
-            'Spring': '春季',
-            'Fall': '秋季'
-        }
-        return translations.get(name, name)
+        return SEASON_TRANSLATIONS.get(name, name)
     
     def _translate_usage(self, name: str) -> str:
-        translations = {
-            'Casual': '休閒',
-            'Formal': '正式',
-            'Sports': '運動',
-            'Ethnic': '民族風',
-            'Party': '派對',
-            'Smart Casual': '智能休閒',
-            'Travel': '旅行',
-            'Home': '居家'
-        }
-        return translations.get(name, name)
+        return USAGE_TRANSLATIONS.get(name, name)
     
     def _get_colour_hex(self, name: str) -> Optional[str]:
         """取得顏色的 HEX 代碼"""
-        colour_hex = {
-            'Black': '#000000',
-            'White': '#FFFFFF',
-            'Blue': '#0000FF',
-            'Red': '#FF0000',
-            'Grey': '#808080',
-            'Navy Blue': '#000080',
-            'Green': '#008000',
-            'Purple': '#800080',
-            'Pink': '#FFC0CB',
-            'Yellow': '#FFFF00',
-            'Orange': '#FFA500',
-            'Brown': '#A52A2A',
-            'Beige': '#F5F5DC',
-            'Olive': '#808000',
-            'Maroon': '#800000',
-            'Silver': '#C0C0C0',
-            'Gold': '#FFD700',
-            'Cream': '#FFFDD0',
-            'Tan': '#D2B48C',
-            'Khaki': '#F0E68C',
-            'Turquoise Blue': '#40E0D0',
-            'Charcoal': '#36454F',
-            'Coffee Brown': '#6F4E37',
-            'Burgundy': '#800020',
-            'Lavender': '#E6E6FA',
-            'Mint': '#98FF98',
-            'Peach': '#FFE5B4',
-            'Coral': '#FF7F50',
-            'Teal': '#008080'
-        }
-        return colour_hex.get(name)
+        return COLOUR_HEX.get(name)
     
     def print_statistics(self):
         """顯示匯入統計"""
@@ -794,18 +751,28 @@ class FashionDataImporter:
         print("📊 匯入統計")
         print("=" * 80)
         
-        print(f"\n查找表:")
+        print("\n查找表:")
         for table_name, count in self.stats["lookup_tables"].items():
             print(f"  - {table_name}: {count} 筆")
         
-        print(f"\n商品:")
+        print("\n商品:")
         print(f"  - 總筆數: {self.stats['total_rows']}")
         print(f"  - 成功匯入: {self.stats['successful_imports']}")
         print(f"  - 失敗: {self.stats['failed_imports']}")
         print(f"  - 跳過 (已存在): {self.stats['skipped_rows']}")
+        if self.sync:
+            print(f"  - 未變動: {self.stats['unchanged_rows']}")
+            print(f"  - 差異同步: 新增 {len(self.changes['inserted'])}, "
+                  f"更新 {len(self.changes['updated'])}, 下架 {len(self.changes['deleted'])}")
+        
+        if self.stats["phases"]:
+            print("\n各階段吞吐量:")
+            for phase_name, phase in self.stats["phases"].items():
+                rate = phase["rows"] / phase["seconds"] if phase["seconds"] else 0.0
+                print(f"  - {phase_name}: {phase['rows']} 筆 / {phase['seconds']:.2f}s ({rate:,.0f} rows/s)")
         
         if self.stats["errors"]:
-            print(f"\n❌ 錯誤記錄 (前 10 筆):")
+            print("\n❌ 錯誤記錄 (前 10 筆):")
             for error in self.stats["errors"][:10]:
                 print(f"  - 行 {error['row']} (ID: {error['product_id']}): {error['error']}")
 
@@ -817,10 +784,24 @@ def main():
     parser = argparse.ArgumentParser(description='匯入 Fashion Dataset')
     parser.add_argument('--dataset-path', default='../fashion-dataset',
                         help='Dataset 路徑')
+    parser.add_argument('--bulk', action='store_true',
+                        help='Bulk 模式：預先載入已存在的 id，以 executemany 分批寫入')
+    parser.add_argument('--batch-size', type=int, default=BULK_BATCH_SIZE,
+                        help='Bulk 模式每批寫入的商品數')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='解析 JSON 的 process 數 (bulk 模式的商品與預設模式的品牌掃描；1 = 在主 process 解析)')
+    parser.add_argument('--bulk-load', action='store_true',
+                        help='SQLite bulk-load 模式 (隱含 --bulk)：synchronous=OFF、暫時移除次要索引，完成後重建')
+    parser.add_argument('--sync', action='store_true',
+                        help='差異同步 (隱含 --bulk)：依內容指紋新增 / 更新商品，CSV 中已移除的商品改為下架')
+    parser.add_argument('--changes-out', default=None,
+                        help='輸出變更清單 JSON 的路徑 (供 generate_embeddings.py --changes-file 使用)')
     
     args = parser.parse_args()
     
-    importer = FashionDataImporter(args.dataset_path)
+    importer = FashionDataImporter(args.dataset_path, bulk=args.bulk, batch_size=args.batch_size,
+                                   workers=args.workers, bulk_load=args.bulk_load,
+                                   sync=args.sync, changes_out=args.changes_out)
     importer.import_all()
 
 
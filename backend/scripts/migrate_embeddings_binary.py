@@ -0,0 +1,74 @@
+"""
+將 product_embeddings.embedding_vector 由 JSON 字串轉換為 float32 二進位格式
+- 已是二進位格式的資料列會略過，可重複執行
+- 每批次各自 commit
+"""
+import sys
+import sqlite3
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.embedding_codec import decode_vector, encode_vector, is_binary
+
+DB_PATH = "fashion_store.db"
+
+
+def migrate(db_path: str = DB_PATH, batch_size: int = 1000):
+    conn = sqlite3.connect(db_path)
+    converted = 0
+    skipped = 0
+    bytes_before = 0
+    bytes_after = 0
+
+    try:
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, embedding_vector FROM product_embeddings WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            updates = []
+            for row_id, blob in rows:
+                if is_binary(blob):
+                    skipped += 1
+                    continue
+                new_blob = encode_vector(decode_vector(blob))
+                bytes_before += len(blob)
+                bytes_after += len(new_blob)
+                updates.append((sqlite3.Binary(new_blob), row_id))
+
+            if updates:
+                conn.executemany(
+                    "UPDATE product_embeddings SET embedding_vector = ? WHERE id = ?", updates
+                )
+                conn.commit()
+                converted += len(updates)
+            print(f"進度: 已轉換 {converted} 筆, 略過 {skipped} 筆 (已是二進位格式)")
+    finally:
+        conn.close()
+
+    print(f"\n✅ 轉換完成: {converted} 筆")
+    if converted:
+        print(f"  - 轉換前: {bytes_before:,} bytes")
+        print(f"  - 轉換後: {bytes_after:,} bytes ({bytes_before / bytes_after:.1f}x 縮減)")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='將 embedding 向量轉換為 float32 二進位格式')
+    parser.add_argument('--db-path', default=DB_PATH, help='SQLite 資料庫路徑')
+    parser.add_argument('--batch-size', type=int, default=1000, help='每批次轉換筆數')
+
+    args = parser.parse_args()
+    migrate(args.db_path, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
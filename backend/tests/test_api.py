@@ -82,3 +82,12 @@ def test_recommend_semantic():
     if data:
         assert "product_id" in data[0]
         assert "reason" in data[0]
+
+def test_recommend_stream():
+    payload = {"query": "適合夏天海邊的服飾", "limit": 5}
+    with httpx.stream("POST", f"{BASE_URL}/recommend/stream", json=payload, timeout=60.0) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [line[len("event: "):] for line in response.iter_lines() if line.startswith("event: ")]
+    assert events[0] == "products"
+    assert events[-1] == "done"
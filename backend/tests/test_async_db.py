@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.db.async_session import async_database_url, create_async_db_engine, dispose_async_engines
+from app.repositories.recommendation_repository import AsyncRecommendationRepository
+
+
+def test_async_database_url_uses_aiosqlite():
+    assert async_database_url("sqlite:///./fashion_store.db") == "sqlite+aiosqlite:///./fashion_store.db"
+
+
+@pytest.mark.asyncio
+async def test_async_engines_apply_pragmas(tmp_path):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    writer = create_async_db_engine(url)
+    async with writer.begin() as conn:
+        assert (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar() == "wal"
+        await conn.exec_driver_sql("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+        await conn.exec_driver_sql("INSERT INTO items VALUES (1)")
+
+    reader = create_async_db_engine(url, read_only=True, pool_size=2)
+    async with reader.connect() as conn:
+        assert (await conn.exec_driver_sql("SELECT COUNT(*) FROM items")).scalar() == 1
+        with pytest.raises(OperationalError):
+            await conn.exec_driver_sql("INSERT INTO items VALUES (2)")
+    await reader.dispose()
+    await writer.dispose()
+
+
+class _FakeIndex:
+    def __init__(self):
+        self.calls = []
+
+    def search(self, query_vector, top_k, filters=None):
+        self.calls.append((list(query_vector), top_k, filters))
+        return [3, 1], [0.9, 0.5]
+
+
+@pytest.mark.asyncio
+async def test_recommendation_repository_queries_its_own_db_path(tmp_path):
+    db_path = str(tmp_path / "other.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE products (id INTEGER PRIMARY KEY, season TEXT, usage TEXT)")
+    conn.executemany("INSERT INTO products VALUES (?, ?, ?)",
+                     [(1, "Summer", "Casual"), (2, "Winter", "Casual"), (3, "Summer", "Sports")])
+    conn.commit()
+    conn.close()
+
+    index = _FakeIndex()
+    repo = AsyncRecommendationRepository(db_path, index=index)
+    try:
+        assert await repo.exact_search({"season": "Summer"}) == [1, 3]
+        assert await repo.style_based_search({"season": "Summer", "usage": "Casual"}, limit=5) == [1]
+        assert await repo.hybrid_search([1.0, 0.0], {"gender": "Men"}, top_k=2) == ([3, 1], [0.9, 0.5])
+        assert await repo.semantic_search([1.0, 0.0], top_k=2) == [3, 1]
+        assert index.calls[0] == ([1.0, 0.0], 2, {"gender": "Men"})
+    finally:
+        await dispose_async_engines()
@@ -0,0 +1,51 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+
+import app.models  # noqa: F401  (註冊所有資料表)
+from app.db.bulk_load import bulk_load, secondary_indexes
+from app.db.session import Base
+from app.models import Product
+
+
+def _setup(tmp_path):
+    path = str(tmp_path / "bulk.db")
+    Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    return sqlite3.connect(path)
+
+
+def _indexes(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'products'")}
+
+
+def test_indexes_dropped_during_load_and_rebuilt(tmp_path):
+    conn = _setup(tmp_path)
+    names = {index.name for index in secondary_indexes([Product.__table__])}
+    assert names and names <= _indexes(conn)
+
+    with bulk_load(conn, [Product.__table__]):
+        assert not names & _indexes(conn)
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 0
+        conn.executemany("INSERT INTO products (id, product_display_name) VALUES (?, ?)", [(i, f"p{i}") for i in range(1, 101)])
+        conn.commit()
+
+    assert names <= _indexes(conn)
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1 WHERE tbl = 'products'").fetchone()[0] > 0
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+
+
+def test_settings_restored_on_failure(tmp_path):
+    conn = _setup(tmp_path)
+    names = {index.name for index in secondary_indexes([Product.__table__])}
+
+    with pytest.raises(RuntimeError):
+        with bulk_load(conn, [Product.__table__]):
+            conn.execute("INSERT INTO products (id, product_display_name) VALUES (1, 'p1')")
+            raise RuntimeError("boom")
+
+    # 未提交的寫入被回滾，索引與 pragma 皆已還原
+    assert conn.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 0
+    assert names <= _indexes(conn)
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2
@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.db.session import create_db_engine, get_read_db
+
+
+def _pragma(conn, name):
+    return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def test_read_write_engine_pragmas(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    with engine.connect() as conn:
+        assert _pragma(conn, "journal_mode") == "wal"
+        assert _pragma(conn, "synchronous") == 1  # NORMAL
+        assert _pragma(conn, "temp_store") == 2  # MEMORY
+        assert _pragma(conn, "foreign_keys") == 1
+        assert _pragma(conn, "busy_timeout") > 0
+        assert _pragma(conn, "query_only") == 0
+    assert engine.echo is False
+    engine.dispose()
+
+
+def test_read_only_engine_rejects_writes(tmp_path):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    writer = create_db_engine(url)
+    with writer.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+        conn.exec_driver_sql("INSERT INTO items VALUES (1)")
+
+    reader = create_db_engine(url, read_only=True, pool_size=2)
+    with reader.connect() as conn:
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM items").scalar() == 1
+        with pytest.raises(OperationalError):
+            conn.exec_driver_sql("INSERT INTO items VALUES (2)")
+    reader.dispose()
+    writer.dispose()
+
+
+def test_category_endpoint_uses_read_only_session(tmp_path):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy.orm import sessionmaker
+
+    from app.api import category_api
+    from app.db.session import Base
+    from app.models.master_category_model import MasterCategory
+
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    writer = create_db_engine(url)
+    Base.metadata.create_all(writer, tables=[MasterCategory.__table__])
+    with writer.begin() as conn:
+        conn.execute(MasterCategory.__table__.insert(), {"name": "Apparel", "display_name": "服飾"})
+    reader = create_db_engine(url, read_only=True, pool_size=2)
+    sessions = []
+
+    def read_db():
+        db = sessionmaker(bind=reader)()
+        sessions.append(db)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(category_api.router)
+    app.dependency_overrides[get_read_db] = read_db
+    response = TestClient(app).get("/master-categories")
+    assert response.status_code == 200
+    assert response.json() == [{"name": "Apparel", "display_name": "服飾", "description": None}]
+    assert len(sessions) == 1
+    reader.dispose()
+    writer.dispose()
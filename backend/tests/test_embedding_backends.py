@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from app.services.embedding_service import EmbeddingService
+
+TEXTS = [
+    "black casual shoes for men",
+    "適合女生夏天穿的白色洋裝",
+    "Navy Blue formal shirt",
+    "運動用的灰色T恤",
+    "red party dress",
+]
+
+
+@pytest.fixture(scope="module")
+def torch_vectors():
+    # 僅 parity 測試需要實際的模型與 ONNX 套件；未安裝時跳過，其他測試照常執行
+    pytest.importorskip("sentence_transformers")
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("optimum")
+    try:
+        return np.asarray(EmbeddingService(backend="torch").batch_encode(TEXTS))
+    except OSError as e:  # 本機沒有模型權重 (且無法下載)
+        pytest.skip(f"Embedding model unavailable: {e}")
+
+
+@pytest.mark.parametrize("backend,threshold", [("onnx", 0.999), ("onnx-int8", 0.97)])
+def test_backend_parity_with_torch(torch_vectors, backend, threshold):
+    vectors = np.asarray(EmbeddingService(backend=backend).batch_encode(TEXTS))
+    assert vectors.shape == torch_vectors.shape
+    cosine = np.sum(vectors * torch_vectors, axis=1) / (
+        np.linalg.norm(vectors, axis=1) * np.linalg.norm(torch_vectors, axis=1)
+    )
+    assert cosine.min() >= threshold
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        EmbeddingService(backend="tensorrt")
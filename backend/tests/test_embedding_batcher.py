@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.services.embedding_batcher import EmbeddingBatcher
+
+
+class _FakeEmbedder:
+    """以文字長度產生向量，並記錄每次 batch_encode 的批次大小"""
+
+    def __init__(self, delay=0.01, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.batches = []
+        self.threads = set()
+
+    def batch_encode(self, texts):
+        self.batches.append(len(texts))
+        self.threads.add(threading.get_ident())
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("model error")
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def test_concurrent_requests_are_batched():
+    embedder = _FakeEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=16, max_wait_ms=20)
+
+    async def run():
+        texts = ["x" * i for i in range(40)]
+        results = await asyncio.gather(*(batcher.encode(text) for text in texts))
+        await batcher.close()
+        return results
+
+    results = asyncio.run(run())
+    assert results == [[float(i), 1.0] for i in range(40)]
+    assert sum(embedder.batches) == 40
+    assert max(embedder.batches) <= 16
+    assert len(embedder.batches) <= 4
+    assert len(embedder.threads) == 1
+
+
+def test_single_request_latency_is_bounded():
+    embedder = _FakeEmbedder(delay=0)
+    batcher = EmbeddingBatcher(embedder, max_batch_size=16, max_wait_ms=5)
+
+    async def run():
+        start = time.perf_counter()
+        await batcher.encode("hello")
+        elapsed = time.perf_counter() - start
+        await batcher.close()
+        return elapsed
+
+    assert asyncio.run(run()) < 0.5
+    assert embedder.batches == [1]
+
+
+def test_errors_and_cancellation():
+    embedder = _FakeEmbedder(fail=True)
+    batcher = EmbeddingBatcher(embedder, max_batch_size=8, max_wait_ms=20)
+
+    async def run():
+        cancelled = asyncio.create_task(batcher.encode("skip me"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(RuntimeError):
+            await batcher.encode("boom")
+        await batcher.close()
+
+    asyncio.run(run())
+    assert embedder.batches == [1]
+
+
+def test_identical_texts_encoded_once():
+    embedder = _FakeEmbedder(delay=0)
+    batcher = EmbeddingBatcher(embedder, max_batch_size=16, max_wait_ms=20)
+
+    async def run():
+        texts = ["red dress", "blue jeans", "red dress", "red dress"]
+        results = await asyncio.gather(*(batcher.encode(text) for text in texts))
+        await batcher.close()
+        return results
+
+    assert asyncio.run(run()) == [[9.0, 1.0], [10.0, 1.0], [9.0, 1.0], [9.0, 1.0]]
+    assert embedder.batches == [2]
+
+
+def test_close_stops_worker_thread_and_counts_encoded_texts():
+    from app.core.metrics import metrics
+
+    embedder = _FakeEmbedder(delay=0)
+    batcher = EmbeddingBatcher(embedder, max_batch_size=16, max_wait_ms=20)
+    requests_before = metrics.counter("embed.batched_requests")
+    texts_before = metrics.counter("embed.batched_texts")
+
+    async def run():
+        await asyncio.gather(*(batcher.encode(text) for text in ["a", "b", "a", "a"]))
+        await batcher.close()
+
+    asyncio.run(run())
+    assert metrics.counter("embed.batched_requests") - requests_before == 4
+    assert metrics.counter("embed.batched_texts") - texts_before == 2
+    assert batcher._executor is None
+    # shutdown(wait=False) 不等待，閒置的 worker 執行緒隨即結束
+    for thread in threading.enumerate():
+        if thread.name.startswith("embedding-batcher"):
+            thread.join(timeout=1)
+    assert not [t for t in threading.enumerate() if t.name.startswith("embedding-batcher")]
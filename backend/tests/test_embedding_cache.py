@@ -0,0 +1,128 @@
+import asyncio
+import numpy as np
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_cache import EmbeddingCache
+
+
+def test_lru_eviction_and_memory(tmp_path):
+    cache = EmbeddingCache(max_size=2, persist_path=None)
+    cache.put("m", "a", [1.0, 0.0])
+    cache.put("m", "b", [0.0, 1.0])
+    assert cache.get("m", " A ") == [1.0, 0.0]
+    cache.put("m", "c", [1.0, 1.0])
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == [1.0, 0.0]
+    assert len(cache) == 2
+    assert cache.memory_bytes == 2 * 2 * 4
+    # 不同模型的同一查詢互不影響
+    assert cache.get("other", "a") is None
+
+
+def test_persistent_spill_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = EmbeddingCache(max_size=2, persist_path=path)
+    for i in range(5):
+        cache.put("m", f"q{i}", [float(i), 1.0])
+    # 被淘汰的 q0 仍可由磁碟取回
+    assert cache.get("m", "q0") == [0.0, 1.0]
+    cache.close()
+
+    restarted = EmbeddingCache(max_size=2, persist_path=path)
+    assert restarted.preload() == 2
+    assert len(restarted) == 2
+    # 最近使用的 q0 與 q4 已預先載入記憶體
+    assert restarted.get("m", "q0") == [0.0, 1.0]
+    assert restarted.get("m", "q4") == [4.0, 1.0]
+    assert restarted.get("m", "q2") == [2.0, 1.0]
+    restarted.close()
+
+
+def test_disk_retention_limit(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = EmbeddingCache(max_size=10, persist_path=path, disk_max_entries=3)
+    for i in range(6):
+        cache.put("m", f"q{i}", np.array([float(i)]))
+    cache.close()
+    restarted = EmbeddingCache(max_size=10, persist_path=path)
+    assert restarted.preload() == 3
+    assert restarted.get("m", "q0") is None
+    assert restarted.get("m", "q5") == [5.0]
+
+
+def test_batcher_skips_model_for_cached_queries():
+    class _Embedder:
+        model_id = "fake"
+
+        def __init__(self):
+            self.texts = []
+
+        def batch_encode(self, texts):
+            self.texts.extend(texts)
+            return [[float(len(text))] for text in texts]
+
+    embedder = _Embedder()
+    batcher = EmbeddingBatcher(embedder, max_wait_ms=1, cache=EmbeddingCache(max_size=8, persist_path=None))
+
+    async def run():
+        first = await batcher.encode("red dress")
+        second = await batcher.encode("Red  Dress")
+        await batcher.close()
+        return first, second
+
+    assert asyncio.run(run()) == ([9.0], [9.0])
+    assert embedder.texts == ["red dress"]
+
+
+def test_disk_hit_runs_off_event_loop(tmp_path):
+    import threading
+
+    path = str(tmp_path / "cache.db")
+    seed = EmbeddingCache(max_size=2, persist_path=path)
+    seed.put("fake", "red dress", [9.0])
+    seed.close()
+
+    class _Embedder:
+        model_id = "fake"
+
+        def batch_encode(self, texts):
+            raise AssertionError("disk hit should not reach the model")
+
+    cache = EmbeddingCache(max_size=2, persist_path=path)
+    select_threads = []
+    disk_select = cache._disk_select
+
+    def recording_select(key):
+        select_threads.append(threading.get_ident())
+        return disk_select(key)
+
+    cache._disk_select = recording_select
+    batcher = EmbeddingBatcher(_Embedder(), max_wait_ms=1, cache=cache)
+
+    async def run():
+        loop_thread = threading.get_ident()
+        vector = await batcher.encode("Red Dress")
+        # 第二次由記憶體命中，不再查磁碟
+        again = await batcher.encode("red dress")
+        await batcher.close()
+        return loop_thread, vector, again
+
+    loop_thread, vector, again = asyncio.run(run())
+    assert vector == again == [9.0]
+    assert len(select_threads) == 1
+    assert select_threads[0] != loop_thread
+
+
+def test_spill_written_in_batches(tmp_path):
+    from app.services.embedding_cache import SPILL_BATCH_SIZE
+
+    path = str(tmp_path / "cache.db")
+    cache = EmbeddingCache(max_size=1, persist_path=path)
+    for i in range(SPILL_BATCH_SIZE + 1):
+        cache.put("m", f"q{i}", [float(i)])
+    # put 不寫磁碟，只標記待寫入
+    assert cache.spill_due
+    cache.write_spill()
+    assert not cache.spill_due
+    assert cache._disk_select(("m", "q0")) is not None
+    assert cache.get("m", "q3") == [3.0]
+    cache.close()
@@ -0,0 +1,247 @@
+import sqlite3
+from argparse import Namespace
+
+import pytest
+from sqlalchemy import create_engine
+
+pytest.importorskip("tqdm")
+
+import app.models  # noqa: F401  (註冊所有資料表)
+from app.core.embedding_codec import decode_vector, encode_vector
+from app.db.session import Base
+from scripts import generate_embeddings as ge
+
+MODEL = "fake-model"
+
+
+class _FakeEmbedder:
+    """以文字長度與字元總和產生向量，並記錄每次送入模型的文字"""
+
+    model_id = MODEL
+
+    def __init__(self):
+        self.calls = []
+
+    def batch_encode(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), float(sum(map(ord, text)) % 97)] for text in texts]
+
+
+def _create_db(tmp_path, names):
+    path = str(tmp_path / "embeddings.db")
+    Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO products (id, product_display_name, is_active) VALUES (?, ?, 1)", list(names.items())
+    )
+    conn.commit()
+    ge.ensure_text_hash_column(conn)
+    ge.create_checkpoint_table(conn)
+    return conn
+
+
+def _args(**overrides):
+    values = {"restart": False, "full": False, "chunk_size": 2, "dedupe_cache_size": 100}
+    values.update(overrides)
+    return Namespace(**values)
+
+
+def _run(conn, monkeypatch, embedder, model=MODEL, **overrides):
+    monkeypatch.setattr(ge, "EmbeddingService", lambda: embedder)
+    return ge.run_single(conn, _args(**overrides), model)
+
+
+def _table(conn):
+    return {
+        row[0]: (row[1], row[2], decode_vector(row[3]).tolist())
+        for row in conn.execute(
+            "SELECT product_id, embedding_model, embedding_text, embedding_vector FROM product_embeddings"
+        )
+    }
+
+
+def test_plan_changes_classification():
+    rows = [(1, "red dress", None, None, None, None), (2, "blue jeans", None, None, None, None), (3, "cap", None, None, None, None)]
+    existing = {
+        1: (MODEL, ge.hash_text("red dress")),
+        2: (MODEL, ge.hash_text("old jeans")),
+    }
+    to_encode, stats = ge.plan_changes(rows, existing, MODEL)
+    assert stats == {"new": 1, "changed": 1, "unchanged": 1}
+    assert [record[0] for record in to_encode] == [2, 3]
+    assert to_encode[0] == (2, "blue jeans", ge.hash_text("blue jeans"))
+
+    # 模型 (含 backend) 不同時，文字相同也要重新計算
+    _, stats = ge.plan_changes(rows, existing, "other-model")
+    assert stats == {"new": 1, "changed": 2, "unchanged": 0}
+
+    _, stats = ge.plan_changes(rows, existing, MODEL, full=True)
+    assert stats == {"new": 1, "changed": 2, "unchanged": 0}
+
+
+def test_incremental_run_reencodes_only_changed_products(tmp_path, monkeypatch):
+    conn = _create_db(tmp_path, {1: "red dress", 2: "blue jeans", 3: "white shirt"})
+    stats, processed, encoded, _, _ = _run(conn, monkeypatch, _FakeEmbedder())
+    assert stats == {"new": 3, "changed": 0, "unchanged": 0}
+    assert (processed, encoded) == (3, 3)
+
+    conn.execute("UPDATE products SET product_display_name = 'black shirt' WHERE id = 3")
+    conn.commit()
+    embedder = _FakeEmbedder()
+    stats, *_ = _run(conn, monkeypatch, embedder)
+    assert stats == {"new": 0, "changed": 1, "unchanged": 2}
+    assert embedder.calls == [["black shirt"]]
+    assert _table(conn)[3][1] == "black shirt"
+
+    # 換模型 (例如切換 backend) 時全部重新計算
+    embedder = _FakeEmbedder()
+    stats, *_ = _run(conn, monkeypatch, embedder, model="fake-model@onnx")
+    assert stats == {"new": 0, "changed": 3, "unchanged": 0}
+    assert {model for model, _, _ in _table(conn).values()} == {"fake-model@onnx"}
+
+
+class _FailingEmbedder(_FakeEmbedder):
+    """第 fail_on 次呼叫時拋出例外 (模擬中途中斷)"""
+
+    def __init__(self, fail_on):
+        super().__init__()
+        self.fail_on = fail_on
+
+    def batch_encode(self, texts):
+        if len(self.calls) + 1 == self.fail_on:
+            raise KeyboardInterrupt
+        return super().batch_encode(texts)
+
+
+def test_interrupted_run_resumes_from_checkpoint(tmp_path, monkeypatch):
+    names = {i: f"product {i}" for i in range(1, 8)}
+    conn = _create_db(tmp_path, names)
+    with pytest.raises(KeyboardInterrupt):
+        _run(conn, monkeypatch, _FailingEmbedder(fail_on=3))
+    # 已提交的 chunk 與檢查點一致
+    assert sorted(_table(conn)) == [1, 2, 3, 4]
+    assert ge.load_checkpoint(conn, MODEL, False) == (4, 4, 4)
+
+    embedder = _FakeEmbedder()
+    stats, processed, encoded, _, _ = _run(conn, monkeypatch, embedder)
+    assert embedder.calls == [["product 5", "product 6"], ["product 7"]]
+    assert stats == {"new": 3, "changed": 0, "unchanged": 0}
+    assert (processed, encoded) == (7, 7)
+    assert ge.load_checkpoint(conn, MODEL, False) is None  # 已完成
+
+    reference_dir = tmp_path / "reference"
+    reference_dir.mkdir()
+    reference = _create_db(reference_dir, names)
+    _run(reference, monkeypatch, _FakeEmbedder())
+    assert _table(conn) == _table(reference)
+
+    # --restart 忽略檢查點；已完成的工作不會被當成續跑
+    embedder = _FakeEmbedder()
+    stats, *_ = _run(conn, monkeypatch, embedder, restart=True)
+    assert embedder.calls == []
+    assert stats == {"new": 0, "changed": 0, "unchanged": 7}
+
+
+def test_encode_deduplicated_reuses_vectors_across_chunks():
+    embedder = _FakeEmbedder()
+    memo = ge.VectorMemo(max_size=2)
+    vectors, unique = ge.encode_deduplicated(embedder, ["a", "bb", "a", "a"], memo)
+    assert unique == 2
+    assert embedder.calls == [["a", "bb"]]
+    assert vectors[0] == vectors[2] == vectors[3] != vectors[1]
+    assert vectors[0] == encode_vector(embedder.batch_encode(["a"])[0])
+
+    # 下一個 chunk：已算過的文字直接重用，只計算新文字
+    vectors, unique = ge.encode_deduplicated(embedder, ["bb", "ccc"], memo)
+    assert unique == 1
+    assert embedder.calls[-1] == ["ccc"]
+    assert vectors[0] == encode_vector(embedder.batch_encode(["bb"])[0])
+
+    # memo 有筆數上限 (LRU)："a" 已被淘汰，需重新計算
+    _, unique = ge.encode_deduplicated(embedder, ["a"], memo)
+    assert unique == 1
+
+    # 全部命中時不呼叫模型
+    calls = len(embedder.calls)
+    assert ge.encode_deduplicated(embedder, ["a", "a"], memo)[1] == 0
+    assert ge.encode_deduplicated(embedder, [], memo) == ([], 0)
+    assert len(embedder.calls) == calls
+
+
+def test_vector_memo_evicts_least_recently_used_at_cap():
+    memo = ge.VectorMemo(max_size=3)
+    for text in ["a", "b", "c"]:
+        memo.put(text, encode_vector([float(len(text))]))
+    assert memo.get("a") is not None  # "a" 變為最近使用
+    memo.put("d", encode_vector([4.0]))
+    assert len(memo) == 3
+    assert memo.get("b") is None
+    assert all(memo.get(text) is not None for text in ["a", "c", "d"])
+
+    for i in range(100):
+        memo.put(f"text {i}", encode_vector([float(i)]))
+    assert len(memo) == 3
+    assert isinstance(memo.get("text 99"), bytes)
+
+    disabled = ge.VectorMemo(max_size=0)
+    disabled.put("a", encode_vector([1.0]))
+    assert len(disabled) == 0
+
+
+def test_duplicate_texts_share_one_encode_in_a_run(tmp_path, monkeypatch):
+    conn = _create_db(tmp_path, {1: "red dress", 2: "red dress", 3: "blue jeans", 4: "red dress"})
+    embedder = _FakeEmbedder()
+    _, _, encoded, model_texts, _ = _run(conn, monkeypatch, embedder)
+    assert (encoded, model_texts) == (4, 2)
+    assert sorted(text for call in embedder.calls for text in call) == ["blue jeans", "red dress"]
+    table = _table(conn)
+    assert table[1][2] == table[2][2] == table[4][2]
+
+
+def test_shard_ranges_cover_ids_without_overlap(tmp_path):
+    ids = [3, 5, 8, 13, 21, 34, 55, 89, 144, 233]
+    conn = _create_db(tmp_path, {i: f"product {i}" for i in ids})
+    ranges = ge.shard_ranges(conn, 3)
+    assert len(ranges) == 3
+    assert ranges[0][0] == ids[0] and ranges[-1][1] == ids[-1]
+    for (_, last), (first, _) in zip(ranges, ranges[1:]):
+        assert first == last + 1
+    sizes = [sum(first <= i <= last for i in ids) for first, last in ranges]
+    assert sum(sizes) == len(ids) and max(sizes) - min(sizes) <= 1
+
+    assert len(ge.shard_ranges(conn, 50)) == len(ids)
+    conn.execute("DELETE FROM products")
+    assert ge.shard_ranges(conn, 4) == []
+
+
+def test_sharded_merge_matches_single_process(tmp_path, monkeypatch):
+    import queue
+
+    names = {i: f"product {i % 4}" for i in range(1, 12)}
+    conn = _create_db(tmp_path, names)
+    ranges = ge.shard_ranges(conn, 3)
+    states, outputs = [], []
+    for index, (first_id, last_id) in enumerate(ranges):
+        messages = queue.Queue()
+        ge.encode_shard(conn, _FakeEmbedder(), index, first_id - 1, last_id, 2, False, ge.VectorMemo(), messages)
+        outputs.append([messages.get_nowait() for _ in range(messages.qsize())])
+        job = ge.shard_job(index, len(ranges), first_id, last_id)
+        states.append({"job": job, "last_id": first_id - 1, "processed": 0, "encoded": 0, "done": False})
+
+    # 寫入端依到達順序 (各分片交錯) 逐則寫入
+    while any(outputs):
+        for index, messages in enumerate(outputs):
+            if messages:
+                ge.write_shard_chunk(conn, MODEL, False, states[index], messages.pop(0))
+                # 中途的檢查點即為該分片已寫入的位置
+                assert ge.load_checkpoint(conn, MODEL, False, job=states[index]["job"])[0] == states[index]["last_id"]
+    for state in states:
+        ge.finish_shard(conn, MODEL, False, state)
+        assert ge.load_checkpoint(conn, MODEL, False, job=state["job"]) is None
+    assert sum(state["processed"] for state in states) == len(names)
+
+    reference_dir = tmp_path / "reference"
+    reference_dir.mkdir()
+    reference = _create_db(reference_dir, names)
+    _run(reference, monkeypatch, _FakeEmbedder())
+    assert _table(conn) == _table(reference)
@@ -0,0 +1,138 @@
+import json
+import sqlite3
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401  (註冊所有資料表)
+from app.db.session import Base
+from scripts import import_fashion_data as importer_module
+from scripts.import_fashion_data import FashionDataImporter, content_fingerprint
+
+CSV_COLUMNS = ["id", "gender", "masterCategory", "subCategory", "articleType", "baseColour",
+               "season", "year", "usage", "productDisplayName"]
+
+
+def _style(product_id, name, colour="Blue"):
+    return [product_id, "Men", "Apparel", "Topwear", "Tshirts", colour, "Summer", 2012, "Casual", name]
+
+
+def _write_dataset(root, styles, prices):
+    """styles: [CSV 列]；prices: 商品 id -> JSON 中的價格"""
+    (root / "styles").mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(styles, columns=CSV_COLUMNS).to_csv(root / "styles.csv", index=False)
+    for product_id, price in prices.items():
+        data = {
+            "brandName": "Acme",
+            "price": price,
+            "productDisplayName": f"Product {product_id}",
+            "styleImages": {"default": {"imageURL": f"http://img/{product_id}.jpg"}},
+            "productDescriptors": {"description": {"value": f"desc {product_id}"}},
+        }
+        (root / "styles" / f"{product_id}.json").write_text(json.dumps({"data": data}), encoding="utf-8")
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    db_path = tmp_path / "sync.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(importer_module, "SessionLocal", sessionmaker(autoflush=False, bind=engine))
+    root = tmp_path / "fashion-dataset"
+    styles = [_style(1, "Red Tee", "Red"), _style(2, "Blue Tee"), _style(3, "Green Tee", "Green")]
+    _write_dataset(root, styles, {1: 499, 2: 599, 3: 699})
+    yield root, styles, sqlite3.connect(db_path), tmp_path
+    engine.dispose()
+
+
+def _sync(root, tmp_path, name="changes.json"):
+    changes_path = tmp_path / name
+    importer = FashionDataImporter(str(root), sync=True, workers=0, changes_out=str(changes_path))
+    importer.import_all()
+    with open(changes_path, encoding="utf-8") as f:
+        return importer, json.load(f)
+
+
+def _products(conn):
+    return {
+        row[0]: row[1:]
+        for row in conn.execute("SELECT id, price, is_active, stock_count, product_display_name FROM products")
+    }
+
+
+def test_content_fingerprint_is_stable():
+    values = next(pd.DataFrame([_style(1, "Red Tee")], columns=CSV_COLUMNS).itertuples())
+    record = {"brand": "Acme", "price": 499.0, "description": None, "images": [], "attributes": []}
+    assert content_fingerprint(values, record) == content_fingerprint(values, dict(record))
+    # pandas 在不同 chunk 可能把同一欄推斷為 float
+    as_float = values._replace(year=float(values.year))
+    assert content_fingerprint(as_float, record) == content_fingerprint(values, record)
+    assert content_fingerprint(values._replace(year=2013), record) != content_fingerprint(values, record)
+    assert content_fingerprint(values, {**record, "price": 599.0}) != content_fingerprint(values, record)
+
+
+def test_delta_sync(dataset):
+    root, styles, conn, tmp_path = dataset
+
+    # 第一次同步：全部新增
+    _, changes = _sync(root, tmp_path)
+    assert (changes["inserted"], changes["updated"], changes["deleted"]) == ([1, 2, 3], [], [])
+    assert conn.execute("SELECT COUNT(*) FROM product_images").fetchone()[0] == 3
+
+    # 沒有變動的重跑：0 筆變更
+    importer, changes = _sync(root, tmp_path)
+    assert (changes["inserted"], changes["updated"], changes["deleted"]) == ([], [], [])
+    assert importer.stats["unchanged_rows"] == 3
+
+    # 營運資料 (庫存) 不被同步覆寫
+    conn.execute("UPDATE products SET stock_count = 7 WHERE id = 2")
+    conn.commit()
+
+    # 2 改價、3 從 CSV 移除、4 新增
+    _write_dataset(root, [styles[0], styles[1], _style(4, "Black Tee", "Black")], {1: 499, 2: 649, 4: 799})
+    importer, changes = _sync(root, tmp_path, "changes2.json")
+    assert (changes["inserted"], changes["updated"], changes["deleted"]) == ([4], [2], [3])
+    assert importer.stats["unchanged_rows"] == 1
+
+    products = _products(conn)
+    assert products[2][:3] == (649, 1, 7)
+    assert products[3][1] == 0  # 下架而非刪除
+    assert products[4][:2] == (799, 1)
+    # 變動商品的圖片 / 屬性重新寫入，不會重複
+    assert conn.execute("SELECT COUNT(*) FROM product_images WHERE product_id = 2").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM product_attributes WHERE product_id = 2").fetchone()[0] == 1
+
+    # 變更清單與資料庫一致
+    active = {pid for pid, (_, is_active, *_rest) in products.items() if is_active}
+    assert set(changes["inserted"]) | set(changes["updated"]) <= active
+    assert not set(changes["deleted"]) & active
+    assert changes["csv_path"] == str(root / "styles.csv")
+
+    # 下架的商品重新出現時重新上架
+    _write_dataset(root, [styles[0], styles[1], styles[2], _style(4, "Black Tee", "Black")],
+                   {1: 499, 2: 649, 3: 699, 4: 799})
+    _, changes = _sync(root, tmp_path, "changes3.json")
+    assert (changes["inserted"], changes["updated"], changes["deleted"]) == ([], [3], [])
+    assert _products(conn)[3][1] == 1
+
+
+def test_default_import_parses_each_json_once(dataset, monkeypatch):
+    root, _, conn, _ = dataset
+    opened = []
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(str(path))
+        return open(path, *args, **kwargs)
+
+    # 模組內所有檔案讀取 (品牌階段與商品階段) 皆經過 open
+    monkeypatch.setattr(importer_module, "open", counting_open, raising=False)
+    FashionDataImporter(str(root), workers=0).import_all()
+
+    json_paths = [path for path in opened if path.endswith(".json")]
+    assert sorted(json_paths) == sorted(str(root / "styles" / f"{i}.json") for i in (1, 2, 3))
+    assert {pid: row[0] for pid, row in _products(conn).items()} == {1: 499, 2: 599, 3: 699}
+    assert conn.execute("SELECT COUNT(*) FROM product_images").fetchone()[0] == 3
+    assert conn.execute("SELECT COUNT(*) FROM product_attributes").fetchone()[0] == 3
+    assert conn.execute("SELECT name FROM brands").fetchall() == [("Acme",)]
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import numpy as np
+from app.services.intent_cache import IntentCache, normalize_query
+from app.services.nlu_service import NLUService
+from app.services.rule_nlu_service import RuleBasedNLUService
+
+
+def _no_rules(tmp_path):
+    """沒有查找表的規則式解析器 (永遠交給 LLM)"""
+    return RuleBasedNLUService(db_path=str(tmp_path / "empty.db"))
+
+
+class _FakeOllama:
+    def __init__(self, response):
+        self.response = response
+        self.calls = 0
+
+    async def chat(self, prompt, system=None, timeout=None):
+        self.calls += 1
+        return self.response
+
+    def parse_json_response(self, response):
+        try:
+            return json.loads(response)
+        except Exception:
+            return {}
+
+
+def test_normalize_query():
+    assert normalize_query("  Red   DRESS ") == "red dress"
+    assert normalize_query("ＲＥＤ　dress") == "red dress"
+
+
+def test_exact_hit_returns_copy():
+    cache = IntentCache(max_size=4, ttl=60, similarity_threshold=0.9)
+    cache.put("Red dress", {"intentType": "semantic", "filters": {}})
+    hit = cache.get("red  DRESS")
+    assert hit == {"intentType": "semantic", "filters": {}}
+    hit["filters"]["colour"] = "Red"
+    assert cache.get("red dress")["filters"] == {}
+
+
+def test_ttl_expiry():
+    cache = IntentCache(max_size=4, ttl=-1, similarity_threshold=0.9)
+    cache.put("red dress", {"intentType": "semantic"}, np.ones(4))
+    assert cache.get("red dress") is None
+    assert len(cache) == 0
+
+
+def test_semantic_hit_and_eviction():
+    cache = IntentCache(max_size=2, ttl=60, similarity_threshold=0.95)
+    cache.put("a", {"intentType": "a"}, np.array([1.0, 0.0, 0.0]))
+    cache.put("b", {"intentType": "b"}, np.array([0.0, 1.0, 0.0]))
+    assert cache.get_similar(np.array([0.99, 0.05, 0.0]))["intentType"] == "a"
+    assert cache.get_similar(np.array([0.7, 0.7, 0.0])) is None
+    # "a" 剛被使用，容量滿時應淘汰 "b"
+    cache.put("c", {"intentType": "c"}, np.array([0.0, 0.0, 1.0]))
+    assert cache.get("b") is None
+    assert cache.get_similar(np.array([0.0, 1.0, 0.0])) is None
+    assert cache.get("a")["intentType"] == "a"
+
+
+def test_nlu_service_uses_cache(tmp_path):
+    ollama = _FakeOllama('{"intentType": "semantic", "entities": [], "filters": {}}')
+    cache = IntentCache(max_size=8, ttl=60, similarity_threshold=0.95)
+    nlu = NLUService(ollama_service=ollama, cache=cache, rules=_no_rules(tmp_path))
+
+    async def vector(values):
+        return np.array(values)
+
+    async def run():
+        await nlu.parse_intent("black jeans", query_vector=vector([1.0, 0.0]))
+        await nlu.parse_intent("Black Jeans")
+        await nlu.parse_intent("black jean", query_vector=vector([0.99, 0.01]))
+        await nlu.parse_intent("white shirt", query_vector=vector([0.0, 1.0]))
+
+    asyncio.run(run())
+    assert ollama.calls == 2
+
+
+def test_nlu_service_does_not_cache_failures(tmp_path):
+    ollama = _FakeOllama("not json")
+    cache = IntentCache(max_size=8, ttl=60, similarity_threshold=0.95)
+    nlu = NLUService(ollama_service=ollama, cache=cache, rules=_no_rules(tmp_path))
+    for _ in range(2):
+        assert asyncio.run(nlu.parse_intent("???"))["intentType"] == "unknown"
+    assert ollama.calls == 2
+
+
+class _BlockingOllama(_FakeOllama):
+    """chat 會等待 release 事件，並記錄是否已開始 / 被取消"""
+
+    def __init__(self, response):
+        super().__init__(response)
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.cancelled = False
+
+    async def chat(self, prompt, system=None, timeout=None):
+        self.started.set()
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return await super().chat(prompt, system, timeout)
+
+
+def test_llm_starts_while_query_vector_is_pending(tmp_path):
+    cache = IntentCache(max_size=8, ttl=60, similarity_threshold=0.95)
+    cache.put("black jeans", {"intentType": "semantic", "entities": [], "filters": {}}, np.array([1.0, 0.0]))
+
+    async def run(query, values, release_llm):
+        ollama = _BlockingOllama('{"intentType": "exact", "entities": [], "filters": {}}')
+        nlu = NLUService(ollama_service=ollama, cache=cache, rules=_no_rules(tmp_path))
+
+        async def vector():
+            # LLM 在向量完成前就已開始
+            await asyncio.wait_for(ollama.started.wait(), 1)
+            if release_llm:
+                ollama.release.set()
+            return np.array(values)
+
+        intent = await nlu.parse_intent(query, query_vector=vector())
+        pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        return ollama, intent, pending
+
+    # 語義快取命中：取消進行中的 LLM
+    ollama, intent, pending = asyncio.run(run("black jean", [0.99, 0.0], release_llm=False))
+    assert intent["intentType"] == "semantic"
+    assert ollama.cancelled and ollama.calls == 0
+    assert pending == []
+
+    # 未命中：沿用已開始的 LLM 結果，不重複呼叫
+    ollama, intent, pending = asyncio.run(run("white shirt", [0.0, 1.0], release_llm=True))
+    assert intent["intentType"] == "exact"
+    assert not ollama.cancelled and ollama.calls == 1
+    assert cache.get("white shirt")["intentType"] == "exact"
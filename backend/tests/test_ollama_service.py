@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services import ollama_service
+from app.services.ollama_service import OllamaService, close_ollama_client, get_ollama_client
+
+
+def _stream_body(*chunks):
+    return "\n".join(json.dumps(chunk) for chunk in chunks).encode("utf-8")
+
+
+@pytest.fixture(autouse=True)
+def _reset_semaphore(monkeypatch):
+    # semaphore 綁定於建立它的 event loop，每個測試使用新的
+    monkeypatch.setattr(ollama_service, "_semaphore", None)
+
+
+def test_chat_stream_yields_tokens_until_done():
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        body = _stream_body(
+            {"response": "你", "done": False},
+            {"response": "好", "done": False},
+            {"response": "", "done": False},
+            {"response": "!", "done": True},
+            {"response": "after done", "done": False},
+        )
+        # 空行與無法解析的行會被略過
+        return httpx.Response(200, content=body.replace(b"\n", b"\n\nnot json\n", 1))
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = OllamaService(base_url="http://ollama/api/generate", model="m", client=client)
+            tokens = [token async for token in service.chat_stream("hi", system="sys")]
+            text = await service.chat("hi")
+        return tokens, text
+
+    tokens, text = asyncio.run(run())
+    assert tokens == ["你", "好", "!"]
+    assert text == "你好!"
+    assert requests[0] == {"model": "m", "prompt": "hi", "stream": True, "system": "sys"}
+    assert "system" not in requests[1]
+
+
+def test_http_error_is_raised():
+    def handler(request):
+        return httpx.Response(500, content=b"boom")
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await OllamaService(base_url="http://ollama/api/generate", client=client).chat("hi")
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run())
+
+
+def test_semaphore_limits_concurrent_generations():
+    active = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return httpx.Response(200, content=_stream_body({"response": "ok", "done": True}))
+
+    async def run():
+        ollama_service._semaphore = asyncio.Semaphore(2)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = OllamaService(base_url="http://ollama/api/generate", client=client)
+            return await asyncio.gather(*(service.chat(f"q{i}") for i in range(6)))
+
+    assert asyncio.run(run()) == ["ok"] * 6
+    assert peak == 2
+
+
+def test_shared_client_is_reused_and_closed():
+    async def run():
+        client = get_ollama_client()
+        assert get_ollama_client() is client
+        assert OllamaService().client is client
+        await close_ollama_client()
+        assert client.is_closed
+        assert ollama_service._client is None
+        # 關閉後再次取得時重新建立
+        reopened = get_ollama_client()
+        assert reopened is not client and not reopened.is_closed
+        await close_ollama_client()
+
+    asyncio.run(run())
@@ -0,0 +1,24 @@
+from app.core.readiness import FAILED, READY, WARMING, Readiness
+
+
+def test_readiness_transitions():
+    readiness = Readiness()
+    readiness.register(["vector_index", "embedding_model"])
+    assert readiness.snapshot() == {
+        "ready": False,
+        "subsystems": {"vector_index": {"status": "pending"}, "embedding_model": {"status": "pending"}},
+    }
+
+    readiness.mark("vector_index", WARMING)
+    readiness.mark("vector_index", READY)
+    readiness.mark("embedding_model", WARMING)
+    readiness.mark("embedding_model", FAILED, error="model missing")
+    snapshot = readiness.snapshot()
+    assert readiness.is_ready("vector_index")
+    assert not snapshot["ready"]
+    assert snapshot["subsystems"]["embedding_model"]["error"] == "model missing"
+    assert "seconds" in snapshot["subsystems"]["vector_index"]
+
+    readiness.mark("embedding_model", READY)
+    assert readiness.is_ready()
+    assert "error" not in readiness.snapshot()["subsystems"]["embedding_model"]
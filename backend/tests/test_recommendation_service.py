@@ -0,0 +1,166 @@
+import asyncio
+
+import pytest
+
+from app.services.recommendation_service import RecommendationService
+
+
+class _FakeNLU:
+    def __init__(self, intent=None, error=None):
+        self.intent = intent or {"intentType": "semantic", "entities": {}, "filters": {}}
+        self.error = error
+
+    async def parse_intent(self, query, query_vector=None):
+        await asyncio.sleep(0)  # 模擬 I/O，讓已建立的 task 開始執行
+        if self.error:
+            raise self.error
+        return self.intent
+
+
+class _FakeBatcher:
+    """encode 會等待 release 事件 (預設立即完成)，並記錄是否被取消"""
+
+    def __init__(self, block=False):
+        self.release = asyncio.Event()
+        if not block:
+            self.release.set()
+        self.cancelled = False
+
+    async def encode(self, text):
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return [1.0, 0.0]
+
+
+class _FakeRepo:
+    def __init__(self, before_search=None):
+        self.before_search = before_search
+        self.calls = []
+
+    async def _search(self, name, *args):
+        self.calls.append((name,) + args)
+        if self.before_search:
+            await self.before_search()
+
+    async def exact_search(self, entities, limit):
+        await self._search("exact", entities, limit)
+        return [11, 12]
+
+    async def style_based_search(self, filters, limit):
+        await self._search("style", filters, limit)
+        return [21]
+
+    async def hybrid_search(self, query_vector, filters, limit):
+        await self._search("hybrid", query_vector, filters, limit)
+        return [31, 32], [0.9, 0.8]
+
+
+class _FakeOllama:
+    def __init__(self, tokens=("推薦", "理由"), before_reply=None, error=None):
+        self.tokens = tokens
+        self.before_reply = before_reply
+        self.error = error
+        self.started = asyncio.Event()
+        self.cancelled = False
+
+    async def chat(self, prompt):
+        return "".join([token async for token in self.chat_stream(prompt)])
+
+    async def chat_stream(self, prompt):
+        self.started.set()
+        try:
+            if self.before_reply:
+                await self.before_reply()
+            if self.error:
+                raise self.error
+            for token in self.tokens:
+                yield token
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+def _service(nlu=None, batcher=None, repo=None, ollama=None):
+    return RecommendationService(
+        repo=repo or _FakeRepo(), nlu=nlu or _FakeNLU(), embedder=object(),
+        ollama=ollama or _FakeOllama(), batcher=batcher or _FakeBatcher(),
+    )
+
+
+def _pending_tasks():
+    return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+
+def test_reason_runs_concurrently_with_search():
+    async def run():
+        search_done = asyncio.Event()
+        ollama = _FakeOllama(before_reply=search_done.wait)
+
+        async def before_search():
+            # 搜尋必須在推薦理由完成前就能開始 (依序執行會在此逾時)
+            await asyncio.wait_for(ollama.started.wait(), 1)
+            search_done.set()
+
+        service = _service(repo=_FakeRepo(before_search=before_search), ollama=ollama)
+        return await asyncio.wait_for(service.recommend("red dress", limit=2), 2)
+
+    assert asyncio.run(run()) == [
+        {"product_id": 31, "matchScore": 0.9, "reason": "推薦理由"},
+        {"product_id": 32, "matchScore": 0.8, "reason": "推薦理由"},
+    ]
+
+
+@pytest.mark.parametrize("intent_type,expected", [("exact", [11, 12]), ("style", [21])])
+def test_unneeded_embedding_is_cancelled(intent_type, expected):
+    async def run():
+        batcher = _FakeBatcher(block=True)
+        nlu = _FakeNLU({"intentType": intent_type, "entities": {"season": "Summer"}, "filters": {"usage": "Casual"}})
+        results = await _service(nlu=nlu, batcher=batcher).recommend("summer", limit=5)
+        return batcher, results, _pending_tasks()
+
+    batcher, results, pending = asyncio.run(run())
+    assert batcher.cancelled
+    assert [item["product_id"] for item in results] == expected
+    assert {item["matchScore"] for item in results} == {1.0}
+    assert pending == []
+
+
+def test_stream_sends_products_before_reason_tokens():
+    async def run():
+        ollama = _FakeOllama(tokens=("a", "b", "c"))
+        repo = _FakeRepo(before_search=lambda: asyncio.sleep(0.01))  # 理由 token 先產生
+        return [event async for event in _service(repo=repo, ollama=ollama).recommend_stream("q")]
+
+    events = asyncio.run(run())
+    assert events[0] == ("products", [{"product_id": 31, "matchScore": 0.9}, {"product_id": 32, "matchScore": 0.8}])
+    assert events[1:] == [("reason", "a"), ("reason", "b"), ("reason", "c"), ("done", {})]
+
+
+def test_nlu_failure_cancels_sibling_tasks():
+    async def run():
+        batcher = _FakeBatcher(block=True)
+        ollama = _FakeOllama(before_reply=asyncio.Event().wait)  # 永不完成
+        service = _service(nlu=_FakeNLU(error=RuntimeError("nlu down")), batcher=batcher, ollama=ollama)
+        with pytest.raises(RuntimeError, match="nlu down"):
+            await service.recommend("q")
+        return batcher, ollama, _pending_tasks()
+
+    batcher, ollama, pending = asyncio.run(run())
+    assert batcher.cancelled and ollama.cancelled
+    assert pending == []
+
+
+def test_stream_closed_early_cancels_reason():
+    async def run():
+        ollama = _FakeOllama(before_reply=asyncio.Event().wait)
+        stream = _service(ollama=ollama).recommend_stream("q")
+        assert (await stream.__anext__())[0] == "products"
+        await stream.aclose()  # 例如 client 中途斷線
+        return ollama, _pending_tasks()
+
+    ollama, pending = asyncio.run(run())
+    assert ollama.cancelled
+    assert pending == []
@@ -0,0 +1,95 @@
+import asyncio
+import sqlite3
+import pytest
+from app.core.keyword_matcher import KeywordMatcher
+from app.services.nlu_service import NLUService
+from app.services.rule_nlu_service import RuleBasedNLUService
+
+
+@pytest.fixture
+def lookup_db(tmp_path):
+    path = str(tmp_path / "lookup.db")
+    conn = sqlite3.connect(path)
+    rows = {
+        "genders": [(1, "Men", "男性"), (2, "Women", "女性")],
+        "colours": [(1, "Black", "黑色"), (2, "Navy Blue", "海軍藍"), (3, "Blue", "藍色"), (4, "Tan", "褐色")],
+        "usages": [(1, "Casual", "休閒"), (2, "Formal", "正式")],
+        "seasons": [(1, "Summer", "夏季"), (2, "Fall", "秋季")],
+        "article_types": [(1, "Tshirts", "Tshirts"), (2, "Jeans", "Jeans"), (3, "Casual Shoes", "Casual Shoes")],
+        "sub_categories": [(1, "Topwear", "上衣")],
+        "master_categories": [(1, "Apparel", "服飾")],
+    }
+    for table, values in rows.items():
+        conn.execute(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, name TEXT, display_name TEXT)")
+        conn.executemany(f"INSERT INTO {table} VALUES (?, ?, ?)", values)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_keyword_matcher_leftmost_longest_and_word_boundaries():
+    matcher = KeywordMatcher([("blue", "b"), ("navy blue", "nb"), ("tan", "t"), ("黑色", "k")])
+    assert [m[2] for m in matcher.find("Navy Blue standard 黑色T恤")] == ["navy blue", "黑色"]
+    assert [m[3] for m in matcher.find("blue tan")] == [["b"], ["t"]]
+    assert matcher.find("bluetooth") == []
+
+
+def test_keyword_matcher_spans_index_original_text():
+    # "İ".lower() 為兩個字元，位置仍須對應原始字串
+    matcher = KeywordMatcher([("black", "k"), ("İstanbul", "s"), ("i", "i")])
+    text = "İİ BLACK İSTANBUL i"
+    assert [text[start:end] for start, end, _, _ in matcher.find(text)] == ["BLACK", "İSTANBUL", "i"]
+
+
+def test_rule_parser_extracts_filters(lookup_db):
+    rules = RuleBasedNLUService(db_path=lookup_db, min_confidence=0.6)
+    intent = rules.parse("I want black casual shoes for men")
+    assert intent["intentType"] == "semantic"
+    assert intent["entities"] == ["black", "casual shoes", "men"]
+    assert intent["filters"] == {"base_colour_id": [1], "article_type_id": [3], "gender_id": [1]}
+
+    intent = rules.parse("我想買女生夏天的海軍藍上衣")
+    assert intent["filters"] == {"gender_id": [2], "season_id": [1], "base_colour_id": [2]}
+    assert "上衣" in intent["entities"]
+
+    # 單數形式
+    assert rules.parse("navy tshirt")["filters"] == {"base_colour_id": [2], "article_type_id": [1]}
+
+    intent, _ = rules.analyze("İİ black jeans")
+    assert intent["entities"] == ["black", "jeans"]
+
+
+def test_rule_parser_reloads_changed_lookup_tables(lookup_db):
+    rules = RuleBasedNLUService(db_path=lookup_db, min_confidence=0.6, refresh_interval=3600)
+    assert rules.parse("olive jeans") is None
+
+    conn = sqlite3.connect(lookup_db)
+    conn.execute("INSERT INTO colours VALUES (5, 'Olive', '橄欖綠')")
+    conn.commit()
+    conn.close()
+    assert rules.parse("olive jeans") is None  # 尚未到檢查時間
+
+    rules.refresh_interval = 0
+    assert rules.parse("olive jeans")["filters"] == {"base_colour_id": [5], "article_type_id": [2]}
+    matcher = rules.matcher
+    rules.parse("black jeans")  # 查找表未變動時不重建
+    assert rules.matcher is matcher
+
+
+def test_rule_parser_low_confidence(lookup_db):
+    rules = RuleBasedNLUService(db_path=lookup_db, min_confidence=0.6)
+    assert rules.parse("something elegant for my sister's wedding reception in black") is None
+    assert rules.parse("???") is None
+    intent, confidence = rules.analyze("something elegant in black")
+    assert intent["filters"] == {"base_colour_id": [1]}
+    assert confidence < 0.6
+
+
+def test_nlu_service_fast_path_skips_llm(lookup_db):
+    class _FailingOllama:
+        async def chat(self, prompt, system=None, timeout=None):
+            raise AssertionError("LLM should not be called")
+
+    nlu = NLUService(ollama_service=_FailingOllama(), rules=RuleBasedNLUService(db_path=lookup_db))
+    intent = asyncio.run(nlu.parse_intent("Formal jeans"))
+    assert intent["filters"] == {"usage_id": [2], "article_type_id": [2]}
@@ -0,0 +1,287 @@
+import json
+import sqlite3
+import numpy as np
+import pytest
+from app.core.embedding_codec import HEADER_SIZE, decode_vector, encode_vector, is_binary
+from app.core.ann_index import IVFFlatIndex, QuantizedIndex, ann_index_path, top_k_rows
+from app.core.config import settings
+from app.core.embedding_snapshot import SnapshotWriter, compute_text_hash, embedding_model_id, load_snapshot, read_manifest, write_snapshot
+from app.core.vector_index import VectorIndex
+
+
+def _create_db(path, vectors):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE product_embeddings (
+            id INTEGER PRIMARY KEY,
+            product_id INTEGER UNIQUE NOT NULL,
+            embedding_model VARCHAR(100),
+            embedding_vector BLOB NOT NULL,
+            embedding_text TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    _insert(conn, vectors)
+    conn.close()
+
+
+def _insert(conn, vectors, legacy_json=False):
+    for product_id, vector in vectors.items():
+        if legacy_json:
+            blob = json.dumps([float(x) for x in vector]).encode("utf-8")
+        else:
+            blob = encode_vector(vector)
+        conn.execute(
+            "REPLACE INTO product_embeddings (product_id, embedding_model, embedding_vector) VALUES (?, ?, ?)",
+            (product_id, "test", blob),
+        )
+    conn.commit()
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    return {1000 + i: rng.normal(size=16) for i in range(200)}
+
+
+def test_search_matches_brute_force(tmp_path, vectors):
+    db_path = str(tmp_path / "test.db")
+    _create_db(db_path, vectors)
+    index = VectorIndex(db_path, snapshot_dir=None)
+    index.load()
+    assert index.size == len(vectors)
+
+    query = np.random.default_rng(1).normal(size=16)
+    ids, scores = index.search(query, top_k=5)
+
+    matrix = np.array(list(vectors.values()))
+    expected = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query))
+    order = np.argsort(expected)[::-1][:5]
+    assert ids == [list(vectors.keys())[i] for i in order]
+    assert np.allclose(scores, expected[order], atol=1e-5)
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_reload_when_embeddings_change(tmp_path, vectors):
+    db_path = str(tmp_path / "test.db")
+    _create_db(db_path, vectors)
+    index = VectorIndex(db_path, refresh_interval=0, snapshot_dir=None)
+    index.load()
+
+    target = np.zeros(16)
+    target[0] = 1.0
+    conn = sqlite3.connect(db_path)
+    _insert(conn, {9999: target})
+    conn.close()
+
+    ids, scores = index.search(target, top_k=1)
+    assert index.size == len(vectors) + 1
+    assert ids == [9999]
+    assert scores[0] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_search_empty_table(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    _create_db(db_path, {})
+    index = VectorIndex(db_path, snapshot_dir=None)
+    assert index.search(np.ones(16), top_k=5) == ([], [])
+
+
+def test_codec_round_trip_without_copy():
+    vector = np.random.default_rng(2).normal(size=384).astype(np.float32)
+    blob = encode_vector(vector)
+    assert is_binary(blob)
+    assert len(blob) == HEADER_SIZE + 384 * 4
+    decoded = decode_vector(blob)
+    assert decoded.dtype == np.float32
+    assert not decoded.flags.owndata
+    assert np.array_equal(decoded, vector)
+
+
+def test_codec_reads_legacy_json():
+    vector = [0.5, -1.25, 3.0]
+    blob = json.dumps(vector).encode("utf-8")
+    assert not is_binary(blob)
+    assert decode_vector(blob).tolist() == vector
+
+
+def test_load_mixed_formats(tmp_path, vectors):
+    db_path = str(tmp_path / "test.db")
+    _create_db(db_path, {})
+    items = list(vectors.items())
+    conn = sqlite3.connect(db_path)
+    _insert(conn, dict(items[:100]), legacy_json=True)
+    _insert(conn, dict(items[100:]))
+    conn.close()
+
+    index = VectorIndex(db_path, snapshot_dir=None)
+    index.load()
+    assert index.size == len(vectors)
+    ids, _ = index.search(items[150][1], top_k=1)
+    assert ids == [items[150][0]]
+
+
+def test_snapshot_is_memory_mapped_and_swapped(tmp_path, vectors):
+    db_path = str(tmp_path / "test.db")
+    _create_db(db_path, {})
+    snapshot_dir = str(tmp_path / "snapshots")
+    ids = list(vectors.keys())
+    matrix = np.array(list(vectors.values()))
+    write_snapshot(snapshot_dir, settings.EMBEDDING_MODEL, compute_text_hash((i, "a") for i in ids), ids, matrix)
+
+    index = VectorIndex(db_path, refresh_interval=0, snapshot_dir=snapshot_dir)
+    index.load()
+    assert isinstance(index.matrix, np.memmap)
+    assert index.size == len(vectors)
+    assert index.search(matrix[3], top_k=1)[0] == [ids[3]]
+
+    # 新版本以原子 rename 切換後，下一次查詢即可讀到
+    new_ids = ids + [9999]
+    new_matrix = np.vstack([matrix, np.ones(16)])
+    manifest = write_snapshot(
+        snapshot_dir, settings.EMBEDDING_MODEL, compute_text_hash((i, "b") for i in new_ids), new_ids, new_matrix
+    )
+    assert read_manifest(snapshot_dir)["version"] == manifest["version"]
+    assert index.search(np.ones(16), top_k=1)[0] == [9999]
+    assert index.size == len(vectors) + 1
+
+
+def test_snapshot_writer_streams_chunks(tmp_path, vectors):
+    product_ids = list(vectors.keys())
+    matrix = np.array([vectors[pid] for pid in product_ids])
+    writer = SnapshotWriter(str(tmp_path), "test-model", len(product_ids), matrix.shape[1])
+    for start in range(0, len(product_ids), 64):
+        writer.write(start, product_ids[start:start + 64], matrix[start:start + 64])
+    manifest = writer.commit("abc123")
+
+    ids, loaded = load_snapshot(str(tmp_path), manifest)
+    assert ids.tolist() == product_ids
+    expected = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    assert np.allclose(loaded, expected, atol=1e-6)
+    assert read_manifest(str(tmp_path))["version"] == manifest["version"]
+
+    # 未寫完的快照不會被發佈，暫存檔也會清除
+    partial = SnapshotWriter(str(tmp_path), "test-model", len(product_ids), matrix.shape[1])
+    partial.write(0, product_ids[:10], matrix[:10])
+    with pytest.raises(ValueError):
+        partial.commit("def456")
+    assert read_manifest(str(tmp_path))["version"] == manifest["version"]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_snapshot_for_other_model_is_ignored(tmp_path, vectors):
+    db_path = str(tmp_path / "test.db")
+    _create_db(db_path, vectors)
+    snapshot_dir = str(tmp_path / "snapshots")
+    write_snapshot(snapshot_dir, "other-model", "0" * 64, [1], np.ones((1, 16)))
+
+    index = VectorIndex(db_path, snapshot_dir=snapshot_dir)
+    index.load()
+    assert index.size == len(vectors)
+
+
+def test_snapshot_for_other_backend_is_ignored(tmp_path, vectors):
+    model = settings.EMBEDDING_MODEL
+    assert embedding_model_id(model, "torch") == model
+    assert embedding_model_id(model, "onnx") != embedding_model_id(model, "onnx-int8", "avx2")
+    assert embedding_model_id(model, "onnx-int8", "avx2") != embedding_model_id(model, "onnx-int8", "arm64")
+
+    db_path = str(tmp_path / "test.db")
+    _create_db(db_path, vectors)
+    snapshot_dir = str(tmp_path / "snapshots")
+    other_backend = "onnx-int8" if settings.EMBEDDING_BACKEND != "onnx-int8" else "torch"
+    write_snapshot(snapshot_dir, embedding_model_id(model, other_backend), "0" * 64, [1], np.ones((1, 16)))
+
+    index = VectorIndex(db_path, snapshot_dir=snapshot_dir)
+    index.load()
+    assert index.size == len(vectors)
+
+
+def test_ivf_backend_from_snapshot(tmp_path):
+    rng = np.random.default_rng(3)
+    centers = rng.normal(size=(20, 32))
+    matrix = centers[rng.integers(0, 20, 2000)] + 0.3 * rng.normal(size=(2000, 32))
+    ids = list(range(5000, 7000))
+    db_path = str(tmp_path / "test.db")
+    _create_db(db_path, {})
+    snapshot_dir = str(tmp_path / "snapshots")
+    manifest = write_snapshot(snapshot_dir, settings.EMBEDDING_MODEL, "f" * 64, ids, matrix)
+
+    index_matrix = np.load(f"{snapshot_dir}/{manifest['vectors']}")
+    ivf = IVFFlatIndex.build(index_matrix, nlist=20)
+    ivf.save(str(ann_index_path(snapshot_dir, manifest["version"], "ivf")))
+
+    exact = VectorIndex(db_path, snapshot_dir=snapshot_dir, backend="exact")
+    approx = VectorIndex(db_path, snapshot_dir=snapshot_dir, backend="ivf")
+    approx.load()
+    assert isinstance(approx.ann, IVFFlatIndex)
+    approx.ann.nprobe = 20  # 掃描全部 list 時結果應與精確搜尋相同
+    query = matrix[42]
+    assert approx.search(query, top_k=10)[0] == exact.search(query, top_k=10)[0]
+
+
+@pytest.mark.parametrize("kind", ["pq", "sq8"])
+def test_quantized_index_rerank(kind):
+    rng = np.random.default_rng(4)
+    centers = rng.normal(size=(20, 384))
+    matrix = centers[rng.integers(0, 20, 3000)] + 0.3 * rng.normal(size=(3000, 384))
+    matrix = (matrix / np.linalg.norm(matrix, axis=1, keepdims=True)).astype(np.float32)
+    index = QuantizedIndex.build(matrix, kind=kind, subspaces=48)
+    assert index.bytes_per_vector == (48 if kind == "pq" else 384)
+
+    query = matrix[7]
+    expected = top_k_rows(matrix @ query, 10)
+    rows, scores = index.search(matrix, query, 10, rerank=len(matrix))
+    assert rows.tolist() == expected.tolist()
+    assert np.allclose(scores, (matrix @ query)[expected], atol=1e-5)
+    # 未重排時也應找到最接近的向量本身
+    assert index.search(matrix, query, 10, rerank=0)[0][0] == 7
+
+
+def _create_catalogue(path, product_ids):
+    """建立 hybrid search 需要的 products 與查找表，性別 / 場合依 id 輪流分配"""
+    conn = sqlite3.connect(path)
+    for table in ("genders", "colours", "usages", "seasons", "article_types"):
+        conn.execute(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, name TEXT, display_name TEXT)")
+    conn.executemany("INSERT INTO genders VALUES (?, ?, ?)", [(1, "Men", "男性"), (2, "Women", "女性")])
+    conn.executemany("INSERT INTO usages VALUES (?, ?, ?)", [(1, "Casual", "休閒"), (2, "Formal", "正式"), (3, "Sports", "運動")])
+    conn.execute("""
+        CREATE TABLE products (
+            id INTEGER PRIMARY KEY, gender_id INTEGER, base_colour_id INTEGER, usage_id INTEGER,
+            season_id INTEGER, article_type_id INTEGER, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO products (id, gender_id, usage_id) VALUES (?, ?, ?)",
+        [(pid, 1 + i % 2, 1 + i % 3) for i, pid in enumerate(product_ids)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_filtered_search_pushes_predicates_into_index(tmp_path, vectors):
+    db_path = str(tmp_path / "test.db")
+    _create_db(db_path, vectors)
+    product_ids = list(vectors.keys())
+    _create_catalogue(db_path, product_ids)
+    index = VectorIndex(db_path, snapshot_dir=None)
+
+    # 男性 (i 為偶數) 且正式 (i % 3 == 1) 的商品
+    allowed = {pid for i, pid in enumerate(product_ids) if i % 2 == 0 and i % 3 == 1}
+    query = vectors[product_ids[1]]  # 最相近的商品本身不符合條件
+    ids, scores = index.search(query, top_k=10, filters={"gender": "Men", "usage": "正式"})
+    assert len(ids) == 10
+    assert set(ids) <= allowed
+    assert product_ids[1] not in ids
+    assert scores == sorted(scores, reverse=True)
+
+    # 與先對子集合做精確搜尋的結果相同
+    rows = [product_ids.index(pid) for pid in sorted(allowed)]
+    matrix = np.array([vectors[product_ids[r]] for r in rows])
+    expected = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query))
+    assert ids == [sorted(allowed)[i] for i in np.argsort(expected)[::-1][:10]]
+
+    # id 形式與未知的值
+    assert index.search(query, top_k=5, filters={"gender_id": 2, "usage_id": [1, 3]})[0]
+    assert index.search(query, top_k=5, filters={"gender": "Unknown"})[0] == index.search(query, top_k=5)[0]
+    assert index.search(query, top_k=5, filters={"season_id": 4}) == ([], [])